@@ -0,0 +1,193 @@
+"""
+Auto-Tuner
+Searches backend x workers x chunksize x cv2 threads for this host and
+saves the winner to a per-host profile that main.py picks up.
+
+The search is successive halving: every candidate is timed on a small
+random sample, the best 1/eta survive, the sample grows by eta, and so on
+until one candidate is left (or the sample is the whole image set). Most
+candidates are therefore only ever run on a handful of images.
+
+    python3 autotune.py --images 300 --min-images 12
+    python3 main.py --production --count 5000     # uses the saved profile
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import socket
+import time
+import utils
+import method_mp
+import method_cf
+import pool_manager
+import bench_stats
+
+BACKENDS = ('MP', 'CF_Proc', 'CF_Thread')
+PROFILE_DIR = os.path.join("output", "profiles")
+PROFILE_VERSION = 1
+
+# --- PROFILE ---
+
+def host_key():
+    """Profiles are per hostname and CPU count (a resized VM gets a new profile)."""
+    return f"{socket.gethostname()}-{os.cpu_count()}cpu"
+
+def profile_path(profile_dir=PROFILE_DIR):
+    return os.path.join(profile_dir, f"{host_key()}.json")
+
+def save_profile(config, seconds_per_image, history, search, path=None):
+    """Writes the winning config (plus the search log and host metadata)."""
+    path = path or profile_path()
+    return bench_stats.write_json(path, {
+        'version': PROFILE_VERSION,
+        'host_key': host_key(),
+        'config': config,
+        'seconds_per_image': seconds_per_image,
+        'search': search,
+        'history': history,
+    })
+
+def load_profile(path=None):
+    """Returns the saved profile dict for this host, or None."""
+    path = path or profile_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read profile '{path}': {e}")
+        return None
+    if profile.get('version') != PROFILE_VERSION:
+        print(f"Warning: ignoring profile '{path}' (version {profile.get('version')})")
+        return None
+    return profile
+
+def describe(config):
+    chunk = config['chunksize'] or 'auto'
+    cv2_threads = 'default' if config['cv2_threads'] is None else config['cv2_threads']
+    return f"{config['backend']} x{config['workers']} chunk={chunk} cv2={cv2_threads}"
+
+# --- RUNNING ONE CONFIG ---
+
+def run_config(config, task_list, pool=None, policy=None, report=None):
+    """
+    Runs task_list with a tuned config dict (backend, workers, chunksize, cv2_threads).
+    policy (straggler.Policy) applies to the process backends.
+    """
+    utils.set_cv2_threads(config['cv2_threads'])
+    backend, workers, chunksize = config['backend'], config['workers'], config['chunksize']
+    if backend == 'MP':
+        return method_mp.run_multiprocessing(task_list, workers, pool=pool, chunksize=chunksize,
+                                             policy=policy, report=report)
+    mode = 'process' if backend == 'CF_Proc' else 'thread'
+    return method_cf.run(task_list, workers, mode=mode, executor=pool, chunksize=chunksize,
+                         policy=policy, report=report)
+
+# --- SEARCH ---
+
+def candidate_space(backends, workers, chunksizes, cv2_threads):
+    """All configs; threads ignore chunksize, so CF_Thread gets a single one."""
+    configs = []
+    for backend, n, chunk, c in itertools.product(backends, workers, chunksizes, cv2_threads):
+        if backend == 'CF_Thread' and chunk is not None:
+            continue
+        configs.append({'backend': backend, 'workers': n, 'chunksize': chunk, 'cv2_threads': c})
+    return configs
+
+def successive_halving(candidates, paths, evaluate, min_images, eta=3):
+    """
+    Returns (best config, history). evaluate(config, sample) -> seconds per image.
+    history is one entry per rung: {'images': n, 'scores': [(config, s/img), ...]}.
+    """
+    survivors = list(candidates)
+    rung_size = min(min_images, len(paths))
+    history = []
+
+    while True:
+        sample = paths[:rung_size]
+        print(f"\n>>> Rung {len(history) + 1}: {len(survivors)} candidates on {len(sample)} images")
+        scores = []
+        for config in survivors:
+            score = evaluate(config, sample)
+            scores.append((config, score))
+            print(f"  {describe(config):<42} {score * 1000:8.3f} ms/image")
+        scores.sort(key=lambda cs: cs[1])
+        history.append({'images': len(sample), 'scores': scores})
+
+        survivors = [config for config, _ in scores[:max(1, len(scores) // eta)]]
+        if len(survivors) == 1 or rung_size >= len(paths):
+            return survivors[0], history
+        rung_size = min(rung_size * eta, len(paths))
+
+def tune(paths, backends=BACKENDS, workers=None, chunksizes=(None, 1, 4, 16), cv2_threads=(None, 1),
+         min_images=12, eta=3, repeats=3, engine='reference'):
+    """
+    Runs the search on paths (already shuffled). Returns (best config, s/img, history).
+    Pools are kept warm per candidate so startup cost is not part of the score.
+    """
+    workers = workers or sorted({1, 2, 4, os.cpu_count() or 1, 2 * (os.cpu_count() or 1)})
+    candidates = candidate_space(backends, workers, chunksizes, cv2_threads)
+    print(f"Search space: {len(candidates)} configs, {len(paths)} images, eta={eta}, {repeats} repeats")
+
+    with pool_manager.PoolManager(max_pools=4) as pools:
+        def evaluate(config, sample):
+            tasks = [(p, "outputs", False, engine) for p in sample]
+            utils.set_cv2_threads(config['cv2_threads'])
+            pool = pools.get(config['backend'], config['workers'], config['cv2_threads'])
+            samples = bench_stats.measure(run_config, config, tasks, pool, warmup=0, repeats=repeats)
+            return bench_stats.summarize([wall for wall, _ in samples])['median'] / len(sample)
+
+        best, history = successive_halving(candidates, paths, evaluate, min_images, eta)
+    utils.set_cv2_threads(None)
+    return best, history[-1]['scores'][0][1], history
+
+# --- CLI ---
+
+def parse_optional_ints(values, none_word):
+    """['auto', '4'] -> [None, 4]."""
+    return [None if v == none_word else int(v) for v in values]
+
+def main():
+    parser = argparse.ArgumentParser(description='Auto-tune backend/workers/chunksize/cv2 threads for this host')
+    parser.add_argument('--images', type=int, default=300, help='Largest sample (images) used by the last rung')
+    parser.add_argument('--min-images', type=int, default=12, help='Sample size of the first rung')
+    parser.add_argument('--eta', type=int, default=3, help='Keep 1/eta of candidates per rung; sample grows by eta')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per candidate per rung (median is used)')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help='Worker counts (default 1, 2, 4, CPUs, 2 x CPUs)')
+    parser.add_argument('--chunksizes', nargs='+', default=['auto', '1', '4', '16'], help="Chunksizes ('auto' = backend default)")
+    parser.add_argument('--cv2-threads', nargs='+', default=['default', '1'], help="cv2 thread counts ('default' = OpenCV default)")
+    parser.add_argument('--engine', choices=utils.ENGINES, default='reference')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random image sample')
+    parser.add_argument('--profile', default=None, help=f'Profile file (default {profile_path()})')
+    args = parser.parse_args()
+
+    paths = utils.get_image_paths("images")
+    if not paths:
+        print("No images found.")
+        return
+    random.Random(args.seed).shuffle(paths)
+    paths = paths[:args.images]
+
+    search = {'images': len(paths), 'min_images': args.min_images, 'eta': args.eta, 'repeats': args.repeats,
+              'backends': args.backends, 'workers': args.workers, 'engine': args.engine,
+              'chunksizes': args.chunksizes, 'cv2_threads': args.cv2_threads, 'seed': args.seed}
+    start = time.time()
+    best, score, history = tune(paths, args.backends, args.workers,
+                                parse_optional_ints(args.chunksizes, 'auto'),
+                                parse_optional_ints(args.cv2_threads, 'default'),
+                                args.min_images, args.eta, args.repeats, args.engine)
+
+    print("\n" + "=" * 60)
+    print(f"Best: {describe(best)} ({score * 1000:.3f} ms/image, search took {time.time() - start:.1f}s)")
+    path = save_profile(best, score, history, search, args.profile)
+    print(f"[Saved] Profile: {path}")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark Statistics
+Timing, robust summaries and host metadata for the benchmark harness.
+
+Every measurement is a (wall, cpu) pair from perf_counter / process_time
+(cpu is the controller process only; pool workers are not included).
+Samples are summarized with median and IQR, a bootstrap 95% confidence
+interval, and Tukey outlier fences (1.5 x IQR). Speedup and efficiency get
+their own bootstrap intervals, so they are reported with error bars rather
+than as a ratio of two single noisy means.
+"""
+
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 12345
+OUTLIER_FENCE = 1.5
+
+# --- TIMING ---
+
+def timed(func, *args, **kwargs):
+    """Runs func once. Returns (wall_seconds, cpu_seconds)."""
+    gc.collect()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    func(*args, **kwargs)
+    return time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+def measure(func, *args, warmup=1, repeats=3, **kwargs):
+    """Untimed warm-up calls followed by `repeats` timed calls. Returns [(wall, cpu), ...]."""
+    for _ in range(warmup):
+        func(*args, **kwargs)
+    return [timed(func, *args, **kwargs) for _ in range(repeats)]
+
+def shuffled(items, rng):
+    """Copy of items in random order (used to randomize method order per iteration)."""
+    items = list(items)
+    rng.shuffle(items)
+    return items
+
+# --- SUMMARIES ---
+
+def _bootstrap(samples, statistic, seed=BOOTSTRAP_SEED):
+    data = np.asarray(samples, dtype=float)
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(data), size=(BOOTSTRAP_RESAMPLES, len(data)))
+    return statistic(data[picks], axis=1)
+
+def _interval(values):
+    alpha = (1 - CONFIDENCE) / 2
+    low, high = np.quantile(values, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+def summarize(samples):
+    """
+    Robust summary of a list of timings.
+    Returns dict with n, mean, median, q1, q3, iqr, stdev, ci (median), outliers.
+    """
+    data = np.asarray(samples, dtype=float)
+    q1, median, q3 = (float(v) for v in np.quantile(data, [0.25, 0.5, 0.75]))
+    iqr = q3 - q1
+    low, high = q1 - OUTLIER_FENCE * iqr, q3 + OUTLIER_FENCE * iqr
+    ci = _interval(_bootstrap(data, np.median)) if len(data) > 1 else (median, median)
+    return {
+        'n': len(data),
+        'mean': float(data.mean()),
+        'median': median,
+        'q1': q1,
+        'q3': q3,
+        'iqr': iqr,
+        'stdev': float(data.std(ddof=1)) if len(data) > 1 else 0.0,
+        'ci': ci,
+        'outliers': [float(v) for v in data if v < low or v > high],
+    }
+
+def speedup(serial_samples, parallel_samples, workers):
+    """
+    Speedup (median serial / median parallel) and efficiency with bootstrap
+    confidence intervals. Returns dict with speedup, speedup_ci, efficiency, efficiency_ci.
+    """
+    point = float(np.median(serial_samples) / np.median(parallel_samples))
+    if len(serial_samples) > 1 and len(parallel_samples) > 1:
+        ratios = _bootstrap(serial_samples, np.median) / _bootstrap(parallel_samples, np.median, BOOTSTRAP_SEED + 1)
+        ci = _interval(ratios)
+    else:
+        ci = (point, point)
+    return {
+        'speedup': point,
+        'speedup_ci': ci,
+        'efficiency': point / workers,
+        'efficiency_ci': (ci[0] / workers, ci[1] / workers),
+    }
+
+def error_bar(value, ci):
+    """(lower, upper) distances from value to the ends of ci, for matplotlib yerr."""
+    return max(value - ci[0], 0.0), max(ci[1] - value, 0.0)
+
+# --- METADATA & OUTPUT ---
+
+def host_metadata():
+    """CPU, thread and library information stored next to every result file."""
+    import cv2
+    from importlib import metadata
+    try:
+        # Version only: importing matplotlib here would cost every --no-plots run its import time
+        matplotlib_version = metadata.version("matplotlib")
+    except metadata.PackageNotFoundError:
+        matplotlib_version = None
+    meta = {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'matplotlib': matplotlib_version,
+        'cv2_threads': cv2.getNumThreads(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    if hasattr(os, 'sched_getaffinity'):
+        meta['usable_cpus'] = len(os.sched_getaffinity(0))
+    if hasattr(os, 'getloadavg'):
+        meta['loadavg'] = os.getloadavg()
+    return meta
+
+def write_json(path, payload):
+    """Writes payload (plus host metadata) as indented JSON."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'host': host_metadata(), **payload}, f, indent=2)
+    return path
+
+def new_rng(seed=None):
+    return random.Random(seed)
@@ -0,0 +1,158 @@
+"""
+Engine Comparison Utility
+Measures per-image latency and peak RSS of the reference pipeline
+against the fused and tiled engines, and checks that all produce the same output.
+--upscale enlarges every frame first, to exercise the tiled engine on huge images.
+Each engine runs in a fresh child process so peak RSS is not shared.
+--sobel instead compares the Sobel precision modes (utils.SOBEL_PRECISIONS) on the
+real Sobel input of every frame: latency, temporaries per pixel, and PSNR / max
+absolute difference against the float64 output, and picks the fastest mode that
+meets --min-psnr.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+import cv2
+import numpy as np
+import utils
+
+def load_images(paths, upscale=1.0):
+    images = [utils.load_image(p) for p in paths]
+    images = [img for img in images if img is not None]
+    if upscale != 1.0:
+        images = [cv2.resize(img, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_LINEAR) for img in images]
+    return images
+
+def run_engine(engine, paths, repeats, upscale=1.0):
+    """
+    Child process entry: decodes the images and times the pipeline only.
+    Returns (engine, seconds_per_image, peak_rss_mb).
+    """
+    images = load_images(paths, upscale)
+
+    # Warm-up (LUT build, scratch buffer allocation)
+    utils.process_pipeline(images[0], engine)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for img in images:
+            utils.process_pipeline(img, engine)
+    elapsed = time.perf_counter() - start
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return engine, elapsed / (repeats * len(images)), peak_rss_mb
+
+def verify_outputs(paths, upscale=1.0):
+    """Returns {engine: max absolute pixel difference against the reference engine}."""
+    max_diff = {engine: 0 for engine in utils.ENGINES if engine != 'reference'}
+    for img in load_images(paths, upscale):
+        ref = utils.process_pipeline(img, 'reference').astype(np.int16)
+        for engine in max_diff:
+            out = utils.process_pipeline(img, engine)
+            max_diff[engine] = max(max_diff[engine], int(np.abs(ref - out).max()))
+    return max_diff
+
+# --- SOBEL PRECISION ---
+
+# Approximate bytes per pixel of the temporaries each mode allocates
+SOBEL_TEMP_BYTES = {'float64': 48, 'float32': 12, 'int16': 14, 'int16_l1': 4}
+
+def psnr(reference, output):
+    """Peak signal-to-noise ratio in dB of a uint8 output (inf when identical)."""
+    mse = np.mean((reference.astype(np.float64) - output.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+def sobel_inputs(images):
+    """What apply_sobel_edge_detection receives inside the reference pipeline."""
+    inputs = []
+    for img in images:
+        img = utils.adjust_brightness(utils.apply_gaussian_blur(img))
+        inputs.append(utils.apply_grayscale(utils.apply_sharpening(img)))
+    return inputs
+
+def sobel_report(images, repeats):
+    """{precision: {'ms', 'psnr_min', 'psnr_mean', 'max_diff'}} against the float64 output."""
+    inputs = sobel_inputs(images)
+    references = [utils.apply_sobel_edge_detection(g, 'float64') for g in inputs]
+    report = {}
+    for precision in utils.SOBEL_PRECISIONS:
+        outputs = [utils.apply_sobel_edge_detection(g, precision) for g in inputs]
+        scores = [psnr(r, o) for r, o in zip(references, outputs)]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for g in inputs:
+                utils.apply_sobel_edge_detection(g, precision)
+        report[precision] = {
+            'ms': (time.perf_counter() - start) / (repeats * len(inputs)) * 1000,
+            'psnr_min': min(scores),
+            'psnr_mean': float(np.mean([min(v, 100.0) for v in scores])),  # identical frames count as 100 dB
+            'max_diff': max(int(np.abs(r.astype(np.int16) - o).max()) for r, o in zip(references, outputs)),
+        }
+    return report
+
+def pick_precision(report, min_psnr):
+    """Fastest precision whose worst-frame PSNR meets min_psnr (float64 always does)."""
+    ok = [p for p, r in report.items() if r['psnr_min'] >= min_psnr]
+    return min(ok, key=lambda p: report[p]['ms'])
+
+def print_sobel_report(report, min_psnr):
+    print("-" * 78)
+    print(f"{'Precision':<10} | {'ms/image':<9} | {'Speedup':<7} | {'Bytes/px':<8} | "
+          f"{'PSNR min':<9} | {'PSNR mean':<9} | {'Max diff':<8}")
+    print("-" * 78)
+    base = report['float64']['ms']
+    fmt = lambda v: 'exact' if v == float('inf') else f"{v:.1f}"
+    for precision, r in report.items():
+        print(f"{precision:<10} | {r['ms']:<9.3f} | {base / r['ms']:<7.2f} | {SOBEL_TEMP_BYTES[precision]:<8} | "
+              f"{fmt(r['psnr_min']):<9} | {fmt(r['psnr_mean']):<9} | {r['max_diff']:<8}")
+    print("-" * 78)
+    best = pick_precision(report, min_psnr)
+    print(f"Fastest mode with PSNR >= {min_psnr:g} dB on every frame: {best} "
+          f"(use --sobel-precision {best} with main.py)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline engine comparison')
+    parser.add_argument('--count', type=int, default=50, help='Number of images')
+    parser.add_argument('--repeats', type=int, default=3, help='Passes over the image set')
+    parser.add_argument('--upscale', type=float, default=1.0, help='Resize factor applied to every frame')
+    parser.add_argument('--sobel', action='store_true', help='Compare Sobel precision modes instead of engines')
+    parser.add_argument('--min-psnr', type=float, default=40.0, help='--sobel: quality bar in dB against float64')
+    args = parser.parse_args()
+
+    paths = utils.get_image_paths("images", limit=args.count)
+    if not paths:
+        print("No images found.")
+        return
+
+    if args.sobel:
+        print(f"Comparing Sobel precision modes on {len(paths)} images ({args.repeats} passes)...")
+        print_sobel_report(sobel_report(load_images(paths, args.upscale), args.repeats), args.min_psnr)
+        return
+
+    print(f"Comparing engines on {len(paths)} images ({args.repeats} passes)...")
+    print("-" * 55)
+    print(f"{'Engine':<12} | {'ms/image':<12} | {'Peak RSS (MB)':<14}")
+    print("-" * 55)
+
+    stats = {}
+    for engine in utils.ENGINES:
+        # maxtasksperchild=1 + a new pool per engine keeps ru_maxrss isolated
+        with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+            _, latency, rss = pool.apply(run_engine, (engine, paths, args.repeats, args.upscale))
+        stats[engine] = (latency, rss)
+        print(f"{engine:<12} | {latency * 1000:<12.3f} | {rss:<14.1f}")
+
+    print("-" * 55)
+    ref_latency, ref_rss = stats['reference']
+    diffs = verify_outputs(paths, args.upscale)
+    for engine, (latency, rss) in stats.items():
+        if engine == 'reference':
+            continue
+        print(f"[{engine}] Latency speedup: {ref_latency / latency:.2f}x, "
+              f"Peak RSS saved: {ref_rss - rss:.1f} MB, Max pixel diff: {diffs[engine]}")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -4,71 +4,76 @@ Identifies the exact image count needed for stability.
 Saves all reports and plots to the 'outputs/' folder.
 """
 
-import time
 import csv
 import os
 import multiprocessing
-import gc
 import matplotlib.pyplot as plt
 import utils
 import method_mp
 import method_cf
+import pool_manager
+import manifest
+import bench_stats
 
 # --- CONFIGURATION: OUTPUT DIRECTORY ---
 OUTPUT_DIR = "output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# --- HELPER: ROBUST TIMER ---
-def measure_time(func, *args, **kwargs):
-    """
-    Measures execution time with system stabilization.
-    """
-    time.sleep(1) # Short cool down
-    gc.collect()  # Force cleanup
-    
-    start = time.time()
-    func(*args, **kwargs)
-    end = time.time()
-    
-    return end - start
+# --- HARNESS SETTINGS ---
+WARMUP = 1    # Untimed runs per method before measuring
+REPEATS = 5   # Timed runs per method (method order is shuffled every repeat)
 
-def test_image_count(image_count, workers):
+def test_image_count(image_count, workers, pools=None, dataset=None, rng=None):
     """
     Test a specific image count with all 3 parallel methods + Serial.
+    With a PoolManager, warm pools are reused so spawn/import cost is not timed.
+    With a Manifest, paths come from the index instead of a directory rescan.
+    Returns (actual_count, {method: [wall seconds per repeat]}).
     """
+    get_pool = lambda backend, n: pools.get(backend, n) if pools else None
     INPUT_DIR = "images"
     # Update: Put generated images in outputs folder (even if saving is False)
     IMG_OUT_DIR = os.path.join(OUTPUT_DIR, "test_images")
     
     # 1. Load Data
     print(f"\n[ Dataset: {image_count} Images ] Loading...", end="", flush=True)
-    all_image_paths = utils.get_image_paths(INPUT_DIR, limit=image_count)
+    if dataset is not None:
+        all_image_paths = dataset.paths(limit=image_count)
+    else:
+        all_image_paths = utils.get_image_paths(INPUT_DIR, limit=image_count)
     actual_count = len(all_image_paths)
     print(f" Loaded {actual_count}.")
 
     # Tasks (Saving Disabled for pure CPU testing)
     tasks = [(p, IMG_OUT_DIR, False) for p in all_image_paths[:actual_count]]
-    results = {}
-    
+    runners = {
+        'Serial': lambda: method_mp.run_multiprocessing(tasks, 1, pool=get_pool('MP', 1)),
+        'MP': lambda: method_mp.run_multiprocessing(tasks, workers, pool=get_pool('MP', workers)),
+        'CF_Proc': lambda: method_cf.run(tasks, workers, mode='process', executor=get_pool('CF_Proc', workers)),
+        'CF_Thread': lambda: method_cf.run(tasks, workers, mode='thread', executor=get_pool('CF_Thread', workers)),
+    }
+    rng = rng or bench_stats.new_rng()
+    samples = {method: [] for method in runners}
+
     # 2. Run Tests
-    print(f"  Running: Serial...", end="", flush=True)
-    results['Serial'] = measure_time(method_mp.run_multiprocessing, tasks, 1)
-    
-    print(f" | MP...", end="", flush=True)
-    results['MP'] = measure_time(method_mp.run_multiprocessing, tasks, workers)
-    
-    print(f" | CF_Proc...", end="", flush=True)
-    results['CF_Proc'] = measure_time(method_cf.run, tasks, workers, mode='process')
-    
-    print(f" | CF_Thread...", end="", flush=True)
-    results['CF_Thread'] = measure_time(method_cf.run, tasks, workers, mode='thread')
+    print(f"  Warm-up...", end="", flush=True)
+    for _ in range(WARMUP):
+        for method in bench_stats.shuffled(runners, rng):
+            runners[method]()
+
+    for repeat in range(REPEATS):
+        print(f" | Run {repeat + 1}/{REPEATS}...", end="", flush=True)
+        for method in bench_stats.shuffled(runners, rng):
+            wall, _ = bench_stats.timed(runners[method])
+            samples[method].append(wall)
     
     print(" Done.")
-    return actual_count, results
+    return actual_count, samples
 
 def print_batch_analysis(count, results, workers):
     """
     Prints a detailed table for the specific batch just run.
+    results: {method: median seconds}; samples are summarized by summarize_batch().
     """
     t_serial = results['Serial']
     
@@ -92,10 +97,34 @@ def print_batch_analysis(count, results, workers):
         print(f"{method:<15} | {t_curr:<10.4f} | {speedup:<9.2f}x | {efficiency:<9.1f}%")
     print("-" * 65)
 
+def summarize_batch(samples, workers):
+    """
+    Per-method statistics for one image count: summary of the timings plus
+    speedup/efficiency against Serial with confidence intervals.
+    """
+    summary = {}
+    for method, times in samples.items():
+        summary[method] = bench_stats.summarize(times)
+        summary[method].update(bench_stats.speedup(samples['Serial'], times, 1 if method == 'Serial' else workers))
+    return summary
+
+def print_batch_spread(summary):
+    """Median, IQR, confidence interval and outliers for each method."""
+    print(f"{'Method':<15} | {'Median':<8} | {'IQR':<8} | {'95% CI':<17} | {'Speedup CI':<13} | {'Outliers':<8}")
+    print("-" * 85)
+    for method, s in summary.items():
+        ci = f"[{s['ci'][0]:.3f}, {s['ci'][1]:.3f}]"
+        sp_ci = f"[{s['speedup_ci'][0]:.2f}, {s['speedup_ci'][1]:.2f}]"
+        print(f"{method:<15} | {s['median']:<8.4f} | {s['iqr']:<8.4f} | {ci:<17} | {sp_ci:<13} | {len(s['outliers']):<8}")
+    print("-" * 85)
+
 def main():
     # --- CONFIGURATION ---
     TARGET_COUNTS = [100, 500, 1000, 2000, 4000, 6000, 8000, 10000]
     WORKERS = 8  
+    WARM_POOLS = True  # Reuse warmed pools across counts (startup reported separately)
+    MANIFEST = os.path.join(OUTPUT_DIR, "manifest.json")  # Scan images/ once, not per count
+    SHUFFLE_SEED = None  # Set for a reproducible method order
     
     print("=" * 70)
     print(f"SATURATION TEST: Optimizing for {WORKERS} Cores")
@@ -103,7 +132,11 @@ def main():
     print("=" * 70)
     
     all_results = {}
+    all_summaries = {}
+    rng = bench_stats.new_rng(SHUFFLE_SEED)
     max_reached = False
+    pools = pool_manager.PoolManager() if WARM_POOLS else None
+    dataset = manifest.open_manifest("images", MANIFEST) if MANIFEST else None
     
     # --- TEST LOOP ---
     for target in TARGET_COUNTS:
@@ -111,11 +144,13 @@ def main():
             
         try:
             # 1. Run Test
-            actual, times = test_image_count(target, WORKERS)
-            all_results[actual] = times
+            actual, samples = test_image_count(target, WORKERS, pools, dataset, rng)
+            all_summaries[actual] = summarize_batch(samples, WORKERS)
+            all_results[actual] = times = {m: s['median'] for m, s in all_summaries[actual].items()}
             
             # 2. Print Immediate Detailed Analysis
             print_batch_analysis(actual, times, WORKERS)
+            print_batch_spread(all_summaries[actual])
             
             if actual < target:
                 print(f"  ! Max dataset size reached ({actual}). Stopping loop.")
@@ -125,22 +160,36 @@ def main():
             print(f"  ERROR: {e}")
             continue
 
+    if pools:
+        print("\nPool Startup Cost (excluded from the timings above)")
+        pools.print_startup_costs()
+        pools.close()
+
     # --- SAVE CSV ---
     csv_path = os.path.join(OUTPUT_DIR, "saturation_results.csv")
     try:
         with open(csv_path, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(['Image_Count', 'Method', 'Time', 'Speedup', 'Efficiency'])
+            writer.writerow(['Image_Count', 'Method', 'Time', 'Speedup', 'Efficiency',
+                             'Time_IQR', 'Time_CI_Low', 'Time_CI_High', 'Speedup_CI_Low', 'Speedup_CI_High'])
             for count, times in all_results.items():
                 t_serial = times['Serial']
                 for method, t in times.items():
+                    s = all_summaries[count][method]
                     speedup = t_serial / t if t > 0 else 0
                     eff = (speedup / WORKERS) if method != 'Serial' else 1.0
-                    writer.writerow([count, method, t, speedup, eff])
+                    writer.writerow([count, method, t, speedup, eff,
+                                     s['iqr'], s['ci'][0], s['ci'][1], s['speedup_ci'][0], s['speedup_ci'][1]])
         print(f"\n[Saved] Data saved to {csv_path}")
     except Exception as e:
         print(f"Could not save CSV: {e}")
 
+    json_path = bench_stats.write_json(os.path.join(OUTPUT_DIR, "saturation_results.json"), {
+        'config': {'workers': WORKERS, 'warmup': WARMUP, 'repeats': REPEATS, 'shuffle_seed': SHUFFLE_SEED},
+        'results': {str(count): summary for count, summary in all_summaries.items()},
+    })
+    print(f"[Saved] Results JSON: {json_path}")
+
     # --- FINAL EXECUTIVE SUMMARY ---
     print("\n" + "=" * 85)
     print(f"EXECUTIVE SUMMARY: Speedup Matrix")
@@ -168,9 +217,9 @@ def main():
         print(f"{count:<8} | {t_serial:<10.2f} || {s_mp:<10.2f} | {s_cf_p:<10.2f} | {s_cf_t:<10.2f} || {winner:<10}")
     
     print("-" * 85)
-    generate_plot(all_results, WORKERS)
+    generate_plot(all_results, WORKERS, all_summaries)
 
-def generate_plot(all_results, workers):
+def generate_plot(all_results, workers, all_summaries=None):
     print("Generating Plot...")
     plt.figure(figsize=(10, 6))
     
@@ -186,8 +235,12 @@ def generate_plot(all_results, workers):
             t_parallel = all_results[count][method]
             speedup = t_serial / t_parallel if t_parallel > 0 else 0
             y_vals.append(speedup)
-            
-        plt.plot(x_vals, y_vals, marker='o', label=method, color=colors[method])
+
+        yerr = None
+        if all_summaries:
+            yerr = list(zip(*(bench_stats.error_bar(y, all_summaries[count][method]['speedup_ci'])
+                              for count, y in zip(x_vals, y_vals))))
+        plt.errorbar(x_vals, y_vals, yerr=yerr, capsize=4, marker='o', label=method, color=colors[method])
 
     plt.axhline(y=1, color='red', linestyle='--', label='Serial (1.0x)')
     plt.axhline(y=workers, color='gray', linestyle=':', label=f'Ideal ({workers}x)')
@@ -0,0 +1,207 @@
+"""
+Decoded Frame Cache
+Memory-mapped on-disk store of decoded images, so repeated runs skip JPEG decode.
+
+Layout of a cache directory:
+    frames.bin   one packed file holding raw uint8 frames back to back
+    index.json   {key: [offset, shape, last_populated]} for every stored frame
+
+Keys include the source file's mtime and size, so edited images miss.
+The parent process is the only writer (populate() before a run); workers
+open the store read-only and map frames straight out of frames.bin.
+When the size cap is reached, the frames least recently populated are
+evicted first. populate() stamps every frame a run asks for, so this is
+LRU at run granularity: reads by workers during the run are not recorded.
+"""
+
+import bisect
+import concurrent.futures
+import json
+import os
+import cv2
+import numpy as np
+
+DATA_FILE = "frames.bin"
+INDEX_FILE = "index.json"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ALIGN = 64
+
+def _aligned(nbytes):
+    return (nbytes + ALIGN - 1) // ALIGN * ALIGN
+
+def cache_key(path):
+    """Key for a source image; None if the file cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+class FrameCache:
+    """
+    Packed, memory-mapped frame store with a size cap (least recently populated out first).
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, readonly=False):
+        self.cache_dir = cache_dir
+        self.readonly = readonly
+        self.data_path = os.path.join(cache_dir, DATA_FILE)
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.index = {}
+        self.index_mtime = None
+        self.data = None
+        self.clock = 0
+        self.max_bytes = max_bytes
+
+        if not readonly:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+        if not readonly:
+            # A store created with a larger cap: drop frames past the new one
+            beyond = [key for key, (offset, shape, _) in self.index.items()
+                      if offset + _aligned(int(np.prod(shape))) > self.max_bytes]
+            for key in beyond:
+                del self.index[key]
+            if beyond:
+                self.save_index()
+            # Sparse file at full capacity: only written regions use disk
+            with open(self.data_path, 'ab') as f:
+                if f.tell() != self.max_bytes:
+                    f.truncate(self.max_bytes)
+            self.data = np.memmap(self.data_path, dtype=np.uint8, mode='r+')
+            # Sorted offsets of live frames, for gap search on eviction
+            self.offsets = sorted(entry[0] for entry in self.index.values())
+            self.by_offset = {entry[0]: key for key, entry in self.index.items()}
+            self.tail = max((e[0] + _aligned(int(np.prod(e[1]))) for e in self.index.values()), default=0)
+
+    # --- INDEX ---
+
+    def _load_index(self):
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self.index_mtime:
+            return
+        with open(self.index_path) as f:
+            self.index = json.load(f)
+        self.index_mtime = mtime
+        self.clock = max((e[2] for e in self.index.values()), default=0)
+        if self.readonly:
+            # Re-map: the writer may have grown the file
+            self.data = np.memmap(self.data_path, dtype=np.uint8, mode='r')
+
+    def save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        self.index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    # --- READ ---
+
+    def get(self, path):
+        """Returns a read-only view of the cached frame for path, or None on a miss."""
+        if self.readonly:
+            self._load_index()
+        key = cache_key(path)
+        entry = self.index.get(key) if key else None
+        if entry is None or self.data is None:
+            return None
+        offset, shape, _ = entry
+        nbytes = int(np.prod(shape))
+        if not self.readonly:
+            self.clock += 1
+            entry[2] = self.clock
+        frame = self.data[offset:offset + nbytes].reshape(shape)
+        return np.asarray(frame)
+
+    # --- WRITE ---
+
+    def put(self, path, image):
+        """Stores a decoded frame. Returns False if it is larger than the whole cache."""
+        key = cache_key(path)
+        nbytes = _aligned(image.nbytes)
+        if key is None or nbytes > self.max_bytes:
+            return False
+        if key in self.index:
+            return True
+
+        offset = self._allocate(nbytes)
+        self.data[offset:offset + image.nbytes] = image.reshape(-1)
+        self.clock += 1
+        self.index[key] = [offset, list(image.shape), self.clock]
+        bisect.insort(self.offsets, offset)
+        self.by_offset[offset] = key
+        self.tail = max(self.tail, offset + nbytes)
+        return True
+
+    def _entry_end(self, key):
+        offset, shape, _ = self.index[key]
+        return offset + _aligned(int(np.prod(shape)))
+
+    def _gap_at(self, pos):
+        """(start, size) of the free gap that follows the frame at offsets[pos-1]."""
+        start = self._entry_end(self.by_offset[self.offsets[pos - 1]]) if pos > 0 else 0
+        end = self.offsets[pos] if pos < len(self.offsets) else self.max_bytes
+        return start, end - start
+
+    def _allocate(self, nbytes):
+        # Fast path: append after the last frame
+        if self.tail + nbytes <= self.max_bytes:
+            return self.tail
+
+        # Full: evict least recently used frames until one leaves a big enough gap
+        for key in sorted(self.index, key=lambda k: self.index[k][2]):
+            offset = self.index.pop(key)[0]
+            pos = bisect.bisect_left(self.offsets, offset)
+            del self.offsets[pos]
+            del self.by_offset[offset]
+            self.tail = self._entry_end(self.by_offset[self.offsets[-1]]) if self.offsets else 0
+            if self.tail + nbytes <= self.max_bytes:
+                return self.tail
+            start, size = self._gap_at(pos)
+            if size >= nbytes:
+                return start
+
+        return 0
+
+    def populate(self, paths, threads=4):
+        """
+        Makes sure every path is in the cache, decoding misses on a thread pool.
+        Returns (hits, misses).
+        """
+        hits, misses = 0, []
+        for p in paths:
+            if self.get(p) is not None:
+                hits += 1
+            else:
+                misses.append(p)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+            for p, image in zip(misses, pool.map(cv2.imread, misses)):
+                if image is not None:
+                    self.put(p, image)
+
+        self.data.flush()
+        self.save_index()
+        return hits, len(misses)
+
+    def size_bytes(self):
+        return sum(_aligned(int(np.prod(e[1]))) for e in self.index.values())
+
+# --- WORKER SIDE ---
+
+_readers = {}
+
+def load_cached(path, cache_dir):
+    """
+    Returns the cached frame for path from the store in cache_dir, or None.
+    The read-only store is opened once per worker process.
+    """
+    reader = _readers.get(cache_dir)
+    if reader is None:
+        reader = FrameCache(cache_dir, readonly=True)
+        _readers[cache_dir] = reader
+    return reader.get(path)
@@ -0,0 +1,144 @@
+"""
+Load Generator
+Open-loop load against service.py at a fixed request rate.
+
+Requests are sent on a fixed schedule (request k at start + k / rate)
+whether or not earlier ones have returned. Latency is measured from the
+scheduled send time, so a stalled server shows up as queueing delay
+instead of silently slowing the generator down (coordinated omission).
+Reports p50/p95/p99 latency of successful requests, achieved throughput,
+and how many requests were rejected (503) or failed.
+
+    python3 loadgen.py --url http://127.0.0.1:8435 --rate 200 --duration 10
+    python3 loadgen.py --unix /tmp/cst435.sock --rate 50 --duration 5
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+import numpy as np
+import utils
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=60):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+def connection_factory(url=None, unix_path=None):
+    if unix_path:
+        return lambda: UnixHTTPConnection(unix_path)
+    parsed = urlparse(url)
+    return lambda: http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+
+def percentiles(latencies):
+    if not latencies:
+        return {'p50': None, 'p95': None, 'p99': None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+def run_load(connect, payloads, rate, duration, concurrency=64, query=''):
+    """
+    Sends rate x duration requests on an open-loop schedule.
+    Returns dict with latency percentiles (s), throughput and status counts.
+    """
+    total = int(rate * duration)
+    local = threading.local()
+    statuses = collections.Counter()
+    latencies = []
+    lock = threading.Lock()
+
+    def send(k, scheduled):
+        conn = getattr(local, 'conn', None) or connect()
+        local.conn = conn
+        body = payloads[k % len(payloads)]
+        try:
+            conn.request('POST', '/process' + query, body=body, headers={'Content-Type': 'application/octet-stream'})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            status = 'error'
+        latency = time.perf_counter() - scheduled
+        with lock:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(latency)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for k in range(total):
+            scheduled = start + k / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, k, scheduled)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': total,
+        'rate': rate,
+        'duration': elapsed,
+        'ok': statuses.get(200, 0),
+        'rejected': statuses.get(503, 0),
+        'failed': total - statuses.get(200, 0) - statuses.get(503, 0),
+        'throughput': statuses.get(200, 0) / elapsed if elapsed > 0 else 0.0,
+        **percentiles(latencies),
+    }
+
+def print_result(r):
+    ms = lambda v: '-' if v is None else f"{v * 1000:.1f}"
+    print(f"{'Rate':<8} | {'Sent':<6} | {'OK':<6} | {'503':<5} | {'Fail':<5} | {'Thru (/s)':<9} | "
+          f"{'p50 ms':<8} | {'p95 ms':<8} | {'p99 ms':<8}")
+    print("-" * 88)
+    print(f"{r['rate']:<8g} | {r['requests']:<6} | {r['ok']:<6} | {r['rejected']:<5} | {r['failed']:<5} | "
+          f"{r['throughput']:<9.1f} | {ms(r['p50']):<8} | {ms(r['p95']):<8} | {ms(r['p99']):<8}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load generator for service.py')
+    parser.add_argument('--url', default='http://127.0.0.1:8435')
+    parser.add_argument('--unix', default=None, help='Unix socket path (instead of --url)')
+    parser.add_argument('--rate', type=float, nargs='+', default=[50.0], help='Requests per second (several = a sweep)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per rate')
+    parser.add_argument('--images', type=int, default=50, help='Distinct images cycled as payloads')
+    parser.add_argument('--concurrency', type=int, default=64, help='Max requests outstanding (client threads)')
+    parser.add_argument('--format', default='.png', help='Output format requested from the service')
+    parser.add_argument('--json', default=None, help='Write the results to this file')
+    args = parser.parse_args()
+
+    paths = utils.get_image_paths("images", limit=args.images)
+    payloads = []
+    for p in paths:
+        with open(p, 'rb') as f:
+            payloads.append(f.read())
+    if not payloads:
+        print("No images found.")
+        return
+
+    connect = connection_factory(args.url, args.unix)
+    results = []
+    for rate in args.rate:
+        print(f"\n>>> {rate:g} req/s for {args.duration:g}s ({len(payloads)} distinct images)")
+        result = run_load(connect, payloads, rate, args.duration, args.concurrency, f"?format={args.format}")
+        print_result(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"[Saved] {args.json}")
+
+if __name__ == "__main__":
+    main()
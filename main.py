@@ -1,16 +1,39 @@
 import time
+IMPORT_START = time.perf_counter()
+import contextlib
 import multiprocessing
 import os
 import argparse
 import numpy as np
 import utils
-import method_mp
-import method_cf
-import matplotlib.pyplot as plt
+import method_hybrid
+import startup
 from collections import defaultdict
+# Everything else is imported in the functions that use it: spawn and forkserver
+# children re-import this module, and they only need what the workers run
+IMPORT_SECONDS = time.perf_counter() - IMPORT_START  # CLI startup, reported with every benchmark
 
-def run_benchmark_suite(IMAGE_COUNT, WORKER_COUNTS, RUNS_PER_CONFIG, GENERATE_PLOTS, SAVE_IMAGES):
+DEFAULT_METHODS = ['MP', 'CF_Proc', 'CF_Thread']
+ALL_METHODS = ['MP', 'CF_Proc', 'CF_Thread', 'Dist', 'Hybrid', 'Async']
+
+def run_benchmark_suite(IMAGE_COUNT, WORKER_COUNTS, RUNS_PER_CONFIG, GENERATE_PLOTS, SAVE_IMAGES, ENGINE='reference', TRANSPORT='pickle',
+                        SCHEDULE='default', COST_MODEL='size', WORKER_REPORT=False,
+                        WARM_POOLS=False, FRAME_CACHE=None, CACHE_MB=2048, WRITER_OPTIONS=None,
+                        MANIFEST=None, SAMPLE_SEED=None, METHODS=None, DIST_OPTIONS=None,
+                        WARMUP=1, SHUFFLE_SEED=None, RESULTS_JSON=None, CHUNKSIZE=None,
+                        BATCH_SIZE=None, TELEMETRY=None, ASYNC_IO=None, POLICY=None, STARTUP=None):
+    import bench_stats
+    import method_cf
+    import method_mp
+    import output_writer
+    import pool_manager
+    import scheduler
+    import tracing
+    if TELEMETRY:
+        import telemetry
     print("--- Starting Benchmark Suite ---")
+    # Worker counts may be plain ints or P x T x C shapes (see method_hybrid.WorkerShape)
+    WORKER_COUNTS = [method_hybrid.WorkerShape.parse(w) for w in WORKER_COUNTS]
     
     # 1. SETUP & DIRECTORIES
     INPUT_DIR = os.path.join("images")
@@ -21,10 +44,13 @@ def run_benchmark_suite(IMAGE_COUNT, WORKER_COUNTS, RUNS_PER_CONFIG, GENERATE_PL
         MP_OUT = os.path.join(BASE_OUT, "mp", "images")
         CF_PROC_OUT = os.path.join(BASE_OUT, "cf_proc", "images")   # <--- Separate
         CF_THREAD_OUT = os.path.join(BASE_OUT, "cf_thread", "images")
+        DIST_OUT = os.path.join(BASE_OUT, "dist", "images")
+        HYBRID_OUT = os.path.join(BASE_OUT, "hybrid", "images")
+        ASYNC_OUT = os.path.join(BASE_OUT, "async", "images")
         BENCH_OUT = os.path.join(BASE_OUT, "benchmark")
         
         # Create directories
-        for folder in [MP_OUT, CF_PROC_OUT, CF_THREAD_OUT, BENCH_OUT]:
+        for folder in [MP_OUT, CF_PROC_OUT, CF_THREAD_OUT, DIST_OUT, HYBRID_OUT, ASYNC_OUT, BENCH_OUT]:
             os.makedirs(folder, exist_ok=True)
             
         print(f"Saving Enabled: Outputting to '{BASE_OUT}/'")
@@ -34,13 +60,25 @@ def run_benchmark_suite(IMAGE_COUNT, WORKER_COUNTS, RUNS_PER_CONFIG, GENERATE_PL
         MP_OUT = "outputs" 
         CF_PROC_OUT = "outputs"   # <--- Dummy path
         CF_THREAD_OUT = "outputs"
+        DIST_OUT = "outputs"
+        HYBRID_OUT = "outputs"
+        ASYNC_OUT = "outputs"
         plot_output_dir = "plots" # Default plot folder
         if GENERATE_PLOTS:
             os.makedirs(plot_output_dir, exist_ok=True)
 
     # 2. LOAD IMAGES
     print(f"Loading {IMAGE_COUNT} images from {INPUT_DIR}...")
-    all_image_paths = utils.get_image_paths(INPUT_DIR, limit=IMAGE_COUNT)
+    if MANIFEST:
+        import manifest
+        dataset = manifest.open_manifest(INPUT_DIR, MANIFEST)
+        scheduler.register_dimensions(dataset.dimensions())
+        if SAMPLE_SEED is not None:
+            all_image_paths = dataset.sample(IMAGE_COUNT, seed=SAMPLE_SEED)
+        else:
+            all_image_paths = dataset.paths(limit=IMAGE_COUNT)
+    else:
+        all_image_paths = utils.get_image_paths(INPUT_DIR, limit=IMAGE_COUNT)
     
     if len(all_image_paths) < IMAGE_COUNT:
         print(f"Warning: Only found {len(all_image_paths)} images. Adjusting limit.")
@@ -49,23 +87,119 @@ def run_benchmark_suite(IMAGE_COUNT, WORKER_COUNTS, RUNS_PER_CONFIG, GENERATE_PL
     # Slice paths
     current_paths = all_image_paths[:IMAGE_COUNT]
 
+    # --- DECODED FRAME CACHE (decode once, map in every run) ---
+    if FRAME_CACHE:
+        import frame_cache
+        start = time.time()
+        cache = frame_cache.FrameCache(FRAME_CACHE, max_bytes=CACHE_MB * 1024 ** 2)
+        hits, misses = cache.populate(current_paths)
+        print(f"Frame cache '{FRAME_CACHE}': {hits} hits, {misses} decoded "
+              f"({cache.size_bytes() / 1024 ** 2:.1f} MB, {time.time() - start:.2f}s)")
+
     # --- CREATE SEPARATE TASK LISTS ---
-    mp_tasks = [(p, MP_OUT, SAVE_IMAGES) for p in current_paths]
-    cf_proc_tasks = [(p, CF_PROC_OUT, SAVE_IMAGES) for p in current_paths]     # <--- New List
-    cf_thread_tasks = [(p, CF_THREAD_OUT, SAVE_IMAGES) for p in current_paths] # <--- New List
+    mp_tasks = [(p, MP_OUT, SAVE_IMAGES, ENGINE, FRAME_CACHE) for p in current_paths]
+    cf_proc_tasks = [(p, CF_PROC_OUT, SAVE_IMAGES, ENGINE, FRAME_CACHE) for p in current_paths]     # <--- New List
+    cf_thread_tasks = [(p, CF_THREAD_OUT, SAVE_IMAGES, ENGINE, FRAME_CACHE) for p in current_paths] # <--- New List
+    dist_tasks = [(p, DIST_OUT, SAVE_IMAGES, ENGINE, FRAME_CACHE) for p in current_paths]
+    hybrid_tasks = [(p, HYBRID_OUT, SAVE_IMAGES, ENGINE, FRAME_CACHE) for p in current_paths]
+    async_tasks = [(p, ASYNC_OUT, SAVE_IMAGES, ENGINE, FRAME_CACHE) for p in current_paths]
+    task_lists = {'MP': mp_tasks, 'CF_Proc': cf_proc_tasks, 'CF_Thread': cf_thread_tasks, 'Dist': dist_tasks,
+                  'Hybrid': hybrid_tasks, 'Async': async_tasks}
+    methods = METHODS or DEFAULT_METHODS
+    sobel = utils.engine_sobel_precision(ENGINE)
 
     print(f"Configuration:")
     print(f"  Images:       {IMAGE_COUNT}")
-    print(f"  Worker Counts: {WORKER_COUNTS}")
-    print(f"  Runs/Config:  {RUNS_PER_CONFIG}")
-    print(f"  Save Images:  {'Yes' if SAVE_IMAGES else 'No'}")
+    print(f"  Worker Counts: {', '.join(map(str, WORKER_COUNTS))}")
+    print(f"  Methods:      {', '.join(methods)}")
+    print(f"  Runs/Config:  {RUNS_PER_CONFIG} (+{WARMUP} warm-up)")
+    print(f"  Save Images:  {'Yes' if SAVE_IMAGES else 'No'}" + (" (async writer)" if SAVE_IMAGES and WRITER_OPTIONS else ""))
+    print(f"  Engine:       {ENGINE}" + (f" (batches of {BATCH_SIZE})" if BATCH_SIZE else "")
+          + (f" (Sobel {sobel})" if sobel != 'float64' else ""))
+    print(f"  Transport:    {TRANSPORT}")
+    print(f"  Schedule:     {SCHEDULE}" + (f" ({COST_MODEL})" if SCHEDULE == 'lpt' else ""))
+    print(f"  Warm Pools:   {'Yes' if WARM_POOLS else 'No'}")
+    print(f"  Frame Cache:  {FRAME_CACHE or 'No'}")
+    if POLICY:
+        print(f"  Stragglers:   timeout={POLICY.task_timeout}s speculate={POLICY.speculate}x "
+              f"attempts={POLICY.max_attempts} (MP, CF_Proc)")
+    print(f"  Telemetry:    {f'every {TELEMETRY}s' if TELEMETRY else 'No'}")
+    print(f"  Start Method: {multiprocessing.get_start_method()} (main.py imports {IMPORT_SECONDS * 1000:.0f} ms)")
     print(f"  Plots:        {'Yes' if GENERATE_PLOTS else 'No'}")
     print("-" * 60)
 
     # 3. EXECUTION LOOP
     raw_results = defaultdict(lambda: defaultdict(list))
+    cpu_results = defaultdict(lambda: defaultdict(list))
+    tele_results = defaultdict(lambda: defaultdict(list))
     avg_data = defaultdict(dict)
-    methods = ['MP', 'CF_Proc', 'CF_Thread']
+    rng = bench_stats.new_rng(SHUFFLE_SEED)
+
+    # Warm pools are created (and their startup timed) outside the measured region
+    pools = pool_manager.PoolManager() if WARM_POOLS else None
+    def get_pool(backend, shape):
+        if not pools or backend not in pool_manager.BACKENDS:
+            return None
+        if backend == 'Hybrid':
+            return pools.get(backend, shape, shape.cv2_threads)
+        return pools.get(backend, shape.workers, shape.cv2_threads)
+
+    def run_dist(tasks, s, report):
+        import method_dist
+        return method_dist.run(tasks, s.workers, report=report, **(DIST_OPTIONS or {}))
+
+    def run_async(tasks, s, pool):
+        import method_async  # asyncio is only imported when the Async backend runs
+        return method_async.run(tasks, s.workers, max_io=ASYNC_IO, executor=pool)
+
+    # --- METHOD REGISTRY: name -> runner(tasks, shape, pool, writer, report) ---
+    # Single-level backends run shape.workers (P x T) workers
+    sched = dict(schedule=SCHEDULE, cost_model=COST_MODEL)
+    runners = {
+        'MP': lambda tasks, s, pool, writer, report: method_mp.run_multiprocessing(
+            tasks, s.workers, transport=TRANSPORT, report=report, pool=pool, writer=writer,
+            chunksize=CHUNKSIZE, batch_size=BATCH_SIZE, policy=POLICY, **sched),
+        'CF_Proc': lambda tasks, s, pool, writer, report: method_cf.run(
+            tasks, s.workers, mode='process', transport=TRANSPORT, report=report, executor=pool, writer=writer,
+            chunksize=CHUNKSIZE, batch_size=BATCH_SIZE, policy=POLICY, **sched),
+        'CF_Thread': lambda tasks, s, pool, writer, report: method_cf.run(
+            tasks, s.workers, mode='thread', report=report, executor=pool, writer=writer,
+            batch_size=BATCH_SIZE, **sched),
+        # Workers save on their own node, so the async writer does not apply
+        'Dist': lambda tasks, s, pool, writer, report: run_dist(tasks, s, report),
+        # Workers save themselves as well (P x T x C set in every process)
+        'Hybrid': lambda tasks, s, pool, writer, report: method_hybrid.run(
+            tasks, s, report=report, executor=pool, **sched),
+        # Reads and writes overlap on the event loop's own I/O threads
+        'Async': lambda tasks, s, pool, writer, report: run_async(tasks, s, pool),
+    }
+
+    use_writer = SAVE_IMAGES and WRITER_OPTIONS
+
+    def run_once(method, workers, report):
+        """One timed run. A background writer is closed (all files written) inside the timing."""
+        writer = output_writer.AsyncWriter(**WRITER_OPTIONS) if use_writer and method not in ('Dist', 'Hybrid', 'Async') else None
+        # cv2 threads for this process (CF_Thread) and for workers started from here on
+        utils.set_cv2_threads(workers.cv2_threads)
+        pool = get_pool(method, workers)
+
+        def execute():
+            with tracing.span(method, 'run', {'workers': str(workers)}):
+                runners[method](task_lists[method], workers, pool, writer, report)
+                if writer: writer.close()
+
+        # /proc sampler thread around the timed region (see telemetry.py)
+        with telemetry.Sampler(TELEMETRY or telemetry.DEFAULT_INTERVAL) if TELEMETRY else contextlib.nullcontext() as sampler:
+            wall, cpu = bench_stats.timed(execute)
+        return wall, cpu, writer, sampler.summary() if sampler else {}
+
+    # --- Warm-up (untimed): page cache, imports, pool and allocator state ---
+    if WARMUP:
+        print(f"\n>>> Warm-up ({WARMUP} per configuration, not recorded)")
+        for _ in range(WARMUP):
+            for workers in WORKER_COUNTS:
+                for method in bench_stats.shuffled(methods, rng):
+                    run_once(method, workers, None)
 
     # --- Iterate over runs ---
     for run_idx in range(1, RUNS_PER_CONFIG + 1):
@@ -75,128 +209,353 @@ def run_benchmark_suite(IMAGE_COUNT, WORKER_COUNTS, RUNS_PER_CONFIG, GENERATE_PL
         print("-" * 40)
 
         for workers in WORKER_COUNTS:
-            worker_label = "Serial" if workers == 1 else str(workers)
+            worker_label = "Serial" if str(workers) == "1" else str(workers)
             
-            # --- EXECUTE ALL 3 METHODS ---
-            
-            # 1. Multiprocessing
-            start = time.time()
-            method_mp.run_multiprocessing(mp_tasks, workers)  # Correct
-            dur_mp = time.time() - start
-            raw_results[workers]["MP"].append(dur_mp)
-            
-            # 2. CF Process
-            start = time.time()
-            # CHANGE: Use 'cf_proc_tasks'
-            method_cf.run(cf_proc_tasks, workers, mode='process') 
-            dur_proc = time.time() - start
-            raw_results[workers]["CF_Proc"].append(dur_proc)
-            
-            # 3. CF Thread
-            start = time.time()
-            # CHANGE: Use 'cf_thread_tasks'
-            method_cf.run(cf_thread_tasks, workers, mode='thread')
-            dur_thread = time.time() - start
-            raw_results[workers]["CF_Thread"].append(dur_thread)
+            # --- EXECUTE ALL METHODS ---
+            reports = {m: ({} if WORKER_REPORT else None) for m in methods}
+            writers = {}
+            durations = {}
+
+            # Randomized order, so drift (thermal, page cache, noisy neighbours) is not charged to one method
+            for method in bench_stats.shuffled(methods, rng):
+                durations[method], cpu, writers[method], tele = run_once(method, workers, reports[method])
+                raw_results[workers][method].append(durations[method])
+                cpu_results[workers][method].append(cpu)
+                tele_results[workers][method].append(tele)
             
             # --- PRINT VISUAL BLOCK ---
-            print(f"{'':<10} | {'MP':<12} | {dur_mp:<10.4f}")
-            print(f"{worker_label:<10} | {'CF_Proc':<12} | {dur_proc:<10.4f}")
-            print(f"{'':<10} | {'CF_Thread':<12} | {dur_thread:<10.4f}")
+            for row, method in enumerate(methods):
+                label = worker_label if row == len(methods) // 2 else ''
+                print(f"{label:<10} | {method:<12} | {durations[method]:<10.4f}")
             print("-" * 40)
 
-    # 4. CALCULATE AVERAGES
+            if use_writer:
+                for method in methods:
+                    if writers[method]:
+                        output_writer.print_stats(method, writers[method].stats)
+                print("-" * 40)
+
+            # --- PER-WORKER LOAD BALANCE ---
+            if WORKER_REPORT:
+                for method in methods:
+                    if method == 'Dist' and reports[method]:
+                        stats = ", ".join(f"{k}={v}" for k, v in reports[method].items())
+                        print(f"[Dist, {worker_label} workers] coordinator: {stats}")
+                        print("-" * 40)
+                    elif POLICY and method in ('MP', 'CF_Proc') and reports[method]:
+                        import straggler
+                        print(f"[{method}, {worker_label} workers]")
+                        straggler.print_report(reports[method])
+                        print("-" * 40)
+                    elif reports[method]:
+                        print(f"[{method}, {worker_label} workers]")
+                        scheduler.print_report(reports[method])
+                        print("-" * 40)
+
+    if pools:
+        print("\nPool Startup Cost (excluded from the timings above)")
+        pools.print_startup_costs()
+        pools.close()
+    utils.set_cv2_threads(None)
+
+    # 4. CALCULATE STATISTICS (median is the central estimate)
+    stats = defaultdict(dict)
     for workers, worker_methods in raw_results.items():
         for method, times in worker_methods.items():
-            avg = sum(times) / len(times)
-            avg_data[method][workers] = avg
+            stats[method][workers] = bench_stats.summarize(times)
+            avg_data[method][workers] = stats[method][workers]['median']
 
     # 5. PRINT SUMMARY & SAVE PLOTS
-    save_and_print_results(WORKER_COUNTS, RUNS_PER_CONFIG, raw_results, avg_data, methods)
-    
+    baseline = serial_baseline(raw_results)
+    tele = tele_results if TELEMETRY else None
+    save_and_print_results(WORKER_COUNTS, RUNS_PER_CONFIG, raw_results, avg_data, methods, stats, tele)
+
+    json_path = RESULTS_JSON or os.path.join(plot_output_dir, "results.json")
+    bench_stats.write_json(json_path, {
+        'config': {'images': IMAGE_COUNT, 'workers': [str(w) for w in WORKER_COUNTS], 'methods': methods,
+                   'runs': RUNS_PER_CONFIG, 'warmup': WARMUP, 'shuffle_seed': SHUFFLE_SEED,
+                   'save': SAVE_IMAGES, 'engine': ENGINE, 'sobel_precision': sobel, 'transport': TRANSPORT,
+                   'schedule': SCHEDULE, 'cost_model': COST_MODEL, 'warm_pools': WARM_POOLS,
+                   'frame_cache': FRAME_CACHE, 'batch_size': BATCH_SIZE, 'telemetry': TELEMETRY,
+                   'straggler_policy': POLICY._asdict() if POLICY else None,
+                   'start_method': multiprocessing.get_start_method()},
+        'startup': {'main_import': IMPORT_SECONDS, **(STARTUP or {})},
+        'results': {method: {str(w): {'wall': raw_results[w][method], 'cpu': cpu_results[w][method],
+                                      **({'telemetry': tele_results[w][method]} if TELEMETRY else {}),
+                                      **stats[method][w],
+                                      **(bench_stats.speedup(raw_results[baseline][method], raw_results[w][method], w.workers)
+                                         if baseline else {})}
+                             for w in sorted(raw_results, key=method_hybrid.WorkerShape.sort_key)}
+                    for method in methods},
+    })
+    print(f"[Saved] Results JSON: {json_path}")
+
     if GENERATE_PLOTS:
-        generate_plots(IMAGE_COUNT, WORKER_COUNTS, avg_data, plot_output_dir)
+        generate_plots(IMAGE_COUNT, WORKER_COUNTS, avg_data, plot_output_dir, raw_results, tele)
+
+def run_production(IMAGE_COUNT, SAVE_IMAGES, ENGINE='reference', PROFILE=None, RESULT_CACHE=None,
+                   RESULT_CACHE_MB=1024, RESUME=True, POLICY=None):
+    """
+    Production run: processes the images once with the tuned configuration
+    from this host's profile (see autotune.py), or MP on all CPUs without one.
+    With --save, a journal makes the run resumable and RESULT_CACHE (a
+    directory) reuses results for unchanged inputs (see result_cache.py).
+    POLICY (straggler.Policy) bounds the tail on messy datasets (see straggler.py).
+    """
+    import autotune
+    print("--- Starting Production Run ---")
+    if PROFILE:
+        config = PROFILE['config']
+        print(f"Tuned profile: {autotune.describe(config)} "
+              f"({PROFILE['seconds_per_image'] * 1000:.3f} ms/image when tuned)")
+    else:
+        config = {'backend': 'MP', 'workers': os.cpu_count() or 1, 'chunksize': None, 'cv2_threads': None}
+        print(f"No tuned profile for {autotune.host_key()} (run autotune.py). Using {autotune.describe(config)}")
+
+    JOB_DIR = os.path.join("output", "production")
+    OUT_DIR = os.path.join(JOB_DIR, "images") if SAVE_IMAGES else "outputs"
+    paths = utils.get_image_paths(os.path.join("images"), limit=IMAGE_COUNT)
+    tasks = [(p, OUT_DIR, SAVE_IMAGES, ENGINE) for p in paths]
+
+    start = time.perf_counter()
+    journal = cache = None
+    todo = tasks
+    if SAVE_IMAGES:
+        import pipeline_plan
+        import result_cache
+        # Journal before the pool starts so workers inherit it
+        plan_level = os.environ.get(pipeline_plan.PLAN_LEVEL_ENV)
+        params = result_cache.params_key(ENGINE, plan_level, utils.engine_sobel_precision(ENGINE, plan_level))
+        journal = result_cache.Journal(JOB_DIR, params, resume=RESUME)
+        journal.enable()
+        if RESULT_CACHE:
+            cache = result_cache.ResultCache(RESULT_CACHE, max_bytes=RESULT_CACHE_MB * 1024 ** 2)
+            todo, digests = result_cache.plan(tasks, journal, cache, params)
+        else:
+            todo = [t for t in tasks if not journal.is_done(t[0], os.path.join(OUT_DIR, os.path.basename(t[0])))]
+        if len(todo) < len(tasks):
+            print(f"Skipping {len(tasks) - len(todo)} of {len(tasks)} images (done in the journal or cached)")
+
+    report = {}
+    results = autotune.run_config(config, todo, policy=POLICY, report=report) if todo else []
+    duration = time.perf_counter() - start
+    utils.set_cv2_threads(None)
+    if journal:
+        journal.disable()
+    if cache:
+        result_cache.store_results(todo, results, digests, cache)
+        result_cache.print_summary(cache)
+
+    if POLICY and report:
+        import straggler
+        straggler.print_report(report)
+
+    failed = sum(1 for ok, _ in results if not ok)
+    print(f"Images: {len(tasks)} ({len(todo)} processed) | Time: {duration:.4f}s | "
+          f"{len(tasks) / duration if duration > 0 else 0:.1f} img/s" + (f" | {failed} failed" if failed else ""))
+
+def serial_baseline(shapes):
+    """The 1-worker configuration speedups are measured against (None when it was not run)."""
+    ones = [s for s in shapes if s.workers == 1]
+    return min(ones, key=method_hybrid.WorkerShape.sort_key) if ones else None
 
-def save_and_print_results(WORKER_COUNTS, RUNS_PER_CONFIG, raw_results, avg_data, methods):
-    COL_WIDTH = 12
+def run_stream_suite(IMAGE_COUNT, WORKER_COUNTS, SAVE_IMAGES, ENGINE='reference', MAX_IN_FLIGHT=None):
+    """
+    Streaming mode: paths are scanned lazily and results are consumed as they
+    finish, with a bounded number of tasks in flight. Reports time-to-first-result
+    and throughput instead of building task/result lists.
+    """
+    import method_cf
+    import method_mp
+    print("--- Starting Streaming Benchmark ---")
+    INPUT_DIR = os.path.join("images")
+    OUT_DIR = os.path.join("output", "stream", "images") if SAVE_IMAGES else "outputs"
+
+    def make_tasks():
+        return ((p, OUT_DIR, SAVE_IMAGES, ENGINE) for p in utils.iter_image_paths(INPUT_DIR, limit=IMAGE_COUNT))
+
+    streams = {
+        'MP': lambda n: method_mp.stream_multiprocessing(make_tasks(), n, MAX_IN_FLIGHT),
+        'CF_Proc': lambda n: method_cf.stream(make_tasks(), n, 'process', MAX_IN_FLIGHT),
+        'CF_Thread': lambda n: method_cf.stream(make_tasks(), n, 'thread', MAX_IN_FLIGHT),
+    }
+
+    print(f"{'Workers':<10} | {'Method':<12} | {'Images':<8} | {'First (s)':<10} | {'Total (s)':<10} | {'img/s':<8}")
+    print("-" * 75)
+    for shape in map(method_hybrid.WorkerShape.parse, WORKER_COUNTS):
+        worker_label = "Serial" if str(shape) == "1" else str(shape)
+        workers = shape.workers
+        utils.set_cv2_threads(shape.cv2_threads)
+        for method, make_stream in streams.items():
+            start = time.time()
+            first = None
+            done = 0
+            for _path, _result in make_stream(workers):
+                if first is None:
+                    first = time.time() - start
+                done += 1
+            total = time.time() - start
+            rate = done / total if total > 0 else 0
+            print(f"{worker_label:<10} | {method:<12} | {done:<8} | {first or 0:<10.4f} | {total:<10.4f} | {rate:<8.1f}")
+        print("-" * 75)
+
+def run_pipeline_suite(IMAGE_COUNT, WORKER_COUNTS, SAVE_IMAGES, ENGINE='reference',
+                       READERS=2, WRITERS=1, QUEUE_SIZE=8):
+    """
+    Staged pipeline mode: WORKER_COUNTS sets the compute processes, decode and
+    save run on their own thread pools. Prints per-stage utilization and queue
+    depth so the bottleneck stage is visible.
+    """
+    import method_pipeline
+    print("--- Starting Pipeline Benchmark ---")
+    OUT_DIR = os.path.join("output", "pipeline", "images") if SAVE_IMAGES else "outputs"
+    paths = utils.get_image_paths(os.path.join("images"), limit=IMAGE_COUNT)
+    tasks = [(p, OUT_DIR, SAVE_IMAGES, ENGINE) for p in paths]
+    print(f"  Images: {len(tasks)} | Readers: {READERS} | Writers: {WRITERS} | Queue: {QUEUE_SIZE}")
+
+    for shape in map(method_hybrid.WorkerShape.parse, WORKER_COUNTS):
+        report = {}
+        utils.set_cv2_threads(shape.cv2_threads)
+        start = time.time()
+        method_pipeline.run(tasks, shape.workers, READERS, WRITERS, QUEUE_SIZE, report=report)
+        duration = time.time() - start
+        print("-" * 40)
+        print(f"Compute workers: {shape} | Time: {duration:.4f}s")
+        method_pipeline.print_report(report)
+
+def save_and_print_results(WORKER_COUNTS, RUNS_PER_CONFIG, raw_results, avg_data, methods, stats=None, telemetry_results=None):
+    COL_WIDTH = 14
+    width = 8 + COL_WIDTH * len(methods)
+    import bench_stats
+    stats = stats or {m: {w: bench_stats.summarize(raw_results[w][m]) for w in raw_results} for m in methods}
     print("\n" + "=" * 65)
     print("DETAILED PERFORMANCE ANALYSIS (Per Worker, Per Paradigm)")
+    print(f"Median of {RUNS_PER_CONFIG} runs; [..] = {bench_stats.CONFIDENCE:.0%} bootstrap CI")
     print("=" * 65)
 
-    for workers in sorted(WORKER_COUNTS):
-        worker_label = "Serial" if workers == 1 else str(workers)
+    baseline = serial_baseline(raw_results)
+    for workers in sorted(WORKER_COUNTS, key=method_hybrid.WorkerShape.sort_key):
+        worker_label = "Serial" if str(workers) == "1" else str(workers)
         print(f"\n--- Worker Count: {worker_label} ---")
-        print("-" * 50)
+        print("-" * width)
 
         # Header
         header = f"{'Run':<8}"
         for method in methods:
             header += f"{method:<{COL_WIDTH}}"
         print(header)
-        print("-" * 50)
+        print("-" * width)
 
         # Runs
         for run_idx in range(RUNS_PER_CONFIG):
             row = f"{'Run' + str(run_idx + 1):<8}"
             for method in methods:
                 time_val = raw_results[workers][method][run_idx]
-                row += f"{time_val:<{COL_WIDTH}.4f}"
+                flag = "*" if time_val in stats[method][workers]['outliers'] else ""
+                row += f"{f'{time_val:.4f}{flag}':<{COL_WIDTH}}"
             print(row)
 
-        print("-" * 50)
-        # Average
-        avg_row = f"{'Average':<8}"
+        print("-" * width)
+        # Median, spread and confidence interval
+        rows = {'Median': [], 'IQR': [], 'CI95': []}
         for method in methods:
-            avg_time = avg_data[method][workers]
-            avg_row += f"{avg_time:<{COL_WIDTH}.4f}"
-        print(avg_row)
-        
-        # Speedup
-        speedup_row = f"{'Speedup':<8}"
-        for method in methods:
-            t1 = avg_data[method][1] # Serial
-            tn = avg_data[method][workers] # Parallel
-            speedup = (t1 / tn) if workers != 1 else 1.0
-            speedup_row += f"{speedup:<{COL_WIDTH}.4f}"
-        print(speedup_row)
-
-        # Efficiency
-        eff_row = f"{'Eff(%)':<8}"
+            s = stats[method][workers]
+            rows['Median'].append(f"{s['median']:.4f}")
+            rows['IQR'].append(f"{s['iqr']:.4f}")
+            rows['CI95'].append(f"[{s['ci'][0]:.3f},{s['ci'][1]:.3f}]")
+
+        # Speedup / Efficiency with error bars (bootstrap over both sample sets)
+        rows['Speedup'], rows['Eff(%)'] = [], []
         for method in methods:
-            t1 = avg_data[method][1] # Serial
-            tn = avg_data[method][workers] # Parallel
-            speedup = (t1 / tn) if workers != 1 else 1.0
-            efficiency = (speedup / workers) * 100 if workers != 1 else 100.0
-            eff_row += f"{efficiency:<{COL_WIDTH}.2f}"
-        print(eff_row)
+            if workers == baseline or baseline is None:
+                rows['Speedup'].append("1.00")
+                rows['Eff(%)'].append("100.0")
+                continue
+            sp = bench_stats.speedup(raw_results[baseline][method], raw_results[workers][method], workers.workers)
+            err = (sp['speedup_ci'][1] - sp['speedup_ci'][0]) / 2
+            rows['Speedup'].append(f"{sp['speedup']:.2f}±{err:.2f}")
+            eff_err = (sp['efficiency_ci'][1] - sp['efficiency_ci'][0]) / 2 * 100
+            rows['Eff(%)'].append(f"{sp['efficiency'] * 100:.1f}±{eff_err:.1f}")
+
+        # Resource telemetry, median over runs (see telemetry.py)
+        if telemetry_results:
+            import telemetry
+            runs = {m: telemetry_results[workers][m] for m in methods}
+            def cells(fmt, *keys):
+                values = [[telemetry.median(runs[m], k) for k in keys] for m in methods]
+                return ["-" if None in v else fmt(*v) for v in values]
+            rows['CPU%'] = cells(lambda u, w: f"{u:.0f} (io {w:.0f})", 'cpu_util', 'iowait')
+            rows['RSS(MB)'] = cells(lambda p: f"{p:.0f}", 'rss_peak_mb')
+            rows['CtxSw'] = cells(lambda v, i: f"{v:.0f}/{i:.0f}", 'ctx_voluntary', 'ctx_involuntary')
+            rows['DiskMB'] = cells(lambda r, w: f"{r:.1f}/{w:.1f}", 'read_mb', 'write_mb')
+
+        for name, cells in rows.items():
+            print(f"{name:<8}" + "".join(f"{c:<{COL_WIDTH}}" for c in cells))
+
+        outliers = sum(len(stats[m][workers]['outliers']) for m in methods)
+        if outliers:
+            print(f"{'':<8}* {outliers} outlier run(s) outside {bench_stats.OUTLIER_FENCE} x IQR")
+        if telemetry_results:
+            print(f"{'':<8}CPU% = mean over cores (iowait), CtxSw = voluntary/involuntary, DiskMB = read/write")
         
-        print("-" * 50)
+        print("-" * width)
         
         # --- DETERMINE BEST METHOD ---
-        # Logic: Find the method with the minimum average time for this worker count
+        # Logic: Find the method with the minimum median time for this worker count
         candidates = [(m, avg_data[m][workers]) for m in methods]
         best_method, best_time = min(candidates, key=lambda x: x[1])
         
         print(f"{'Best:':<8}{best_method}")
-        print("-" * 50)
+        print("-" * width)
 
-def generate_plots(IMAGE_COUNT, WORKER_COUNTS, avg_data, output_dir):
-    print(f"\nGenerating 3 Analysis Plots in '{output_dir}/'...")
+def generate_plots(IMAGE_COUNT, WORKER_COUNTS, avg_data, output_dir, raw_results=None, telemetry_results=None):
+    # Imported here: matplotlib is the slowest import of the CLI and pool children never plot
+    import matplotlib.pyplot as plt
+    import bench_stats
+    print(f"\nGenerating {4 if telemetry_results else 3} Analysis Plots in '{output_dir}/'...")
     
-    colors = {'MP': 'blue', 'CF_Proc': 'orange', 'CF_Thread': 'green'}
-    labels = {'MP': 'Multiprocessing', 'CF_Proc': 'CF (Process)', 'CF_Thread': 'CF (Thread)'}
+    colors = {'MP': 'blue', 'CF_Proc': 'orange', 'CF_Thread': 'green', 'Dist': 'red', 'Hybrid': 'purple',
+              'Async': 'brown'}
+    labels = {'MP': 'Multiprocessing', 'CF_Proc': 'CF (Process)', 'CF_Thread': 'CF (Thread)',
+              'Dist': 'Distributed (TCP)', 'Hybrid': 'Hybrid (P x T x C)', 'Async': 'Asyncio (overlapped I/O)'}
+    methods = list(avg_data.keys())
+    shapes = sorted(WORKER_COUNTS, key=method_hybrid.WorkerShape.sort_key)
+    baseline = serial_baseline(shapes)
+
+    # x = worker count; when several shapes share a count (e.g. 8x1 and 4x2), one slot per shape
+    if len({s.workers for s in shapes}) == len(shapes):
+        x_pos = {s: s.workers for s in shapes}
+    else:
+        x_pos = {s: i + 1 for i, s in enumerate(shapes)}
+    ticks = ([x_pos[s] for s in shapes], [str(s) for s in shapes])
+
+    def errors(method, workers_list, kind):
+        """yerr from bootstrap CIs: kind = 'time', 'speedup' or 'efficiency'."""
+        if raw_results is None:
+            return None
+        bars = []
+        for w in workers_list:
+            if kind == 'time':
+                bars.append(bench_stats.error_bar(avg_data[method][w], bench_stats.summarize(raw_results[w][method])['ci']))
+            else:
+                sp = bench_stats.speedup(raw_results[baseline][method], raw_results[w][method], w.workers)
+                scale = 100 if kind == 'efficiency' else 1
+                ci = sp[kind + '_ci']
+                bars.append(bench_stats.error_bar(sp[kind] * scale, (ci[0] * scale, ci[1] * scale)))
+        return np.array(bars).T
 
     # PLOT 1: Execution Time
     plt.figure(figsize=(10, 6))
-    for method in ['MP', 'CF_Proc', 'CF_Thread']:
-        workers_list = sorted(avg_data[method].keys())
+    for method in methods:
+        workers_list = sorted(avg_data[method].keys(), key=method_hybrid.WorkerShape.sort_key)
         times_list = [avg_data[method][w] for w in workers_list]
-        plt.plot(workers_list, times_list, marker='o', label=labels[method], color=colors[method], linewidth=2)
+        plt.errorbar([x_pos[w] for w in workers_list], times_list, yerr=errors(method, workers_list, 'time'), capsize=4,
+                     marker='o', label=labels[method], color=colors[method], linewidth=2)
     
     plt.title(f'Execution Time vs Workers ({IMAGE_COUNT} Images)', fontsize=14, fontweight='bold')
     plt.xlabel('Number of Workers', fontsize=12)
     plt.ylabel('Time (s)', fontsize=12)
-    plt.xticks(WORKER_COUNTS)
+    plt.xticks(*ticks)
     plt.legend()
     plt.grid(alpha=0.3)
     plt.savefig(os.path.join(output_dir, "plot_time_vs_workers.png"), dpi=300)
@@ -204,44 +563,83 @@ def generate_plots(IMAGE_COUNT, WORKER_COUNTS, avg_data, output_dir):
 
     # PLOT 2: Speedup
     plt.figure(figsize=(10, 6))
-    for method in ['MP', 'CF_Proc', 'CF_Thread']:
-        workers_list = sorted(avg_data[method].keys())
-        t_1 = avg_data[method][1]
+    for method in methods:
+        workers_list = sorted(avg_data[method].keys(), key=method_hybrid.WorkerShape.sort_key)
+        t_1 = avg_data[method][baseline]
         speedups = [t_1 / avg_data[method][w] for w in workers_list]
-        plt.plot(workers_list, speedups, marker='o', label=labels[method], color=colors[method], linewidth=2)
+        plt.errorbar([x_pos[w] for w in workers_list], speedups, yerr=errors(method, workers_list, 'speedup'), capsize=4,
+                     marker='o', label=labels[method], color=colors[method], linewidth=2)
     
-    plt.plot([1, max(WORKER_COUNTS)], [1, max(WORKER_COUNTS)], 'k--', label='Ideal Linear', alpha=0.6)
+    plt.plot([x_pos[s] for s in shapes], [s.workers for s in shapes], 'k--', label='Ideal Linear', alpha=0.6)
     plt.title(f'Speedup vs Workers ({IMAGE_COUNT} Images)', fontsize=14, fontweight='bold')
     plt.xlabel('Number of Workers', fontsize=12)
     plt.ylabel('Speedup Factor', fontsize=12)
     plt.legend()
     plt.grid(alpha=0.3)
-    plt.xticks(WORKER_COUNTS)
+    plt.xticks(*ticks)
     plt.savefig(os.path.join(output_dir, "plot_speedup.png"), dpi=300)
     plt.close()
 
     # PLOT 3: Efficiency
     plt.figure(figsize=(10, 6))
-    for method in ['MP', 'CF_Proc', 'CF_Thread']:
-        workers_list = sorted(avg_data[method].keys())
-        t_1 = avg_data[method][1]
+    for method in methods:
+        workers_list = sorted(avg_data[method].keys(), key=method_hybrid.WorkerShape.sort_key)
+        t_1 = avg_data[method][baseline]
         effs = []
         for w in workers_list:
             speedup = t_1 / avg_data[method][w]
-            val = (speedup/w)*100 if w!=1 else 100.0
+            val = (speedup/w.workers)*100 if w != baseline else 100.0
             effs.append(val)
-        plt.plot(workers_list, effs, marker='o', label=labels[method], color=colors[method], linewidth=2)
+        plt.errorbar([x_pos[w] for w in workers_list], effs, yerr=errors(method, workers_list, 'efficiency'), capsize=4,
+                     marker='o', label=labels[method], color=colors[method], linewidth=2)
 
     plt.axhline(y=100, color='k', linestyle='--', label='Ideal', alpha=0.6)
     plt.title(f'Efficiency vs Workers ({IMAGE_COUNT} Images)', fontsize=14, fontweight='bold')
     plt.xlabel('Number of Workers', fontsize=12)
     plt.ylabel('Efficiency (%)', fontsize=12)
-    plt.xticks(WORKER_COUNTS)
+    plt.xticks(*ticks)
     plt.legend()
     plt.grid(alpha=0.3)
     plt.ylim(0, 120)
     plt.savefig(os.path.join(output_dir, "plot_efficiency.png"), dpi=300)
     plt.close()
+
+    # PLOT 4: Resource Telemetry (medians over runs; CPU bars span the least and most busy core)
+    if telemetry_results:
+        import telemetry
+        panels = [('CPU utilization (%)', 'cpu_util'), ('Peak RSS, all processes (MB)', 'rss_peak_mb'),
+                  ('Context switches (vol + invol)', 'ctx'), ('Disk read + write (MB)', 'disk')]
+        fig, axes = plt.subplots(2, 2, figsize=(14, 9))
+        for ax, (title, key) in zip(axes.flat, panels):
+            for method in methods:
+                workers_list = sorted(avg_data[method].keys(), key=method_hybrid.WorkerShape.sort_key)
+                runs = [[t for t in telemetry_results[w][method] if t] for w in workers_list]
+                if not all(runs):
+                    continue
+                if key == 'ctx':
+                    values = [float(np.median([t['ctx_voluntary'] + t['ctx_involuntary'] for t in r])) for r in runs]
+                elif key == 'disk':
+                    values = [float(np.median([t['read_mb'] + t['write_mb'] for t in r])) for r in runs]
+                else:
+                    values = [telemetry.median(r, key) for r in runs]
+                yerr = None
+                if key == 'cpu_util':
+                    low = [float(np.median([min(t['per_core']) for t in r])) for r in runs]
+                    high = [float(np.median([max(t['per_core']) for t in r])) for r in runs]
+                    yerr = np.array([[max(v - l, 0) for v, l in zip(values, low)],
+                                     [max(h - v, 0) for v, h in zip(values, high)]])
+                ax.errorbar([x_pos[w] for w in workers_list], values, yerr=yerr, capsize=4,
+                            marker='o', label=labels[method], color=colors[method], linewidth=2)
+            ax.set_title(title, fontsize=12, fontweight='bold')
+            ax.set_xlabel('Number of Workers')
+            ax.set_xticks(*ticks)
+            ax.grid(alpha=0.3)
+        axes.flat[0].set_ylim(0, 105)
+        axes.flat[0].legend()
+        fig.suptitle(f'Resource Telemetry vs Workers ({IMAGE_COUNT} Images)', fontsize=14, fontweight='bold')
+        fig.tight_layout()
+        fig.savefig(os.path.join(output_dir, "plot_telemetry.png"), dpi=300)
+        plt.close(fig)
     
     print("Plots saved successfully.")
 
@@ -253,30 +651,200 @@ def parse_arguments():
     1. Parameterization: Allows customization of image count, worker counts, and run iterations.
     2. Feature Toggles: Handles flags for saving output images and generating visual reports.
     """
+    import method_dist
+    import output_writer
+    import pipeline_plan
+    import scheduler
     parser = argparse.ArgumentParser(description='Parallel Image Processing Benchmark')
     
     parser.add_argument('--count', type=int, default=50, help='Number of images')
-    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts')
+    parser.add_argument('--methods', nargs='+', choices=ALL_METHODS, default=DEFAULT_METHODS, help='Backends to benchmark')
+    parser.add_argument('--workers', type=method_hybrid.WorkerShape.parse, nargs='+',
+                        default=[method_hybrid.WorkerShape.parse(n) for n in (1, 2, 4, 8)],
+                        help='Worker counts, or P x T x C shapes such as 4x2x1 (processes x threads x cv2 threads)')
+    parser.add_argument('--chunksize', type=int, default=None, help='MP/CF_Proc tasks per dispatch (default: backend default)')
+    parser.add_argument('--batch', type=int, default=None, help='MP/CF batch mode: same-sized images per worker call, processed as one stacked array')
+    parser.add_argument('--production', action='store_true', help='Process the images once with the tuned host profile (see autotune.py)')
+    parser.add_argument('--result-cache', default=None, help='Production --save: content-addressed result cache directory')
+    parser.add_argument('--result-cache-mb', type=int, default=1024, help='Result cache size cap in MB (LRU eviction)')
+    parser.add_argument('--no-resume', action='store_true', help='Production --save: ignore the job journal and start over')
+    parser.add_argument('--profile', default=None, help='Tuned profile file (default: output/profiles/<host>.json)')
+    parser.add_argument('--no-profile', action='store_true', help='Ignore the tuned profile')
+    parser.add_argument('--cv2-threads', type=int, default=None, help='cv2.setNumThreads in every worker when a shape gives no C (default: OpenCV default)')
     parser.add_argument('--runs', type=int, default=1, help='Runs per configuration')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed warm-up runs per configuration')
+    parser.add_argument('--shuffle-seed', type=int, default=None, help='Seed for the randomized method order per iteration')
+    parser.add_argument('--telemetry', nargs='?', type=float, const=0.1, default=None, metavar='SECONDS',
+                        help='Sample CPU/RSS/context switches/disk I/O from /proc during every run (interval, default 0.1s)')
+    parser.add_argument('--async-io', type=int, default=None, help='Async backend: reads/writes in flight (default 4 x workers)')
+    parser.add_argument('--task-timeout', type=float, default=None, help='MP/CF_Proc: kill and replace a worker whose task runs longer (seconds)')
+    parser.add_argument('--speculate', type=float, default=None, metavar='FACTOR',
+                        help='MP/CF_Proc: near the end, re-run tasks slower than FACTOR x median on idle workers')
+    parser.add_argument('--max-attempts', type=int, default=2, help='Failed attempts (timeouts/crashes of every copy) before an input is quarantined')
+    parser.add_argument('--quarantine', default=os.path.join("output", "quarantine.jsonl"), help='Quarantine file of poison inputs')
+    parser.add_argument('--start-method', choices=startup.START_METHODS, default=None,
+                        help="Worker start method; 'forkserver' preloads utils/cv2 once (default: platform default)")
+    parser.add_argument('--startup-report', action='store_true', help='Measure import and worker startup times first (see startup.py)')
+    parser.add_argument('--results-json', default=None, help='Machine-readable results file (default <plot dir>/results.json)')
     parser.add_argument('--multi-run', action='store_true', help='Deprecated: Multirun is now automatic if runs > 1')
     parser.add_argument('--plots', action='store_true', default=True, help='Generate plots')
     parser.add_argument('--no-plots', action='store_true', help='Disable plots')
     
     # NEW ARGUMENT
     parser.add_argument('--save', action='store_true', default=False, help='Save processed images to /output folder')
+    parser.add_argument('--engine', choices=utils.ENGINES, default='reference', help='Filter pipeline implementation')
+    parser.add_argument('--plan-level', choices=pipeline_plan.LEVELS, default=None, help="Planned engine: 'exact' (default), 'reorder' or 'fuse' (see pipeline_plan.py)")
+    parser.add_argument('--sobel-precision', choices=utils.SOBEL_PRECISIONS, default=None,
+                        help="Sobel arithmetic of the reference engine and exact/reorder plans (default float64; see compare_engines.py --sobel)")
+    parser.add_argument('--tile-threads', type=int, default=None, help='Tiled engine: threads per worker (default: CPU count)')
+    parser.add_argument('--transport', choices=['pickle', 'shm'], default='pickle', help='Frame hand-off for process backends')
+    parser.add_argument('--schedule', choices=scheduler.SCHEDULES, default='default', help='Task dispatch: default chunking or cost-aware LPT')
+    parser.add_argument('--cost-model', choices=scheduler.COST_MODELS, default='size', help='Task cost estimate used by --schedule lpt')
+    parser.add_argument('--worker-report', action='store_true', help='Print per-worker busy/idle time')
+    parser.add_argument('--warm-pools', action='store_true', help='Reuse pre-warmed worker pools across runs')
+    parser.add_argument('--async-save', action='store_true', help='With --save: encode/write on background writer threads')
+    parser.add_argument('--save-format', choices=output_writer.FORMATS, default='same', help='Output encoder (raw = uncompressed .npy)')
+    parser.add_argument('--jpeg-quality', type=int, default=95, help='JPEG quality (0-100)')
+    parser.add_argument('--png-compression', type=int, default=3, help='PNG compression level (0-9)')
+    parser.add_argument('--webp-quality', type=int, default=90, help='WebP quality (1-100)')
+    parser.add_argument('--writer-threads', type=int, default=2, help='Background writer threads')
+    parser.add_argument('--dist-bind', default='127.0.0.1:0', help='Dist: coordinator bind address host:port')
+    parser.add_argument('--dist-batch', type=int, default=method_dist.DEFAULT_BATCH, help='Dist: tasks per batch')
+    parser.add_argument('--dist-remote', action='store_true', help='Dist: wait for remote workers instead of launching local ones')
+    parser.add_argument('--manifest', default=None, help='Dataset manifest file (created/refreshed instead of rescanning images/)')
+    parser.add_argument('--sample-seed', type=int, default=None, help='With --manifest: deterministic random sample instead of the first N images')
+    parser.add_argument('--frame-cache', default=None, help='Directory of the decoded frame cache (skips JPEG decode on reruns)')
+    parser.add_argument('--cache-mb', type=int, default=2048, help='Frame cache size cap in MB (frames unused by recent runs are evicted first)')
+    parser.add_argument('--pipeline', action='store_true', help='Staged reader/compute/writer pipeline mode')
+    parser.add_argument('--readers', type=int, default=2, help='Pipeline mode: decode threads')
+    parser.add_argument('--writers', type=int, default=1, help='Pipeline mode: save threads')
+    parser.add_argument('--queue-size', type=int, default=8, help='Pipeline mode: capacity of each stage queue')
+    parser.add_argument('--stream', action='store_true', help='Streaming mode: lazy paths, bounded in-flight tasks, unordered results')
+    parser.add_argument('--max-in-flight', type=int, default=None, help='Streaming mode: tasks in flight (default 2 x workers)')
+    parser.add_argument('--trace', default=None, metavar='DIR', help='Record per-stage spans and write DIR/trace.json + trace.csv')
     
     args = parser.parse_args()
     if args.no_plots: args.plots = False
+    if 'Dist' in args.methods:
+        try:
+            method_dist.check_bind((args.dist_bind.rsplit(':', 1)[0], 0))
+        except ValueError as e:
+            parser.error(f"--dist-bind: {e}")
+    args.workers = [s if s.cv2_threads is not None else s._replace(cv2_threads=args.cv2_threads) for s in args.workers]
     return args
 
+def writer_options(args):
+    """AsyncWriter settings from the CLI, or None when --async-save is off."""
+    if not args.async_save:
+        return None
+    return dict(num_threads=args.writer_threads, fmt=args.save_format, jpeg_quality=args.jpeg_quality,
+                png_compression=args.png_compression, webp_quality=args.webp_quality)
+
+def dist_options(args):
+    """method_dist.run settings from the CLI."""
+    host, port = args.dist_bind.rsplit(':', 1)
+    return dict(address=(host, int(port)), batch_size=args.dist_batch, local_workers=not args.dist_remote)
+
+def straggler_policy(args):
+    """straggler.Policy from the CLI, or None when neither deadlines nor speculation are asked for."""
+    if args.task_timeout is None and args.speculate is None:
+        return None
+    import straggler
+    return straggler.Policy(args.task_timeout, args.speculate, args.max_attempts, args.quarantine)
+
 if __name__ == "__main__":
     multiprocessing.freeze_support()
+    import autotune
+    import pipeline_plan
+    import tracing
     args = parse_arguments()
-    
-    run_benchmark_suite(
-        IMAGE_COUNT=args.count,
-        WORKER_COUNTS=args.workers,
-        RUNS_PER_CONFIG=args.runs,
-        GENERATE_PLOTS=args.plots,
-        SAVE_IMAGES=args.save
-    )
\ No newline at end of file
+
+    # Must happen before any pool starts so workers inherit it
+    startup.configure(args.start_method)
+    if args.trace:
+        tracing.enable(args.trace)
+    if args.tile_threads:
+        os.environ["CST435_TILE_THREADS"] = str(args.tile_threads)
+        utils.TILE_THREADS = args.tile_threads
+    if args.plan_level:
+        os.environ[pipeline_plan.PLAN_LEVEL_ENV] = args.plan_level
+    if args.sobel_precision:
+        utils.SOBEL_PRECISION = args.sobel_precision
+    if args.sobel_precision or utils.SOBEL_PRECISION_ENV in os.environ:
+        # Workers get the checked value, not a mistyped one from the shell
+        os.environ[utils.SOBEL_PRECISION_ENV] = utils.SOBEL_PRECISION
+
+    # Tuned configuration for this host, if autotune.py has been run here
+    profile = None if args.no_profile else autotune.load_profile(args.profile)
+    if profile and not args.production:
+        print(f"Tuned profile found: {autotune.describe(profile['config'])} (used by --production)")
+
+    startup_report = None
+    if args.startup_report:
+        startup_report = startup.measure(max(s.workers for s in args.workers))
+        startup.print_report(startup_report)
+
+    if args.production:
+        run_production(
+            IMAGE_COUNT=args.count,
+            SAVE_IMAGES=args.save,
+            ENGINE=args.engine,
+            PROFILE=profile,
+            RESULT_CACHE=args.result_cache,
+            RESULT_CACHE_MB=args.result_cache_mb,
+            RESUME=not args.no_resume,
+            POLICY=straggler_policy(args)
+        )
+    elif args.pipeline:
+        run_pipeline_suite(
+            IMAGE_COUNT=args.count,
+            WORKER_COUNTS=args.workers,
+            SAVE_IMAGES=args.save,
+            ENGINE=args.engine,
+            READERS=args.readers,
+            WRITERS=args.writers,
+            QUEUE_SIZE=args.queue_size
+        )
+    elif args.stream:
+        run_stream_suite(
+            IMAGE_COUNT=args.count,
+            WORKER_COUNTS=args.workers,
+            SAVE_IMAGES=args.save,
+            ENGINE=args.engine,
+            MAX_IN_FLIGHT=args.max_in_flight
+        )
+    else:
+        run_benchmark_suite(
+            IMAGE_COUNT=args.count,
+            WORKER_COUNTS=args.workers,
+            RUNS_PER_CONFIG=args.runs,
+            GENERATE_PLOTS=args.plots,
+            SAVE_IMAGES=args.save,
+            ENGINE=args.engine,
+            TRANSPORT=args.transport,
+            SCHEDULE=args.schedule,
+            COST_MODEL=args.cost_model,
+            WORKER_REPORT=args.worker_report,
+            WARM_POOLS=args.warm_pools,
+            FRAME_CACHE=args.frame_cache,
+            CACHE_MB=args.cache_mb,
+            WRITER_OPTIONS=writer_options(args),
+            MANIFEST=args.manifest,
+            SAMPLE_SEED=args.sample_seed,
+            METHODS=args.methods,
+            DIST_OPTIONS=dist_options(args),
+            WARMUP=args.warmup,
+            SHUFFLE_SEED=args.shuffle_seed,
+            RESULTS_JSON=args.results_json,
+            CHUNKSIZE=args.chunksize,
+            BATCH_SIZE=args.batch,
+            TELEMETRY=args.telemetry,
+            ASYNC_IO=args.async_io,
+            POLICY=straggler_policy(args),
+            STARTUP=startup_report
+        )
+
+    if args.trace:
+        events, json_path, csv_path = tracing.export(args.trace)
+        tracing.print_summary(events)
+        print(f"Trace written to '{json_path}' and '{csv_path}'")
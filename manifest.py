@@ -0,0 +1,159 @@
+"""
+Dataset Manifest
+Persistent index of the image dataset, so runs do not rescan images/.
+
+The manifest (JSON) records path, size, mtime, width/height and class for
+every image, plus the mtime of every scanned directory. refresh() only
+re-lists directories whose mtime changed (files added, removed or renamed),
+so reopening a large, unchanged dataset costs one stat per class folder.
+Pass full=True to also re-stat every file (catches in-place edits).
+"""
+
+import json
+import os
+import random
+import time
+import utils
+
+VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VERSION = 1
+
+class Manifest:
+    """
+    In-memory view of a manifest file.
+    self.images is a list of dicts in the same order get_image_paths() uses.
+    """
+
+    def __init__(self, source_dir, manifest_path):
+        self.source_dir = source_dir
+        self.manifest_path = manifest_path
+        self.dirs = {}
+        self.entries = {}  # dir -> list of image records
+        self.images = []
+
+    # --- PERSISTENCE ---
+
+    @classmethod
+    def open(cls, source_dir, manifest_path, full=False):
+        """Loads manifest_path (if present) and refreshes it against source_dir."""
+        m = cls(source_dir, manifest_path)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                data = json.load(f)
+            if data.get('version') == VERSION and data.get('root') == os.path.abspath(source_dir):
+                m.dirs = data['dirs']
+                m.entries = data['entries']
+        m.refresh(full=full)
+        return m
+
+    def save(self):
+        folder = os.path.dirname(self.manifest_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': VERSION, 'root': os.path.abspath(self.source_dir),
+                       'dirs': self.dirs, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    # --- SCANNING ---
+
+    def _scan_dirs(self):
+        """Directories get_image_paths() would scan, in its order."""
+        if not os.path.exists(self.source_dir):
+            print(f"Warning: Source directory '{self.source_dir}' does not exist.")
+            return []
+        subdirs = sorted(f.path for f in os.scandir(self.source_dir) if f.is_dir())
+        return subdirs or [self.source_dir]
+
+    def _scan_folder(self, folder, previous):
+        """Lists one folder, reusing records of files whose size/mtime did not change."""
+        known = {rec['path']: rec for rec in previous}
+        label = os.path.basename(folder) if folder != self.source_dir else ""
+        records = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not (entry.is_file() and entry.name.lower().endswith(VALID_EXTENSIONS)):
+                    continue
+                st = entry.stat()
+                rec = known.get(entry.path)
+                if rec is None or rec['size'] != st.st_size or rec['mtime'] != st.st_mtime_ns:
+                    dims = utils.read_image_size(entry.path) or (0, 0)
+                    rec = {'path': entry.path, 'size': st.st_size, 'mtime': st.st_mtime_ns,
+                           'width': dims[0], 'height': dims[1], 'class': label}
+                records.append(rec)
+        return records
+
+    def refresh(self, full=False):
+        """
+        Brings the manifest up to date. Returns the number of rescanned directories.
+        Saves the file when anything changed.
+        """
+        scan_dirs = self._scan_dirs()
+        rescanned = 0
+        for folder in scan_dirs:
+            mtime = os.stat(folder).st_mtime_ns
+            if full or self.dirs.get(folder) != mtime or folder not in self.entries:
+                self.entries[folder] = self._scan_folder(folder, self.entries.get(folder, []))
+                self.dirs[folder] = mtime
+                rescanned += 1
+
+        removed = [d for d in self.dirs if d not in scan_dirs]
+        for folder in removed:
+            del self.dirs[folder]
+            self.entries.pop(folder, None)
+
+        self.images = [rec for folder in scan_dirs for rec in self.entries[folder]]
+        if rescanned or removed:
+            self.save()
+        return rescanned
+
+    # --- QUERIES ---
+
+    def paths(self, limit=None, classes=None):
+        """First `limit` image paths (same selection as get_image_paths), optionally per class."""
+        records = self.images
+        if classes:
+            records = [r for r in records if r['class'] in classes]
+        return [r['path'] for r in (records[:limit] if limit else records)]
+
+    def sample(self, n, seed=0):
+        """Deterministic random sample of n paths (kept in manifest order)."""
+        if n >= len(self.images):
+            return self.paths()
+        picked = sorted(random.Random(seed).sample(range(len(self.images)), n))
+        return [self.images[i]['path'] for i in picked]
+
+    def shard(self, k, index, paths=None, balance='count'):
+        """
+        Partition `index` of `k` over paths (default: all images).
+        balance='count' deals paths round-robin; 'pixels' greedily balances
+        total pixel count across shards (largest images first).
+        """
+        paths = paths if paths is not None else self.paths()
+        if balance != 'pixels':
+            return paths[index::k]
+
+        dims = self.dimensions()
+        shards = [[] for _ in range(k)]
+        loads = [0] * k
+        for p in sorted(paths, key=lambda p: dims.get(p, 0), reverse=True):
+            target = loads.index(min(loads))
+            shards[target].append(p)
+            loads[target] += dims.get(p, 0)
+        return shards[index]
+
+    def dimensions(self):
+        """Maps path -> pixel count."""
+        return {r['path']: r['width'] * r['height'] for r in self.images}
+
+    def classes(self):
+        return sorted({r['class'] for r in self.images})
+
+def open_manifest(source_dir, manifest_path, full=False):
+    """Opens/refreshes a manifest and prints a one-line summary."""
+    start = time.time()
+    m = Manifest.open(source_dir, manifest_path, full=full)
+    print(f"Manifest '{manifest_path}': {len(m.images)} images, "
+          f"{len(m.classes())} classes ({time.time() - start:.3f}s)")
+    return m
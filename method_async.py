@@ -0,0 +1,115 @@
+"""
+Asyncio Backend (Overlapped File I/O)
+Drives the run from an asyncio event loop, for images on slow (e.g.
+network-attached) disks.
+
+Each task is a coroutine with three awaits:
+
+    1. read      file bytes on the I/O thread pool, at most max_io reads
+                 (and writes) in flight (bounded semaphore)
+    2. compute   cv2.imdecode + filter pipeline + cv2.imencode on the
+                 compute executor (cv2 releases the GIL)
+    3. write     encoded bytes back on the I/O thread pool
+
+While one image waits on the disk, others are being decoded and filtered,
+so the blocking cv2.imread of utils.load_image no longer leaves workers
+idle. At most max_io + 2 x num_workers tasks are in flight, so read-ahead
+stays bounded. Results come back in task order, like the other backends.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import cv2
+import numpy as np
+import tracing
+import utils
+
+# --- BLOCKING STEPS (run in executors) ---
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def write_bytes(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def compute(data, task_args):
+    """Decodes, filters and (if saving) encodes one image. Returns encoded bytes or None."""
+    input_path, output_folder, save_flag = task_args[:3]
+    engine = task_args[3] if len(task_args) > 3 else 'reference'
+    cache_dir = task_args[4] if len(task_args) > 4 else None
+    try:
+        with tracing.span('task', 'task', {'path': input_path}):
+            with tracing.span('decode'):
+                if data is None:
+                    image = utils.load_frame(input_path, cache_dir)
+                else:
+                    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError(f"Failed to load {input_path}")
+            processed = utils.process_pipeline(image, engine)
+            if not save_flag:
+                return None
+            with tracing.span('encode'):
+                ok, encoded = cv2.imencode(os.path.splitext(input_path)[1] or '.png', processed)
+            if not ok:
+                raise ValueError(f"Failed to encode {input_path}")
+            return encoded.tobytes()
+    finally:
+        tracing.flush()
+
+# --- EVENT LOOP ---
+
+async def _process(task_args, task_slots, io_slots, io_pool, executor):
+    async with task_slots:
+        return await _process_one(task_args, io_slots, io_pool, executor)
+
+async def _process_one(task_args, io_slots, io_pool, executor):
+    input_path, output_folder, save_flag = task_args[:3]
+    cache_dir = task_args[4] if len(task_args) > 4 else None
+    loop = asyncio.get_running_loop()
+    try:
+        data = None
+        if not cache_dir:
+            async with io_slots:
+                data = await loop.run_in_executor(io_pool, read_bytes, input_path)
+
+        encoded = await loop.run_in_executor(executor, compute, data, task_args)
+
+        if save_flag:
+            async with io_slots:
+                await loop.run_in_executor(io_pool, write_bytes,
+                                           os.path.join(output_folder, os.path.basename(input_path)), encoded)
+        return (True, f"Processed {os.path.basename(input_path)}")
+    except Exception as e:
+        return (False, str(e))
+
+async def _run(task_list, executor, num_workers, max_io):
+    io_slots = asyncio.BoundedSemaphore(max_io)
+    # Whole tasks in flight: enough to keep I/O and compute busy, bounded so
+    # read-ahead bytes do not pile up when compute is the bottleneck
+    task_slots = asyncio.BoundedSemaphore(max_io + 2 * num_workers)
+    for folder in {t[1] for t in task_list if t[2]}:
+        os.makedirs(folder, exist_ok=True)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_io, thread_name_prefix='async-io') as io_pool:
+        return await asyncio.gather(*(_process(t, task_slots, io_slots, io_pool, executor) for t in task_list))
+
+# --- BACKEND ENTRY POINT ---
+
+def run(task_list, num_workers, max_io=None, executor=None):
+    """
+    Executes tasks from an asyncio event loop.
+
+    Args:
+        task_list (list): List of task_args tuples.
+        num_workers (int): Compute threads (decode + filters + encode).
+        max_io (int): Reads/writes in flight (default 4 x num_workers).
+        executor (ThreadPoolExecutor): Optional warm compute executor (see pool_manager.py).
+    """
+    max_io = max_io or 4 * num_workers
+    if executor is not None:
+        return asyncio.run(_run(task_list, executor, num_workers, max_io))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers, initializer=utils.init_cv2_threads) as executor:
+        return asyncio.run(_run(task_list, executor, num_workers, max_io))
@@ -1,7 +1,14 @@
 import concurrent.futures
+import time
 import utils
+import scheduler
+import shm_transport
+import output_writer
+import straggler
 
-def run(task_list, num_cores, mode='thread'):
+def run(task_list, num_cores, mode='thread', transport='pickle', schedule='default',
+        cost_model='size', report=None, executor=None, writer=None, chunksize=None, batch_size=None,
+        policy=None):
     """
     Executes tasks using the concurrent.futures module.
     
@@ -9,16 +16,107 @@ def run(task_list, num_cores, mode='thread'):
         task_list (list): List of task_args tuples.
         num_cores (int): Number of workers.
         mode (str): 'thread' for ThreadPoolExecutor, 'process' for ProcessPoolExecutor.
+        transport (str): 'pickle' or 'shm' (process mode only; threads already share memory).
+        schedule (str): 'default' (executor.map, chunksize=1) or 'lpt' (cost-aware, see scheduler.py).
+        cost_model (str): Cost estimate used by 'lpt': 'size' or 'pixels'.
+        report (dict): Optional; filled with per-worker busy/idle stats.
+        executor (Executor): Optional warm executor matching 'mode' to reuse
+                             (see pool_manager.py); it is left running.
+        writer (AsyncWriter): Optional; saving moves off the workers onto the
+                              writer's background threads (see output_writer.py).
+        chunksize (int): Tasks per dispatch in process mode (default 1; threads ignore it).
+        batch_size (int): Optional; batch mode, up to batch_size same-sized images
+                          per worker call as one stacked array (see scheduler.run_batched).
+        policy (straggler.Policy): Optional, process mode only; deadlines, speculation and
+                                   quarantine on supervised workers (see straggler.py).
+                                   Threads cannot be killed, so thread mode ignores it.
     """
-    results = []
+    if policy is not None and mode == 'process':
+        return straggler.run(task_list, num_cores, policy, report)
+
+    use_shm = transport == 'shm' and mode == 'process'
+
+    if executor is not None:
+        return _run_on_executor(executor, task_list, num_cores, use_shm, schedule, cost_model, report, writer, chunksize, batch_size)
     
     if mode == 'process':
         Executor = concurrent.futures.ProcessPoolExecutor
     else:
         Executor = concurrent.futures.ThreadPoolExecutor
+
+    if use_shm:
+        shm_transport.prepare()
     
     # Run with selected executor
-    with Executor(max_workers=num_cores) as executor:
-        results = list(executor.map(utils.worker_task, task_list))
+    with Executor(max_workers=num_cores, initializer=utils.init_cv2_threads) as executor:
+        results = _run_on_executor(executor, task_list, num_cores, use_shm, schedule, cost_model, report, writer, chunksize, batch_size)
         
-    return results
\ No newline at end of file
+    return results
+
+def _run_on_executor(executor, task_list, num_cores, use_shm, schedule, cost_model, report, writer=None, chunksize=None,
+                     batch_size=None):
+    if use_shm:
+        submit = lambda fn, arg: executor.submit(fn, arg).result
+        return shm_transport.run(task_list, submit, num_slabs=2 * num_cores,
+                                 schedule=schedule, cost_model=cost_model, writer=writer)
+
+    if batch_size:
+        imap_unordered = lambda fn, it: (f.result() for f in concurrent.futures.as_completed(
+            [executor.submit(fn, arg) for arg in it]))
+        return scheduler.run_batched(imap_unordered, task_list, num_cores, batch_size, report)
+
+    if writer is not None:
+        order = scheduler.lpt_order(task_list, cost_model)[0] if schedule == 'lpt' else None
+        imap_unordered = lambda fn, it: (f.result() for f in concurrent.futures.as_completed(
+            [executor.submit(fn, arg) for arg in it]))
+        return output_writer.run_with_writer(imap_unordered, task_list, writer, order)
+
+    if schedule == 'lpt' or report is not None:
+        chunks = scheduler.make_chunks(task_list, num_cores, schedule, cost_model, chunksize or 1)
+        start = time.time()
+        futures = [executor.submit(scheduler.run_chunk, chunk) for chunk in chunks]
+        chunk_results = [f.result() for f in concurrent.futures.as_completed(futures)]
+        results, worker_report = scheduler.collect(chunk_results, len(task_list), num_cores, start)
+        if report is not None:
+            report.update(worker_report)
+        return results
+
+    return list(executor.map(utils.worker_task, task_list, chunksize=chunksize or 1))
+
+def stream(task_iter, num_cores, mode='thread', max_in_flight=None, executor=None):
+    """
+    Streaming variant: consumes a lazy iterator of task_args tuples and yields
+    (input_path, result) as tasks finish (unordered).
+
+    At most max_in_flight futures (default 2 x num_cores) exist at any time;
+    a new task is only pulled from the iterator when one completes.
+    """
+    max_in_flight = max_in_flight or 2 * num_cores
+
+    if executor is None:
+        if mode == 'process':
+            Executor = concurrent.futures.ProcessPoolExecutor
+        else:
+            Executor = concurrent.futures.ThreadPoolExecutor
+        with Executor(max_workers=num_cores, initializer=utils.init_cv2_threads) as executor:
+            yield from stream(task_iter, num_cores, mode, max_in_flight, executor)
+        return
+
+    in_flight = set()
+    task_iter = iter(task_iter)
+    exhausted = False
+
+    while in_flight or not exhausted:
+        # Refill up to the in-flight limit
+        while not exhausted and len(in_flight) < max_in_flight:
+            task = next(task_iter, None)
+            if task is None:
+                exhausted = True
+                break
+            in_flight.add(executor.submit(utils.tagged_worker_task, task))
+
+        if not in_flight:
+            break
+        done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
\ No newline at end of file
@@ -0,0 +1,338 @@
+"""
+Distributed Backend (Coordinator + TCP Workers)
+Scales the benchmark across nodes instead of cores.
+
+A coordinator in the main process owns the task list and serves batches
+to worker processes over TCP (multiprocessing.connection, HMAC-authenticated
+pickle messages). Workers report every task as it finishes and send
+heartbeats from a side thread while they compute.
+
+    * Batching:       a worker asks for work and receives up to batch_size tasks.
+    * Work stealing:  once the queue is empty, an idle worker takes the
+                      unstarted tail half of the largest outstanding batch;
+                      the victim is told to drop those tasks on its next report.
+    * Fault handling: a worker whose connection drops or whose heartbeats stop
+                      has its outstanding tasks re-queued. The first result for
+                      a task wins, duplicates are ignored.
+
+Local mode (default) spawns N worker processes on localhost as stand-ins for
+nodes. On real nodes (input paths must be reachable there, e.g. NFS):
+
+    CST435_DIST_KEY=<secret> python3 method_dist.py --connect <coordinator-host>:<port> --procs 4
+
+Messages are pickles, so anyone holding the key can run code in the
+coordinator. The built-in key is public, so the coordinator only binds
+loopback addresses unless CST435_DIST_KEY is set.
+"""
+
+import argparse
+import collections
+import ipaddress
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+import utils
+
+KEY_ENV = "CST435_DIST_KEY"
+AUTHKEY = os.environ.get(KEY_ENV, "cst435").encode()
+DEFAULT_ADDRESS = ('127.0.0.1', 0)
+DEFAULT_BATCH = 4
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 5.0
+IDLE_WAIT = 0.05
+
+# --- COORDINATOR ---
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def check_bind(address):
+    """Raises ValueError when address is reachable from other hosts but the key is the public default."""
+    if not is_loopback(address[0]) and not os.environ.get(KEY_ENV):
+        raise ValueError(f"refusing to bind {address[0]!r} with the default key; "
+                         f"set {KEY_ENV} to a shared secret for non-loopback addresses")
+
+class Coordinator:
+    """Serves task batches to TCP workers and collects their results."""
+
+    def __init__(self, task_list, address=DEFAULT_ADDRESS, batch_size=DEFAULT_BATCH,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.tasks = task_list
+        self.results = [None] * len(task_list)
+        self.remaining = len(task_list)
+        self.pending = collections.deque(range(len(task_list)))
+        self.assigned = {}   # worker_id -> outstanding task indices, in processing order
+        self.cancel = collections.defaultdict(set)  # worker_id -> indices taken away from it
+        self.last_seen = {}
+        self.dead = set()
+        self.batch_size = batch_size
+        self.heartbeat_timeout = heartbeat_timeout
+        self.stats = {'workers': 0, 'batches': 0, 'stolen': 0, 'requeued': 0, 'dead': 0, 'duplicates': 0}
+        self.cond = threading.Condition()
+        self.stopped = threading.Event()
+        check_bind(address)
+        self.listener = Listener(address, authkey=AUTHKEY)
+        self.address = self.listener.address
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._reaper, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.listener.close()
+
+    def wait(self, timeout=None):
+        """Blocks until every task has a result (or timeout). Returns True when done."""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.remaining == 0, timeout)
+
+    # --- connection handling ---
+
+    def _accept_loop(self):
+        while not self.stopped.is_set():
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if self.stopped.is_set():
+                    return
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        worker_id = None
+        try:
+            kind, worker_id = conn.recv()
+            with self.cond:
+                self.assigned.setdefault(worker_id, [])
+                self.last_seen[worker_id] = time.time()
+                self.stats['workers'] += 1
+            conn.send(('ok',))
+
+            while True:
+                msg = conn.recv()
+                with self.cond:
+                    self.last_seen[worker_id] = time.time()
+                    if msg[0] == 'heartbeat':
+                        reply = ('ok',)
+                    elif msg[0] == 'get':
+                        reply = self._next_batch(worker_id)
+                    elif msg[0] == 'result':
+                        self._record(msg[1], msg[2])
+                        reply = ('ack', self.cancel.pop(worker_id, set()))
+                    else:
+                        reply = ('error', f"unknown message {msg[0]!r}")
+                conn.send(reply)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            if worker_id is not None:
+                with self.cond:
+                    self._requeue(worker_id)
+                    # Gone, not silent: keep the reaper from counting it as dead
+                    self.last_seen.pop(worker_id, None)
+                    self.dead.discard(worker_id)
+
+    # --- scheduling (called with self.cond held) ---
+
+    def _next_batch(self, worker_id):
+        if self.remaining == 0:
+            return ('done',)
+        if worker_id in self.dead:
+            # Came back after being declared dead: treat as a fresh worker
+            self.dead.discard(worker_id)
+            self.assigned[worker_id] = []
+
+        batch = []
+        while self.pending and len(batch) < self.batch_size:
+            i = self.pending.popleft()
+            if self.results[i] is None:
+                batch.append(i)
+
+        if not batch:
+            batch = self._steal(worker_id)
+        if not batch:
+            return ('wait',)
+
+        self.assigned[worker_id].extend(batch)
+        self.stats['batches'] += 1
+        return ('batch', [(i, self.tasks[i]) for i in batch])
+
+    def _steal(self, thief):
+        """Takes the unstarted tail half of the largest outstanding batch."""
+        victims = [(len(v), w) for w, v in self.assigned.items() if w != thief and len(v) > 1]
+        if not victims:
+            return []
+        _, victim = max(victims)
+        outstanding = self.assigned[victim]
+        k = len(outstanding) // 2
+        stolen = outstanding[-k:]
+        del outstanding[-k:]
+        self.cancel[victim].update(stolen)
+        self.stats['stolen'] += k
+        return stolen
+
+    def _record(self, i, status):
+        for outstanding in self.assigned.values():
+            if i in outstanding:
+                outstanding.remove(i)
+        if self.results[i] is not None:
+            self.stats['duplicates'] += 1
+            return
+        self.results[i] = status
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.cond.notify_all()
+
+    def _requeue(self, worker_id):
+        outstanding = self.assigned.get(worker_id, [])
+        lost = [i for i in outstanding if self.results[i] is None]
+        self.pending.extendleft(reversed(lost))
+        self.stats['requeued'] += len(lost)
+        self.assigned[worker_id] = []
+        self.cancel.pop(worker_id, None)
+
+    def _reaper(self):
+        while not self.stopped.wait(self.heartbeat_timeout / 2):
+            now = time.time()
+            with self.cond:
+                for worker_id, seen in list(self.last_seen.items()):
+                    if worker_id not in self.dead and now - seen > self.heartbeat_timeout:
+                        self.dead.add(worker_id)
+                        self.stats['dead'] += 1
+                        self._requeue(worker_id)
+
+# --- WORKER ---
+
+def worker_main(address, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """
+    Worker process: pulls batches from the coordinator until it says 'done'.
+    Returns the number of tasks this worker completed.
+    """
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    conn = Client(tuple(address), authkey=AUTHKEY)
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def call(msg):
+        with lock:
+            conn.send(msg)
+            return conn.recv()
+
+    def heartbeat():
+        while not stop.wait(heartbeat_interval):
+            try:
+                call(('heartbeat',))
+            except (EOFError, OSError):
+                return
+
+    call(('hello', worker_id))
+    threading.Thread(target=heartbeat, daemon=True).start()
+    done = 0
+    try:
+        while True:
+            reply = call(('get',))
+            if reply[0] == 'done':
+                break
+            if reply[0] == 'wait':
+                time.sleep(IDLE_WAIT)
+                continue
+
+            batch = collections.deque(reply[1])
+            while batch:
+                i, task = batch.popleft()
+                status = utils.worker_task(task)
+                done += 1
+                _, cancelled = call(('result', i, status))
+                if cancelled:
+                    batch = collections.deque(item for item in batch if item[0] not in cancelled)
+    except (EOFError, OSError):
+        pass
+    finally:
+        stop.set()
+        conn.close()
+    return done
+
+# --- BACKEND ENTRY POINT ---
+
+def run(task_list, num_workers, address=DEFAULT_ADDRESS, batch_size=DEFAULT_BATCH,
+        local_workers=True, report=None):
+    """
+    Executes tasks on TCP workers through a Coordinator.
+
+    Args:
+        task_list (list): List of task_args tuples.
+        num_workers (int): Local worker processes to launch (the stand-in nodes).
+        address (tuple): (host, port) the coordinator binds; port 0 picks a free port.
+        batch_size (int): Tasks handed out per request.
+        local_workers (bool): False = launch nothing and wait for remote workers.
+        report (dict): Optional; filled with coordinator stats.
+    """
+    coordinator = Coordinator(task_list, address, batch_size)
+    coordinator.start()
+    procs = []
+
+    try:
+        if local_workers:
+            host, port = coordinator.address
+            connect_to = ('127.0.0.1' if host in ('0.0.0.0', '') else host, port)
+            procs = [multiprocessing.Process(target=worker_main, args=(connect_to,), daemon=True)
+                     for _ in range(num_workers)]
+            for p in procs:
+                p.start()
+        else:
+            print(f"Coordinator waiting for remote workers on {coordinator.address[0]}:{coordinator.address[1]}")
+
+        while not coordinator.wait(timeout=0.5):
+            if local_workers and not any(p.is_alive() for p in procs):
+                # Every local node is gone; report what is left as failed
+                with coordinator.cond:
+                    for i, res in enumerate(coordinator.results):
+                        if res is None:
+                            coordinator.results[i] = (False, "No live workers")
+                break
+    finally:
+        for p in procs:
+            p.join(timeout=HEARTBEAT_TIMEOUT)
+            if p.is_alive():
+                p.terminate()
+        coordinator.stop()
+
+    if report is not None:
+        report.update(coordinator.stats)
+    return coordinator.results
+
+def main():
+    """CLI for remote nodes: run worker processes against a coordinator."""
+    parser = argparse.ArgumentParser(description='Distributed backend worker node')
+    parser.add_argument('--connect', required=True, help='Coordinator address host:port')
+    parser.add_argument('--procs', type=int, default=multiprocessing.cpu_count(), help='Worker processes on this node')
+    parser.add_argument('--forever', action='store_true', help='Reconnect for the next run after each run finishes')
+    args = parser.parse_args()
+
+    host, port = args.connect.rsplit(':', 1)
+    address = (host, int(port))
+    while True:
+        try:
+            with multiprocessing.Pool(processes=args.procs) as pool:
+                done = pool.map(worker_main, [address] * args.procs, chunksize=1)
+            print(f"Run finished: {sum(done)} tasks processed on this node.")
+        except (ConnectionRefusedError, OSError):
+            if not args.forever:
+                raise
+        if not args.forever:
+            break
+        time.sleep(1)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
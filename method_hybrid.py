@@ -0,0 +1,110 @@
+"""
+Hybrid Backend (Processes x Threads x OpenCV Threads)
+P worker processes, each running T threads, each OpenCV call using C threads.
+
+cv2 releases the GIL, so threads inside a process overlap well, and OpenCV
+adds its own internal thread pool on top. Left alone, every process starts
+an all-core cv2 pool and the machine is oversubscribed. Here all three
+levels are set explicitly in every worker, so P x T x C can be matched to
+the VM shape (e.g. 4x2x1 on 8 vCPUs).
+
+Shapes are written PxTxC on the --workers CLI; see WorkerShape.
+"""
+
+import collections
+import concurrent.futures
+import os
+import time
+import cv2
+import scheduler
+import utils
+
+# --- WORKER SHAPE ---
+
+class WorkerShape(collections.namedtuple('WorkerShape', 'procs threads cv2_threads')):
+    """
+    P processes x T threads per process x C cv2 threads.
+    cv2_threads=None leaves OpenCV at its default.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text, cv2_threads=None):
+        """Parses 'P', 'PxT' or 'PxTxC' (an int or an existing shape is passed through)."""
+        if isinstance(text, cls):
+            return text
+        parts = [int(p) for p in str(text).lower().split('x')]
+        if not 1 <= len(parts) <= 3 or min(parts[:2]) < 1 or (len(parts) == 3 and parts[2] < 0):
+            raise ValueError(f"invalid worker shape {text!r} (expected P, PxT or PxTxC)")
+        return cls(parts[0], parts[1] if len(parts) > 1 else 1,
+                   parts[2] if len(parts) > 2 else cv2_threads)
+
+    @property
+    def workers(self):
+        """Concurrent tasks (P x T); speedup and efficiency are relative to this."""
+        return self.procs * self.threads
+
+    def sort_key(self):
+        return (self.workers, self.procs, -1 if self.cv2_threads is None else self.cv2_threads)
+
+    def __str__(self):
+        if self.cv2_threads is not None:
+            return f"{self.procs}x{self.threads}x{self.cv2_threads}"
+        if self.threads != 1:
+            return f"{self.procs}x{self.threads}"
+        return str(self.procs)
+
+# --- WORKER SIDE ---
+
+_threads = None
+
+def init_worker(num_threads, cv2_threads):
+    """Process initializer: fixes the cv2 thread count and starts this process's task threads."""
+    global _threads
+    if cv2_threads is not None:
+        cv2.setNumThreads(cv2_threads)
+    _threads = concurrent.futures.ThreadPoolExecutor(max_workers=num_threads)
+
+def run_chunk(chunk):
+    """
+    Process entry point: runs one chunk of (task_index, task_args) on the
+    process's threads. Returns (worker_id, start, end, [(task_index, result)]).
+    """
+    start = time.time()
+    indices = [i for i, _ in chunk]
+    results = list(_threads.map(utils.worker_task, [task for _, task in chunk]))
+    return str(os.getpid()), start, time.time(), list(zip(indices, results))
+
+# --- BACKEND ENTRY POINT ---
+
+def create_executor(shape):
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=shape.procs, initializer=init_worker, initargs=(shape.threads, shape.cv2_threads))
+
+def run(task_list, shape, schedule='default', cost_model='size', report=None, executor=None):
+    """
+    Executes tasks on P processes x T threads x C cv2 threads.
+
+    Args:
+        task_list (list): List of task_args tuples.
+        shape (WorkerShape): Processes, threads per process and cv2 threads.
+        schedule (str): 'default' (fixed chunks) or 'lpt' (cost-aware, see scheduler.py).
+        cost_model (str): Cost estimate used by 'lpt'.
+        report (dict): Optional; filled with per-process busy/idle stats.
+        executor (ProcessPoolExecutor): Optional warm executor made by create_executor(shape).
+    """
+    # Every chunk holds at least T tasks so all threads of a process get work
+    chunksize = max(scheduler.mp_default_chunksize(len(task_list), shape.procs), shape.threads)
+    chunks = scheduler.make_chunks(task_list, shape.procs, schedule, cost_model, chunksize)
+
+    start = time.time()
+    if executor is not None:
+        chunk_results = list(executor.map(run_chunk, chunks))
+    else:
+        with create_executor(shape) as pool:
+            chunk_results = list(pool.map(run_chunk, chunks))
+
+    results, worker_report = scheduler.collect(chunk_results, len(task_list), shape.procs, start)
+    if report is not None:
+        report.update(worker_report)
+    return results
@@ -1,19 +1,118 @@
 import multiprocessing
+import threading
+import time
 import utils
+import scheduler
+import shm_transport
+import output_writer
+import straggler
 
-def run_multiprocessing(task_list, num_cores):
+def run_multiprocessing(task_list, num_cores, transport='pickle', schedule='default',
+                        cost_model='size', report=None, pool=None, writer=None, chunksize=None, batch_size=None,
+                        policy=None):
     """
     Executes tasks using the multiprocessing module (Process Pool).
     
     Args:
         task_list (list): List of task_args tuples.
         num_cores (int): Number of worker processes.
+        transport (str): 'pickle' (workers decode from path) or 'shm'
+                         (frames handed over in shared memory).
+        schedule (str): 'default' (pool.map chunking) or 'lpt' (cost-aware, see scheduler.py).
+        cost_model (str): Cost estimate used by 'lpt': 'size' or 'pixels'.
+        report (dict): Optional; filled with per-worker busy/idle stats.
+        pool (multiprocessing.Pool): Optional warm pool to reuse (see pool_manager.py);
+                                     it is left open.
+        writer (AsyncWriter): Optional; saving moves off the workers onto the
+                              writer's background threads (see output_writer.py).
+        chunksize (int): Tasks per dispatch; None keeps Pool.map's default
+                         (see autotune.py for picking one per host).
+        batch_size (int): Optional; batch mode, up to batch_size same-sized images
+                          are processed per worker call as one stacked array
+                          (see scheduler.run_batched). Workers save themselves,
+                          so writer, schedule and chunksize do not apply.
+        policy (straggler.Policy): Optional; per-task deadlines, speculative re-execution
+                                   and quarantine on supervised worker processes
+                                   (see straggler.py). pool, writer and schedule do not apply.
     """
-    results = []
+    if policy is not None:
+        return straggler.run(task_list, num_cores, policy, report)
+
+    if pool is not None:
+        return _run_on_pool(pool, task_list, num_cores, transport, schedule, cost_model, report, writer, chunksize, batch_size)
+
+    if transport == 'shm':
+        shm_transport.prepare()
     
     # Create a Pool of workers
-    with multiprocessing.Pool(processes=num_cores) as pool:
-        # Map the tasks to the workers
-        results = pool.map(utils.worker_task, task_list)
+    with multiprocessing.Pool(processes=num_cores, initializer=utils.init_cv2_threads) as pool:
+        results = _run_on_pool(pool, task_list, num_cores, transport, schedule, cost_model, report, writer, chunksize, batch_size)
         
-    return results
\ No newline at end of file
+    return results
+
+def _run_on_pool(pool, task_list, num_cores, transport, schedule, cost_model, report, writer=None, chunksize=None,
+                 batch_size=None):
+    if transport == 'shm':
+        submit = lambda fn, arg: pool.apply_async(fn, (arg,)).get
+        return shm_transport.run(task_list, submit, num_slabs=2 * num_cores,
+                                 schedule=schedule, cost_model=cost_model, writer=writer)
+
+    if batch_size:
+        imap_unordered = lambda fn, it: pool.imap_unordered(fn, it)
+        return scheduler.run_batched(imap_unordered, task_list, num_cores, batch_size, report)
+
+    chunksize = chunksize or scheduler.mp_default_chunksize(len(task_list), num_cores)
+
+    if writer is not None:
+        order = scheduler.lpt_order(task_list, cost_model)[0] if schedule == 'lpt' else None
+        imap_unordered = lambda fn, it: pool.imap_unordered(fn, it, chunksize)
+        return output_writer.run_with_writer(imap_unordered, task_list, writer, order)
+
+    if schedule == 'lpt' or report is not None:
+        chunks = scheduler.make_chunks(task_list, num_cores, schedule, cost_model, chunksize)
+        start = time.time()
+        chunk_results = list(pool.imap_unordered(scheduler.run_chunk, chunks))
+        results, worker_report = scheduler.collect(chunk_results, len(task_list), num_cores, start)
+        if report is not None:
+            report.update(worker_report)
+        return results
+
+    # Map the tasks to the workers
+    return pool.map(utils.worker_task, task_list, chunksize)
+
+def stream_multiprocessing(task_iter, num_cores, max_in_flight=None, pool=None):
+    """
+    Streaming variant: consumes a lazy iterator of task_args tuples and yields
+    (input_path, result) as tasks finish (unordered).
+
+    At most max_in_flight tasks (default 2 x num_cores) are pulled from the
+    iterator ahead of the consumer, so memory stays constant however long the
+    iterator is. Pool.imap_unordered would otherwise drain the whole iterator.
+    """
+    max_in_flight = max_in_flight or 2 * num_cores
+    slots = threading.Semaphore(max_in_flight)
+    stopped = threading.Event()
+
+    def throttled():
+        for task in task_iter:
+            slots.acquire()  # Backpressure: wait until a result was consumed
+            if stopped.is_set():
+                return
+            yield task
+
+    def consume(pool):
+        try:
+            for item in pool.imap_unordered(utils.tagged_worker_task, throttled()):
+                slots.release()
+                yield item
+        finally:
+            # Unblock the pool's task feeder if the consumer stops early
+            stopped.set()
+            slots.release()
+
+    if pool is not None:
+        yield from consume(pool)
+        return
+
+    with multiprocessing.Pool(processes=num_cores, initializer=utils.init_cv2_threads) as pool:
+        yield from consume(pool)
\ No newline at end of file
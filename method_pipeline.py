@@ -0,0 +1,172 @@
+import concurrent.futures
+import os
+import queue
+import threading
+import time
+import utils
+
+STOP = None
+SAMPLE_INTERVAL = 0.01  # seconds between queue depth samples
+
+def compute_task(image, engine):
+    """Compute stage (runs in a worker process). Returns (edge_map, seconds)."""
+    start = time.time()
+    result = utils.process_pipeline(image, engine)
+    return result, time.time() - start
+
+def run(task_list, num_computes, num_readers=2, num_writers=1, queue_size=8,
+        report=None, executor=None):
+    """
+    Executes tasks as a staged producer/consumer pipeline:
+        reader threads (decode) -> compute processes (process_pipeline) -> writer threads (save)
+    Stages are connected by bounded queues, so a slow stage applies
+    backpressure instead of letting frames pile up in memory. The compute
+    stage keeps at least 2 futures per worker in flight, whatever queue_size.
+
+    Each decoded frame is pickled into a compute process and its edge map
+    pickled back, i.e. two copies per frame through the executor's pipe
+    (H x W x 3 bytes in, H x W out). On large frames that copy can rival the
+    filters themselves; --transport shm avoids it for the plain backends.
+
+    Args:
+        task_list (list): List of task_args tuples.
+        num_computes (int): Compute worker processes.
+        num_readers (int): Decode threads.
+        num_writers (int): Encode/save threads.
+        queue_size (int): Capacity of each inter-stage queue (compute futures: at least 2 x num_computes).
+        report (dict): Optional; filled with per-stage utilization and queue depth.
+        executor (ProcessPoolExecutor): Optional warm executor for the compute stage.
+    """
+    results = [None] * len(task_list)
+    busy = {'read': 0.0, 'compute': 0.0, 'write': 0.0}
+    busy_lock = threading.Lock()
+
+    decode_q = queue.Queue()
+    compute_q = queue.Queue(maxsize=queue_size)
+    # Submitted compute futures, in order; sized so every compute worker stays fed
+    pending_q = queue.Queue(maxsize=max(queue_size, 2 * num_computes))
+    write_q = queue.Queue(maxsize=queue_size)
+    for item in enumerate(task_list):
+        decode_q.put(item)
+    for _ in range(num_readers):
+        decode_q.put(STOP)
+
+    def add_busy(stage, seconds):
+        with busy_lock:
+            busy[stage] += seconds
+
+    # --- STAGE 1: READERS ---
+    def reader():
+        while True:
+            item = decode_q.get()
+            if item is STOP:
+                compute_q.put(STOP)
+                return
+            i, task = item
+            start = time.time()
+            image = utils.load_frame(task[0], task[4] if len(task) > 4 else None)
+            add_busy('read', time.time() - start)
+            compute_q.put((i, task, image))
+
+    # --- STAGE 2: COMPUTE (dispatch + collect) ---
+    def dispatcher(pool):
+        stops = 0
+        while stops < num_readers:
+            item = compute_q.get()
+            if item is STOP:
+                stops += 1
+                continue
+            i, task, image = item
+            engine = task[3] if len(task) > 3 else 'reference'
+            future = pool.submit(compute_task, image, engine) if image is not None else None
+            pending_q.put((i, task, future))
+        pending_q.put(STOP)
+
+    def collector():
+        while True:
+            item = pending_q.get()
+            if item is STOP:
+                for _ in range(num_writers):
+                    write_q.put(STOP)
+                return
+            i, task, future = item
+            if future is None:
+                write_q.put((i, task, None, f"Failed to load {task[0]}"))
+                continue
+            try:
+                edge_map, seconds = future.result()
+                add_busy('compute', seconds)
+                write_q.put((i, task, edge_map, None))
+            except Exception as e:
+                write_q.put((i, task, None, str(e)))
+
+    # --- STAGE 3: WRITERS ---
+    def writer():
+        while True:
+            item = write_q.get()
+            if item is STOP:
+                return
+            i, task, edge_map, error = item
+            if error is not None:
+                results[i] = (False, error)
+                continue
+            input_path, output_folder, save_flag = task[:3]
+            if save_flag:
+                start = time.time()
+                utils.save_image(edge_map, os.path.join(output_folder, os.path.basename(input_path)))
+                add_busy('write', time.time() - start)
+            results[i] = (True, f"Processed {os.path.basename(input_path)}")
+
+    # --- QUEUE DEPTH SAMPLER ---
+    queues = {'compute_q': compute_q, 'pending_q': pending_q, 'write_q': write_q}
+    depth = {name: [] for name in queues}
+    done = threading.Event()
+
+    def sampler():
+        while not done.wait(SAMPLE_INTERVAL):
+            for name, q in queues.items():
+                depth[name].append(q.qsize())
+
+    def execute(pool):
+        threads = [threading.Thread(target=reader) for _ in range(num_readers)]
+        threads += [threading.Thread(target=dispatcher, args=(pool,)), threading.Thread(target=collector)]
+        threads += [threading.Thread(target=writer) for _ in range(num_writers)]
+        monitor = threading.Thread(target=sampler, daemon=True)
+        monitor.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        monitor.join()
+
+    start = time.time()
+    if executor is not None:
+        execute(executor)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_computes, initializer=utils.init_cv2_threads) as pool:
+            execute(pool)
+    wall = time.time() - start
+
+    if report is not None:
+        workers = {'read': num_readers, 'compute': num_computes, 'write': num_writers}
+        report['wall'] = wall
+        report['utilization'] = {stage: busy[stage] / (wall * workers[stage]) if wall > 0 else 0.0
+                                 for stage in busy}
+        report['queue_depth'] = {name: (sum(s) / len(s) if s else 0.0, max(s, default=0), queues[name].maxsize)
+                                 for name, s in depth.items()}
+
+    return results
+
+def print_report(report):
+    """Prints per-stage utilization and queue depth; the busiest stage is the bottleneck."""
+    print(f"{'Stage':<10} | {'Utilization':<12}")
+    print("-" * 26)
+    for stage, util in report['utilization'].items():
+        print(f"{stage:<10} | {util * 100:<11.1f}%")
+    print(f"{'Queue':<10} | {'Mean':<6} | {'Max':<5} | {'Cap':<5}")
+    print("-" * 34)
+    for name, (mean, peak, cap) in report['queue_depth'].items():
+        print(f"{name:<10} | {mean:<6.2f} | {peak:<5} | {cap:<5}")
+    bottleneck = max(report['utilization'], key=report['utilization'].get)
+    print(f"Bottleneck stage: {bottleneck}")
@@ -0,0 +1,169 @@
+"""
+Asynchronous Output Writer
+Encodes and saves processed images on background threads.
+
+Workers return the edge map instead of saving it; the parent hands it to
+an AsyncWriter whose threads encode (cv2.imencode releases the GIL) and
+write the bytes, so --save no longer blocks compute. Output directories
+are created once, the encoder and its settings are configurable, and
+encode time / write time / bytes written are reported.
+"""
+
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+import tracing
+import utils
+
+FORMATS = ('same', 'jpg', 'png', 'webp', 'raw')
+STOP = None
+
+def encoder_for(output_path, fmt='same', jpeg_quality=95, png_compression=3, webp_quality=90):
+    """
+    Returns (output_path, extension, imencode params) for the selected format.
+    'same' keeps the input extension, 'raw' writes an uncompressed .npy file.
+    """
+    root, ext = os.path.splitext(output_path)
+    if fmt != 'same':
+        ext = '.npy' if fmt == 'raw' else '.' + fmt
+    ext = ext.lower()
+
+    if ext in ('.jpg', '.jpeg'):
+        params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+    elif ext == '.png':
+        params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+    elif ext == '.webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, webp_quality]
+    else:
+        params = []
+    return root + ext, ext, params
+
+class AsyncWriter:
+    """
+    Background encode/write thread pool fed by a bounded queue.
+    submit() only blocks when the queue is full (backpressure).
+    """
+
+    def __init__(self, num_threads=2, fmt='same', jpeg_quality=95, png_compression=3,
+                 webp_quality=90, queue_size=64):
+        self.settings = dict(fmt=fmt, jpeg_quality=jpeg_quality, png_compression=png_compression,
+                             webp_quality=webp_quality)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.created_dirs = set()
+        self.stats = {'files': 0, 'errors': 0, 'bytes': 0, 'encode_time': 0.0, 'write_time': 0.0}
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(num_threads)]
+        for t in self.threads:
+            t.start()
+
+    def submit(self, image, output_path):
+        """Queues an image for saving. The array must not be modified afterwards."""
+        self.queue.put((image, output_path))
+
+    def _ensure_dir(self, folder):
+        if folder and folder not in self.created_dirs:
+            os.makedirs(folder, exist_ok=True)
+            with self.lock:
+                self.created_dirs.add(folder)
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is STOP:
+                return
+            image, output_path = item
+            try:
+                path, ext, params = encoder_for(output_path, **self.settings)
+                self._ensure_dir(os.path.dirname(path))
+
+                start = time.time()
+                if ext == '.npy':
+                    data = None
+                else:
+                    ok, data = cv2.imencode(ext, image, params)
+                    if not ok:
+                        raise ValueError(f"encode failed for {path}")
+                encoded = time.time()
+
+                if data is None:
+                    np.save(path, image)
+                    nbytes = os.path.getsize(path)
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(data.tobytes())
+                    nbytes = data.nbytes
+                written = time.time()
+
+                with self.lock:
+                    self.stats['files'] += 1
+                    self.stats['bytes'] += nbytes
+                    self.stats['encode_time'] += encoded - start
+                    self.stats['write_time'] += written - encoded
+            except Exception as e:
+                print(f"Error saving to {output_path}: {e}")
+                with self.lock:
+                    self.stats['errors'] += 1
+
+    def close(self):
+        """Waits for all queued images to be written and returns the stats."""
+        for _ in self.threads:
+            self.queue.put(STOP)
+        for t in self.threads:
+            t.join()
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_stats(label, stats):
+    print(f"[save] {label}: {stats['files']} files, {stats['bytes'] / 1024 ** 2:.2f} MB, "
+          f"encode {stats['encode_time']:.3f}s, write {stats['write_time']:.3f}s"
+          + (f", {stats['errors']} errors" if stats['errors'] else ""))
+
+# --- BACKEND GLUE ---
+
+def render_task(indexed_task):
+    """
+    Worker entry point used with an AsyncWriter: load + process, no save.
+    Returns (task_index, status, edge_map).
+    """
+    i, task_args = indexed_task
+    input_path = task_args[0]
+    try:
+        with tracing.span('task', 'task', {'path': input_path}):
+            with tracing.span('decode'):
+                image = utils.load_frame(input_path, task_args[4] if len(task_args) > 4 else None)
+            if image is None:
+                return i, (False, f"Failed to load {input_path}"), None
+            edge_map = utils.process_pipeline(image, task_args[3] if len(task_args) > 3 else 'reference')
+        return i, (True, f"Processed {os.path.basename(input_path)}"), edge_map
+    except Exception as e:
+        return i, (False, str(e)), None
+    finally:
+        tracing.flush()
+
+def output_path_for(task_args):
+    return os.path.join(task_args[1], os.path.basename(task_args[0]))
+
+def run_with_writer(imap_unordered, task_list, writer, order=None):
+    """
+    Runs render_task over task_list and feeds every edge map to writer as it
+    arrives. Tasks without the save flag are processed but not written.
+
+    Args:
+        imap_unordered (callable): imap_unordered(fn, iterable) of the backend.
+        order (list): Optional dispatch order of task indices (e.g. LPT).
+    """
+    results = [None] * len(task_list)
+    order = order if order is not None else range(len(task_list))
+    for i, status, edge_map in imap_unordered(render_task, ((i, task_list[i]) for i in order)):
+        results[i] = status
+        if edge_map is not None and task_list[i][2]:
+            writer.submit(edge_map, output_path_for(task_list[i]))
+    return results
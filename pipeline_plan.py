@@ -0,0 +1,238 @@
+"""
+Pipeline Plan Optimizer
+Declares the filter chain as stages with metadata and rewrites it into
+cheaper, equivalent (or nearly equivalent) plans.
+
+Every stage says whether it is linear, whether it works on each channel
+independently, what it does to the channel count, and its kernel. The
+optimizer applies three rewrites, one per level:
+
+    exact    drop conversions that are no-ops for the input (e.g. grayscale
+             on a single-channel frame). Output identical to the reference.
+    reorder  + move grayscale in front of linear per-channel stages, so
+             sharpening convolves one plane instead of three.
+    fuse     + merge adjacent linear convolutions into one kernel (sharpen
+             is folded into the Sobel kernels, which become 5x5).
+
+Moving or merging skips intermediate uint8 rounding and saturation, so the
+later levels can deviate from the reference. verify() measures the maximum
+pixel deviation, and pick_level() returns the cheapest level within a given
+bound:
+
+    python3 pipeline_plan.py --count 20
+    python3 main.py --engine planned --plan-level reorder
+"""
+
+import argparse
+import collections
+import os
+import time
+import cv2
+import numpy as np
+import tracing
+import utils
+
+LEVELS = ('exact', 'reorder', 'fuse')
+PLAN_LEVEL_ENV = "CST435_PLAN_LEVEL"
+
+# --- STAGES ---
+
+class Stage(collections.namedtuple('Stage', 'name kind linear per_channel to_gray kernel func')):
+    """
+    One filter of the chain.
+        kind:        'conv', 'color', 'gray' or 'gradient'
+        linear:      output is a linear function of the input (before uint8 rounding)
+        per_channel: channels are filtered independently
+        to_gray:     reduces the frame to one channel
+        kernel:      2D correlation kernel ('conv'), or (kx, ky) for 'gradient'
+        func:        image -> image
+    """
+    __slots__ = ()
+
+    @property
+    def kernel_size(self):
+        kernel = self.kernel[0] if self.kind == 'gradient' else self.kernel
+        return None if kernel is None else kernel.shape
+
+GAUSSIAN_KERNEL = np.outer([1, 2, 1], [1, 2, 1]) / 16.0
+SOBEL_X = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float64)
+SOBEL_Y = SOBEL_X.T.copy()
+
+def _gray(image):
+    return utils.apply_grayscale(image)
+
+def _conv(kernel):
+    return lambda image: cv2.filter2D(image, -1, kernel)
+
+def _gradient(kx, ky):
+    """Sobel-style magnitude from arbitrary kernels, normalized like the reference."""
+    def apply(image):
+        gray = utils.apply_grayscale(image)
+        gx = cv2.filter2D(gray, cv2.CV_64F, kx)
+        gy = cv2.filter2D(gray, cv2.CV_64F, ky)
+        magnitude = np.sqrt(gx ** 2 + gy ** 2)
+        return cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+    return apply
+
+def reference_stages():
+    """The reference process_pipeline order, declared as stages."""
+    return [
+        Stage('blur', 'conv', True, True, False, GAUSSIAN_KERNEL, utils.apply_gaussian_blur),
+        Stage('brightness', 'color', False, False, False, None, utils.adjust_brightness),
+        Stage('sharpen', 'conv', True, True, False, utils.SHARPEN_KERNEL.astype(np.float64), utils.apply_sharpening),
+        Stage('grayscale', 'gray', True, False, True, None, _gray),
+        Stage('sobel', 'gradient', False, False, True, (SOBEL_X, SOBEL_Y), utils.apply_sobel_edge_detection),
+    ]
+
+# --- REWRITES ---
+
+def compose_kernels(first, second):
+    """Kernel of correlating with `first`, then with `second` (their full convolution)."""
+    kh, kw = first.shape[0] + second.shape[0] - 1, first.shape[1] + second.shape[1] - 1
+    out = np.zeros((kh, kw))
+    for (i, j), weight in np.ndenumerate(second):
+        out[i:i + first.shape[0], j:j + first.shape[1]] += weight * first
+    return out
+
+def drop_redundant(stages, channels):
+    """Removes grayscale stages that run on an already single-channel frame."""
+    plan = []
+    for stage in stages:
+        if stage.kind == 'gray' and channels == 1:
+            continue
+        plan.append(stage)
+        if stage.to_gray:
+            channels = 1
+    return plan
+
+def push_grayscale(stages):
+    """Moves each grayscale stage in front of the linear per-channel stages before it."""
+    plan = list(stages)
+    for i in range(len(plan)):
+        if plan[i].kind != 'gray':
+            continue
+        j = i
+        while j > 0 and plan[j - 1].linear and plan[j - 1].per_channel:
+            plan[j - 1], plan[j] = plan[j], plan[j - 1]
+            j -= 1
+    return plan
+
+def merge_convolutions(stages):
+    """Merges adjacent linear convolutions, and a convolution into a following gradient."""
+    plan = []
+    for stage in stages:
+        prev = plan[-1] if plan else None
+        if prev is not None and prev.kind == 'conv' and stage.kind == 'conv':
+            kernel = compose_kernels(prev.kernel, stage.kernel)
+            plan[-1] = Stage(f"{prev.name}+{stage.name}", 'conv', True, True, False, kernel, _conv(kernel))
+        elif prev is not None and prev.kind == 'conv' and stage.kind == 'gradient' and _single_channel_before(plan):
+            kx, ky = (compose_kernels(prev.kernel, k) for k in stage.kernel)
+            plan[-1] = Stage(f"{prev.name}+{stage.name}", 'gradient', False, False, True, (kx, ky), _gradient(kx, ky))
+        else:
+            plan.append(stage)
+    return plan
+
+def _single_channel_before(plan):
+    # The gradient works on gray; folding is only valid if the conv already ran on gray
+    return any(stage.to_gray for stage in plan[:-1])
+
+def optimize(stages=None, level='exact', channels=3):
+    """Returns the plan (list of stages) for a frame with `channels` channels."""
+    if level not in LEVELS:
+        raise ValueError(f"unknown plan level {level!r} (expected one of {', '.join(LEVELS)})")
+    plan = drop_redundant(stages or reference_stages(), channels)
+    if level in ('reorder', 'fuse'):
+        plan = drop_redundant(push_grayscale(plan), channels)
+    if level == 'fuse':
+        plan = merge_convolutions(plan)
+    return plan
+
+def plane_passes(plan, channels=3):
+    """Image planes each stage reads; the cost the rewrites reduce."""
+    total = 0
+    for stage in plan:
+        total += 2 if stage.kind == 'gradient' else channels
+        if stage.to_gray:
+            channels = 1
+    return total
+
+def describe(plan):
+    parts = []
+    for stage in plan:
+        size = stage.kernel_size
+        parts.append(f"{stage.name}[{size[0]}x{size[1]}]" if size else stage.name)
+    return " -> ".join(parts)
+
+# --- EXECUTION ---
+
+_plans = {}
+
+def get_plan(level, channels):
+    key = (level, channels)
+    if key not in _plans:
+        _plans[key] = optimize(level=level, channels=channels)
+    return _plans[key]
+
+def run(image, level=None):
+    """Runs the plan for `level` (default: $CST435_PLAN_LEVEL or 'exact') on one frame."""
+    level = level or os.environ.get(PLAN_LEVEL_ENV, 'exact')
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    for stage in get_plan(level, channels):
+        with tracing.span(stage.name, 'filter'):
+            image = stage.func(image)
+    return image
+
+# --- VERIFICATION ---
+
+def verify(images, level):
+    """Returns (max, mean) absolute pixel deviation of `level` from the reference pipeline."""
+    worst, total, pixels = 0, 0, 0
+    for image in images:
+        diff = np.abs(utils.process_pipeline(image).astype(np.int16) - run(image, level))
+        worst = max(worst, int(diff.max()))
+        total += int(diff.sum())
+        pixels += diff.size
+    return worst, total / max(pixels, 1)
+
+def pick_level(images, max_error=0):
+    """Most optimized level whose max pixel deviation on `images` is within max_error."""
+    best = 'exact'
+    for level in LEVELS:
+        if verify(images, level)[0] <= max_error:
+            best = level
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Show, verify and time the optimized filter plans')
+    parser.add_argument('--count', type=int, default=20, help='Number of images')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed passes over the image set')
+    parser.add_argument('--max-error', type=int, default=None, help='Also pick the cheapest level within this max pixel deviation')
+    args = parser.parse_args()
+
+    paths = utils.get_image_paths("images", limit=args.count)
+    images = [img for img in (utils.load_image(p) for p in paths) if img is not None]
+    if not images:
+        print("No images found.")
+        return
+    channels = 1 if images[0].ndim == 2 else images[0].shape[2]
+
+    print(f"Verifying plans on {len(images)} images ({args.repeats} timed passes)...")
+    print(f"{'Level':<9} | {'Passes':<7} | {'ms/image':<9} | {'Max diff':<9} | {'Mean diff':<9} | Plan")
+    print("-" * 100)
+    for level in ('reference',) + LEVELS:
+        func = utils.process_pipeline if level == 'reference' else (lambda img, level=level: run(img, level))
+        plan = reference_stages() if level == 'reference' else get_plan(level, channels)
+        func(images[0])
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            for img in images:
+                func(img)
+        latency = (time.perf_counter() - start) / (args.repeats * len(images))
+        worst, mean = (0, 0.0) if level == 'reference' else verify(images, level)
+        print(f"{level:<9} | {plane_passes(plan, channels):<7} | {latency * 1000:<9.3f} | {worst:<9} | {mean:<9.4f} | {describe(plan)}")
+
+    if args.max_error is not None:
+        print(f"\nCheapest level within max diff {args.max_error}: {pick_level(images, args.max_error)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Regression Benchmarks (Synthetic, Offline)
+Catches slowdowns in single filters and backends without the images/ dataset.
+
+    * Synthetic images:  deterministic frames (gradients, shapes, texture,
+                         noise) at several resolutions and aspect ratios.
+    * Micro:             each apply_* filter and process_pipeline (every
+                         engine) per resolution, in this process.
+    * Macro:             each backend on a synthetic JPEG dataset written to
+                         a temporary directory.
+
+A run can be stored as the next versioned baseline for this host
+(output/baselines/<host>/v<N>.json, with git commit and host metadata).
+`compare` flags a benchmark as a regression only when the bootstrap 95% CI
+of median(new) / median(old) lies entirely above 1 + --threshold, so noise
+between runs is not reported as a slowdown. Exit status 1 on regressions.
+
+    python3 regression_bench.py run --save-baseline --label "before tiling change"
+    python3 regression_bench.py run --compare            # against the latest baseline
+    python3 regression_bench.py compare OLD.json NEW.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+import autotune
+import bench_stats
+import method_cf
+import method_hybrid
+import method_mp
+import utils
+
+BASELINE_DIR = os.path.join("output", "baselines")
+SUITE_VERSION = 1  # bump when benchmarks change meaning (compare warns across versions)
+SEED = 435
+DEFAULT_THRESHOLD = 0.10
+MIN_SAMPLE_SECONDS = 0.02  # micro samples repeat the call until they take at least this long
+
+# name -> (width, height)
+RESOLUTIONS = {
+    'qvga': (320, 240),
+    'hd': (1280, 720),
+    'portrait': (720, 1280),
+    'square': (1024, 1024),
+    'panorama': (2400, 600),
+    'fhd': (1920, 1080),
+}
+QUICK_RESOLUTIONS = ('qvga', 'hd', 'portrait')
+
+FILTERS = {
+    'grayscale': utils.apply_grayscale,
+    'gaussian_blur': utils.apply_gaussian_blur,
+    'sobel': utils.apply_sobel_edge_detection,
+    'sharpening': utils.apply_sharpening,
+    'brightness': utils.adjust_brightness,
+}
+
+BACKENDS = ('MP', 'CF_Proc', 'CF_Thread', 'Hybrid', 'Async', 'Dist')
+
+# --- SYNTHETIC IMAGES ---
+
+def synthetic_image(width, height, seed=SEED):
+    """Deterministic BGR frame: smooth gradients, random shapes, fine texture and noise."""
+    rng = np.random.default_rng([seed, width, height])
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.empty((height, width, 3), dtype=np.float32)
+    for c in range(3):
+        fx, fy = rng.uniform(0.5, 3.0, 2)
+        image[..., c] = 127 + 100 * np.sin(fx * np.pi * x / width + c) * np.cos(fy * np.pi * y / height)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+
+    scale = max(width, height)
+    for _ in range(24):
+        color = tuple(int(v) for v in rng.integers(0, 256, 3))
+        cx, cy = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(scale // 40 + 1, scale // 6 + 2))
+        if rng.random() < 0.5:
+            cv2.circle(image, (cx, cy), size, color, -1)
+        else:
+            cv2.rectangle(image, (cx, cy), (cx + size, cy + size // 2), color, -1)
+    # Fine texture and sensor-like noise so edges and blur see realistic content
+    texture = rng.normal(0, 12, (height, width, 1)).astype(np.float32)
+    return np.clip(image + texture, 0, 255).astype(np.uint8)
+
+def write_dataset(folder, count, resolutions, seed=SEED):
+    """Writes count JPEGs cycling through resolutions. Returns their paths."""
+    paths = []
+    names = list(resolutions)
+    for i in range(count):
+        width, height = RESOLUTIONS[names[i % len(names)]]
+        path = os.path.join(folder, f"synthetic_{i:04d}_{width}x{height}.jpg")
+        cv2.imwrite(path, synthetic_image(width, height, seed + i))
+        paths.append(path)
+    return paths
+
+# --- BENCHMARKS ---
+
+def calibrate(func, image):
+    """Warm-up call, then the number of calls that makes one sample last MIN_SAMPLE_SECONDS."""
+    func(image)  # LUTs, scratch buffers, cv2 thread pool
+    start = time.perf_counter()
+    func(image)
+    return max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-6)))
+
+def run_micro(resolutions, repeats):
+    """
+    {'micro/<filter>/<resolution>': per-call seconds} for every filter and pipeline engine.
+    Samples are taken in rounds over all benchmarks, so drift of the machine during the
+    run widens every benchmark's CI instead of shifting a few of them.
+    """
+    cases = []
+    for res in resolutions:
+        image = synthetic_image(*RESOLUTIONS[res])
+        funcs = dict(FILTERS)
+        for engine in utils.ENGINES:
+            funcs[f"pipeline_{engine}"] = lambda img, e=engine: utils.process_pipeline(img, e)
+        for name, func in funcs.items():
+            cases.append((f"micro/{name}/{res}", func, image, calibrate(func, image)))
+
+    results = {key: [] for key, _, _, _ in cases}
+    for round_idx in range(repeats):
+        for key, func, image, calls in cases:
+            # A fresh copy per sample: timings depend on the buffer's alignment
+            frame = image.copy()
+            wall, _ = bench_stats.timed(lambda: [func(frame) for _ in range(calls)])
+            results[key].append(wall / calls)
+        print(f"  micro round {round_idx + 1}/{repeats} ({len(cases)} benchmarks)")
+    return results
+
+def run_backend(backend, tasks, workers):
+    if backend == 'MP':
+        return method_mp.run_multiprocessing(tasks, workers)
+    if backend == 'CF_Proc':
+        return method_cf.run(tasks, workers, mode='process')
+    if backend == 'CF_Thread':
+        return method_cf.run(tasks, workers, mode='thread')
+    if backend == 'Hybrid':
+        return method_hybrid.run(tasks, method_hybrid.WorkerShape(workers, 1, None))
+    if backend == 'Dist':
+        # Coordinator on loopback with local worker processes, as main.py runs it by default
+        import method_dist
+        return method_dist.run(tasks, workers)
+    import method_async
+    return method_async.run(tasks, workers)
+
+def run_macro(resolutions, repeats, count, workers, backends=BACKENDS):
+    """{'macro/<backend>/x<workers>': samples} on a temporary synthetic dataset, in rounds like run_micro."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='cst435-bench-') as folder:
+        paths = write_dataset(folder, count, resolutions)
+        tasks = [(p, folder, False, 'reference') for p in paths]
+        for backend in backends:
+            run_backend(backend, tasks, workers)  # warm-up (page cache, imports)
+            results[f"macro/{backend}/x{workers}"] = []
+        for _ in range(repeats):
+            for backend in backends:
+                wall, _ = bench_stats.timed(run_backend, backend, tasks, workers)
+                results[f"macro/{backend}/x{workers}"].append(wall)
+    for backend in backends:
+        print(f"  macro {backend:<9} x{workers}: {np.median(results[f'macro/{backend}/x{workers}']):.3f}s for {count} images")
+    return results
+
+def run_suite(quick=False, repeats=7, macro_repeats=3, images=24, workers=None, only=None):
+    resolutions = QUICK_RESOLUTIONS if quick else tuple(RESOLUTIONS)
+    workers = workers or os.cpu_count() or 1
+    samples = {}
+    if only in (None, 'micro'):
+        samples.update(run_micro(resolutions, repeats))
+    if only in (None, 'macro'):
+        samples.update(run_macro(resolutions, macro_repeats, images, workers))
+    return {
+        'suite_version': SUITE_VERSION,
+        'config': {'quick': quick, 'repeats': repeats, 'macro_repeats': macro_repeats, 'images': images,
+                   'workers': workers, 'resolutions': list(resolutions), 'seed': SEED},
+        'commit': git_commit(),
+        'benchmarks': {key: {'samples': s, **bench_stats.summarize(s)} for key, s in samples.items()},
+    }
+
+# --- BASELINES ---
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def _version(path):
+    """v12.json -> 12"""
+    number = os.path.basename(path)[1:-len(".json")]
+    return int(number) if number.isdigit() else -1
+
+def baseline_paths(host=None, baseline_dir=BASELINE_DIR):
+    """This host's baselines, oldest first."""
+    folder = os.path.join(baseline_dir, host or autotune.host_key())
+    return sorted(glob.glob(os.path.join(folder, "v*.json")), key=_version)
+
+def save_baseline(result, label=None, baseline_dir=BASELINE_DIR):
+    existing = baseline_paths(baseline_dir=baseline_dir)
+    version = _version(existing[-1]) + 1 if existing else 1
+    path = os.path.join(baseline_dir, autotune.host_key(), f"v{version}.json")
+    return bench_stats.write_json(path, {**result, 'baseline_version': version, 'label': label,
+                                         'created': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+# --- COMPARE ---
+
+def compare(old, new, threshold=DEFAULT_THRESHOLD):
+    """
+    Rows (key, old_median, new_median, ratio, ratio_ci, verdict) for benchmarks in both results.
+    verdict: 'REGRESSION' / 'improved' when the ratio CI clears 1 +/- threshold, else 'ok'.
+    """
+    rows = []
+    for key in sorted(set(old['benchmarks']) & set(new['benchmarks'])):
+        a, b = old['benchmarks'][key]['samples'], new['benchmarks'][key]['samples']
+        change = bench_stats.speedup(b, a, 1)  # median(new) / median(old), with bootstrap CI
+        ratio, ci = change['speedup'], change['speedup_ci']
+        if ci[0] > 1 + threshold:
+            verdict = 'REGRESSION'
+        elif ci[1] < 1 - threshold:
+            verdict = 'improved'
+        else:
+            verdict = 'ok'
+        rows.append((key, float(np.median(a)), float(np.median(b)), ratio, ci, verdict))
+    return rows
+
+def print_comparison(rows, old, new):
+    if old.get('suite_version') != new.get('suite_version'):
+        print(f"Warning: suite version {old.get('suite_version')} vs {new.get('suite_version')}; results may not be comparable")
+    old_host, new_host = old.get('host', {}).get('hostname'), new.get('host', {}).get('hostname')
+    if old_host != new_host:
+        print(f"Warning: baseline from host '{old_host}', this run from '{new_host}'")
+    print(f"Baseline: v{old.get('baseline_version', '?')} ({old.get('label') or 'no label'}, commit {old.get('commit')})"
+          f" -> commit {new.get('commit')}")
+    width = 96
+    print("-" * width)
+    print(f"{'Benchmark':<36} | {'Old (ms)':>10} | {'New (ms)':>10} | {'New/Old':>7} | {'95% CI':<15} | Verdict")
+    print("-" * width)
+    for key, a, b, ratio, ci, verdict in rows:
+        print(f"{key:<36} | {a * 1000:>10.3f} | {b * 1000:>10.3f} | {ratio:>7.3f} | "
+              f"{f'[{ci[0]:.3f},{ci[1]:.3f}]':<15} | {verdict}")
+    print("-" * width)
+    regressions = sum(1 for r in rows if r[-1] == 'REGRESSION')
+    improved = sum(1 for r in rows if r[-1] == 'improved')
+    print(f"{len(rows)} compared: {regressions} regression(s), {improved} improvement(s)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic regression benchmarks with stored baselines')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Run the suite')
+    run.add_argument('--quick', action='store_true', help=f"Only {', '.join(QUICK_RESOLUTIONS)}")
+    run.add_argument('--only', choices=['micro', 'macro'], default=None)
+    run.add_argument('--repeats', type=int, default=7, help='Samples per micro benchmark')
+    run.add_argument('--macro-repeats', type=int, default=3, help='Timed runs per backend')
+    run.add_argument('--images', type=int, default=24, help='Synthetic images in the macro dataset')
+    run.add_argument('--workers', type=int, default=None, help='Backend workers (default: CPU count)')
+    run.add_argument('--output', default=None, help='Also write this run to a JSON file')
+    run.add_argument('--save-baseline', action='store_true', help='Store the run as the next baseline version for this host')
+    run.add_argument('--label', default=None, help='Baseline label')
+    run.add_argument('--compare', nargs='?', const='latest', default=None, metavar='BASELINE',
+                     help="Compare against a baseline file (default: this host's latest)")
+    run.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Relative change that counts (0.10 = 10%%)')
+
+    cmp = sub.add_parser('compare', help='Compare two stored results')
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    sub.add_parser('list', help="List this host's baselines")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for path in baseline_paths():
+            b = load(path)
+            print(f"{path}: {b.get('created')} commit {b.get('commit')} {b.get('label') or ''}")
+        return 0
+
+    if args.command == 'compare':
+        old, new = load(args.old), load(args.new)
+        return 1 if print_comparison(compare(old, new, args.threshold), old, new) else 0
+
+    # Resolve the baseline first so a run that becomes the new baseline is not compared to itself
+    baseline = None
+    if args.compare:
+        paths = baseline_paths() if args.compare == 'latest' else [args.compare]
+        if not paths:
+            print(f"Warning: no baseline for {autotune.host_key()} in '{BASELINE_DIR}'; nothing to compare")
+        else:
+            baseline = load(paths[-1])
+
+    print(f"--- Regression benchmarks ({'quick' if args.quick else 'full'}, suite v{SUITE_VERSION}) ---")
+    result = run_suite(args.quick, args.repeats, args.macro_repeats, args.images, args.workers, args.only)
+    if args.output:
+        print(f"[Saved] {bench_stats.write_json(args.output, result)}")
+    if args.save_baseline:
+        print(f"[Saved] Baseline {save_baseline(result, args.label)}")
+    if baseline:
+        return 1 if print_comparison(compare(baseline, result, args.threshold), baseline, result) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Result Cache & Job Journal
+Makes --production --save runs resumable and skips work on unchanged inputs.
+
+    Journal       <job dir>/journal.jsonl. The first line holds the pipeline
+                  parameters; every worker then appends one line per saved
+                  image (input stat key, output path, output size). The lines
+                  are single O_APPEND writes, so the journal survives a
+                  crash at any point. On restart, an image is skipped when
+                  its input is unchanged and its output still has the
+                  recorded size. Changed parameters start a new journal.
+
+    Result cache  content-addressed store of encoded outputs:
+                  objects/<sha256[:2]>/<sha256>, where the key hashes the
+                  input bytes, the pipeline parameters and the output format.
+                  A hit is copied to the output path instead of being
+                  processed. Least recently used results are evicted once
+                  the size cap is reached. The parent process is the only
+                  writer of the cache.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import frame_cache
+
+ENV_VAR = "CST435_JOURNAL"
+JOURNAL_FILE = "journal.jsonl"
+INDEX_FILE = "index.json"
+OBJECTS_DIR = "objects"
+DEFAULT_MAX_BYTES = 1024 ** 3
+# Bump when the filter chain changes its output, so stale results miss
+PIPELINE_VERSION = 1
+
+def params_key(engine, plan_level=None, sobel_precision=None):
+    """Pipeline parameters a stored result depends on."""
+    key = f"v{PIPELINE_VERSION}|{engine}|{plan_level or ''}"
+    # The exact Sobel keeps the keys of results stored before precision modes existed
+    if sobel_precision and sobel_precision != 'float64':
+        key += f"|sobel={sobel_precision}"
+    return key
+
+# --- JOURNAL (worker side) ---
+
+# Inherited by pool children through the environment (fork and spawn)
+JOURNAL_PATH = os.environ.get(ENV_VAR)
+
+def record(input_path, output_path):
+    """Appends one completed task to the journal. No-op unless a journal is enabled."""
+    if not JOURNAL_PATH:
+        return
+    line = json.dumps({'input': frame_cache.cache_key(input_path), 'output': output_path,
+                       'size': os.path.getsize(output_path)}) + "\n"
+    fd = os.open(JOURNAL_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+
+# --- JOURNAL (parent side) ---
+
+class Journal:
+    """Completed tasks of one job, loaded from (and appended to) journal.jsonl."""
+
+    def __init__(self, job_dir, params, resume=True):
+        self.path = os.path.join(job_dir, JOURNAL_FILE)
+        self.params = params
+        self.done = {}
+        os.makedirs(job_dir, exist_ok=True)
+        if resume and self._load():
+            return
+        with open(self.path, 'w') as f:
+            f.write(json.dumps({'params': params}) + "\n")
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+        try:
+            if not lines or json.loads(lines[0]).get('params') != self.params:
+                return False
+        except ValueError:
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn last line of a crashed run
+            self.done[entry['input']] = entry
+        return True
+
+    def is_done(self, input_path, output_path):
+        """True when input_path is unchanged since it was journaled and its output is intact."""
+        entry = self.done.get(frame_cache.cache_key(input_path))
+        if entry is None or entry['output'] != output_path:
+            return False
+        try:
+            return os.path.getsize(output_path) == entry['size']
+        except OSError:
+            return False
+
+    def enable(self):
+        """Makes workers started afterwards (and this process) append to the journal."""
+        global JOURNAL_PATH
+        os.environ[ENV_VAR] = self.path
+        JOURNAL_PATH = self.path
+
+    def disable(self):
+        global JOURNAL_PATH
+        os.environ.pop(ENV_VAR, None)
+        JOURNAL_PATH = None
+
+# --- RESULT CACHE ---
+
+class ResultCache:
+    """
+    Content-addressed store of encoded results with an LRU size cap.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.objects = {}  # digest -> [size, last_used]
+        self.hashes = {}   # frame_cache.cache_key(path) -> sha256 of the file
+        self.clock = 0
+        self.stats = {'hits': 0, 'misses': 0, 'resumed': 0, 'stored': 0, 'evicted': 0}
+        os.makedirs(os.path.join(cache_dir, OBJECTS_DIR), exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            self.objects, self.hashes = data['objects'], data['hashes']
+            self.clock = max((e[1] for e in self.objects.values()), default=0)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'objects': self.objects, 'hashes': self.hashes}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, OBJECTS_DIR, digest[:2], digest)
+
+    def digest(self, input_path, params, output_path):
+        """Cache key: hash of the input bytes (memoized per path/mtime/size), params and output format."""
+        stat_key = frame_cache.cache_key(input_path)
+        content = self.hashes.get(stat_key)
+        if content is None:
+            h = hashlib.sha256()
+            with open(input_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    h.update(block)
+            content = h.hexdigest()
+            self.hashes[stat_key] = content
+        key = f"{content}|{params}|{os.path.splitext(output_path)[1].lower()}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, digest, output_path):
+        """Copies a cached result to output_path. Returns True on a hit."""
+        if digest not in self.objects:
+            return False
+        try:
+            shutil.copyfile(self._object_path(digest), output_path)
+        except OSError:
+            del self.objects[digest]
+            return False
+        self.clock += 1
+        self.objects[digest][1] = self.clock
+        return True
+
+    def put(self, digest, output_path):
+        """Stores the result at output_path, evicting least recently used results past the cap."""
+        size = os.path.getsize(output_path)
+        if digest in self.objects or size > self.max_bytes:
+            return
+        total = sum(e[0] for e in self.objects.values())
+        for victim in sorted(self.objects, key=lambda d: self.objects[d][1]):
+            if total + size <= self.max_bytes:
+                break
+            total -= self.objects.pop(victim)[0]
+            try:
+                os.remove(self._object_path(victim))
+            except OSError:
+                pass
+            self.stats['evicted'] += 1
+
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(output_path, path)
+        self.clock += 1
+        self.objects[digest] = [size, self.clock]
+        self.stats['stored'] += 1
+
+    def size_bytes(self):
+        return sum(e[0] for e in self.objects.values())
+
+# --- RUN PLANNING ---
+
+def plan(tasks, journal, cache, params):
+    """
+    Splits tasks into the ones that still need processing (call after
+    journal.enable()). Journaled tasks with intact outputs are skipped; cache hits are copied
+    to their output path and journaled. Returns (todo, digests) where
+    digests maps task index -> cache key for the todo tasks.
+    """
+    todo, digests = [], {}
+    for task in tasks:
+        input_path, output_folder = task[:2]
+        output_path = os.path.join(output_folder, os.path.basename(input_path))
+        try:
+            digest = cache.digest(input_path, params, output_path)
+        except OSError:
+            todo.append(task)
+            continue
+        if journal.is_done(input_path, output_path):
+            # Finished by an earlier (possibly crashed) run: keep, and cache if it never got stored
+            cache.stats['resumed'] += 1
+            cache.put(digest, output_path)
+            continue
+        os.makedirs(output_folder, exist_ok=True)
+        if cache.get(digest, output_path):
+            cache.stats['hits'] += 1
+            record(input_path, output_path)
+            continue
+        cache.stats['misses'] += 1
+        digests[len(todo)] = digest
+        todo.append(task)
+    return todo, digests
+
+def store_results(todo, results, digests, cache):
+    """Adds the outputs of successful todo tasks to the cache and saves its index."""
+    for i, (task, (ok, _)) in enumerate(zip(todo, results)):
+        if ok and i in digests:
+            try:
+                cache.put(digests[i], os.path.join(task[1], os.path.basename(task[0])))
+            except OSError:
+                pass
+    cache.save_index()
+
+def print_summary(cache):
+    s = cache.stats
+    print(f"Result cache '{cache.cache_dir}': {s['hits']} hits, {s['misses']} misses, "
+          f"{s['resumed']} resumed from journal, {s['stored']} stored, {s['evicted']} evicted "
+          f"({cache.size_bytes() / 1024 ** 2:.1f} MB)")
@@ -0,0 +1,196 @@
+"""
+Cost-Aware Scheduler
+Shared dispatch layer for the MP and CF backends.
+
+Each task gets a cost estimate (file size or pixel count), tasks are
+ordered longest-processing-time first (LPT) and packed into chunks whose
+target cost shrinks as the remaining work shrinks (guided scheduling):
+big images travel alone at the start, small ones are batched, and the
+tail of the run is made of small chunks that even out the finish.
+
+Every chunk reports which worker ran it and for how long, so per-worker
+busy/idle time and the load imbalance of a run can be measured.
+"""
+
+import os
+import threading
+import time
+import utils
+
+SCHEDULES = ('default', 'lpt')
+COST_MODELS = ('size', 'pixels')
+
+# Batch mode: cap on the pixels stacked into one batch (bounds worker memory)
+BATCH_MAX_PIXELS = 4_000_000
+
+# --- COST ESTIMATION ---
+
+_known_pixels = {}
+
+def register_dimensions(pixels_by_path):
+    """Registers known pixel counts (e.g. from the dataset manifest) so 'pixels' skips header reads."""
+    _known_pixels.update(pixels_by_path)
+
+def estimate_cost(path, cost_model='size'):
+    """
+    Relative cost of processing one image.
+    'size' uses the file size, 'pixels' reads width x height from the header
+    (falling back to file size when the header cannot be parsed).
+    """
+    if cost_model == 'pixels':
+        if _known_pixels.get(path):
+            return _known_pixels[path]
+        dims = utils.read_image_size(path)
+        if dims:
+            return dims[0] * dims[1]
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def lpt_order(task_list, cost_model='size'):
+    """Returns task indices sorted by estimated cost, most expensive first."""
+    costs = [estimate_cost(task[0], cost_model) for task in task_list]
+    return sorted(range(len(task_list)), key=lambda i: costs[i], reverse=True), costs
+
+def build_chunks(task_list, num_workers, cost_model='size', chunks_per_worker=4):
+    """
+    Splits task_list into LPT-ordered chunks of adaptive size.
+
+    Returns:
+        list: chunks, each a list of (task_index, task_args).
+    """
+    order, costs = lpt_order(task_list, cost_model)
+    remaining = sum(costs)
+    chunks = []
+    chunk, chunk_cost = [], 0
+
+    for i in order:
+        # Guided target: a fraction of the work that is still unassigned
+        target = remaining / (chunks_per_worker * max(num_workers, 1))
+        if chunk and chunk_cost + costs[i] > target:
+            chunks.append(chunk)
+            chunk, chunk_cost = [], 0
+        chunk.append((i, task_list[i]))
+        chunk_cost += costs[i]
+        remaining -= costs[i]
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def build_fixed_chunks(task_list, chunksize):
+    """Chunks in original task order with a fixed chunksize (the pool.map/executor.map baseline)."""
+    indexed = list(enumerate(task_list))
+    return [indexed[i:i + chunksize] for i in range(0, len(indexed), max(chunksize, 1))]
+
+def make_chunks(task_list, num_workers, schedule='lpt', cost_model='size', default_chunksize=1):
+    """Builds chunks for the selected schedule."""
+    if schedule == 'lpt':
+        return build_chunks(task_list, num_workers, cost_model)
+    return build_fixed_chunks(task_list, default_chunksize)
+
+def build_batches(task_list, batch_size, max_pixels=BATCH_MAX_PIXELS):
+    """
+    Groups tasks by image size (header read) into batches for batch mode
+    (see utils.process_batch). A batch holds at most batch_size images and
+    max_pixels pixels; images whose size is unknown are batched together and
+    regrouped by the worker after decoding.
+
+    Returns:
+        list: batches, each a list of (task_index, task_args).
+    """
+    groups = {}
+    for i, task in enumerate(task_list):
+        groups.setdefault(utils.read_image_size(task[0]), []).append((i, task))
+
+    batches = []
+    for dims, members in groups.items():
+        pixels = dims[0] * dims[1] if dims else 0
+        per_batch = max(1, min(batch_size, max_pixels // pixels if pixels else batch_size))
+        batches.extend(members[i:i + per_batch] for i in range(0, len(members), per_batch))
+    return batches
+
+def mp_default_chunksize(num_tasks, num_workers):
+    """Chunksize multiprocessing.Pool.map picks when none is given."""
+    chunksize, extra = divmod(num_tasks, num_workers * 4)
+    return chunksize + 1 if extra else chunksize
+
+# --- WORKER SIDE ---
+
+def run_chunk(chunk):
+    """
+    Worker entry point: processes one chunk of (task_index, task_args).
+    Returns (worker_id, start, end, [(task_index, result), ...]).
+    """
+    worker_id = f"{os.getpid()}-{threading.get_ident()}"
+    start = time.time()
+    results = [(i, utils.worker_task(task)) for i, task in chunk]
+    return worker_id, start, time.time(), results
+
+def run_batch(batch):
+    """Worker entry point for batch mode; same return shape as run_chunk."""
+    worker_id = f"{os.getpid()}-{threading.get_ident()}"
+    start = time.time()
+    results = utils.batch_worker_task(batch)
+    return worker_id, start, time.time(), results
+
+# --- PARENT SIDE ---
+
+def run_batched(imap_unordered, task_list, num_workers, batch_size, report=None):
+    """
+    Batch mode for the MP and CF backends: same-sized images are dispatched
+    together and processed as one stacked array per batch.
+    imap_unordered(fn, iterable) is the backend's unordered map.
+    """
+    batches = build_batches(task_list, batch_size)
+    start = time.time()
+    chunk_results = list(imap_unordered(run_batch, batches))
+    results, worker_report = collect(chunk_results, len(task_list), num_workers, start)
+    if report is not None:
+        report.update(worker_report)
+    return results
+
+def collect(chunk_results, num_tasks, num_workers, wall_start):
+    """
+    Reassembles per-chunk results in original task order and builds the
+    per-worker load report.
+
+    Returns:
+        tuple: (results, report) where report maps worker_id -> stats dict.
+    """
+    wall_end = time.time()
+    wall = wall_end - wall_start
+    results = [None] * num_tasks
+    report = {}
+
+    for worker_id, start, end, chunk in chunk_results:
+        stats = report.setdefault(worker_id, {'busy': 0.0, 'chunks': 0, 'tasks': 0})
+        stats['busy'] += end - start
+        stats['chunks'] += 1
+        stats['tasks'] += len(chunk)
+        for i, res in chunk:
+            results[i] = res
+
+    # Workers that never received a chunk were idle for the whole run
+    for n in range(num_workers - len(report)):
+        report[f"unused-{n}"] = {'busy': 0.0, 'chunks': 0, 'tasks': 0}
+
+    for stats in report.values():
+        stats['idle'] = max(wall - stats['busy'], 0.0)
+
+    return results, report
+
+def imbalance(report):
+    """Max busy time / mean busy time (1.0 is a perfectly balanced run)."""
+    busy = [s['busy'] for s in report.values()]
+    mean = sum(busy) / len(busy) if busy else 0
+    return max(busy) / mean if mean > 0 else 1.0
+
+def print_report(report):
+    """Prints per-worker busy/idle time for one run."""
+    print(f"{'Worker':<22} | {'Chunks':<7} | {'Tasks':<6} | {'Busy (s)':<9} | {'Idle (s)':<9}")
+    print("-" * 65)
+    for worker_id, s in sorted(report.items()):
+        print(f"{worker_id:<22} | {s['chunks']:<7} | {s['tasks']:<6} | {s['busy']:<9.4f} | {s['idle']:<9.4f}")
+    print(f"Load imbalance (max/mean busy): {imbalance(report):.3f}")
@@ -0,0 +1,290 @@
+"""
+Processing Service
+Long-running HTTP endpoint (TCP or Unix socket) around the filter pipeline,
+so clients stop paying pool startup and imports on every invocation.
+
+    POST /process       body = encoded image (JPEG/PNG); returns the edge map
+                        (?format=.png|.jpg, default .png; ?engine=...)
+    GET  /health        200 once the pool is warm
+    GET  /stats         JSON counters (requests, batches, rejections, queue depth)
+
+Request threads put their image on a bounded queue. A batcher thread takes
+the first request, waits up to max_wait_ms for more (up to max_batch), and
+sends the whole batch to one warm pool worker. There, same-sized frames go
+through utils.process_batch, as in batch mode. At most 2 x workers batches
+are in flight. A watchdog thread per batch frees its slot when the batch
+finishes, fails or exceeds batch_timeout, so a killed or hung worker costs
+one failed batch instead of a slot for good. When the queue is full,
+requests are rejected at once with 503 and Retry-After (admission control),
+instead of queueing without bound.
+
+    python3 service.py --port 8435 --workers 4 --max-batch 16 --max-wait-ms 5
+    python3 loadgen.py --url http://127.0.0.1:8435 --rate 200 --duration 10
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import cv2
+import numpy as np
+import pool_manager
+import utils
+
+DEFAULT_PORT = 8435
+DEFAULT_MAX_BATCH = 16
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_QUEUE_LIMIT = 256
+REQUEST_TIMEOUT = 60.0
+MAX_BODY = 64 * 1024 ** 2
+
+# --- WORKER SIDE ---
+
+def process_encoded(batch):
+    """
+    Pool entry point: [(data, engine, fmt), ...] -> [(ok, bytes or error), ...].
+    Same-sized frames of an engine that utils.can_batch are processed together as one stack.
+    """
+    results = [None] * len(batch)
+    groups = collections.defaultdict(list)
+    for i, (data, engine, fmt) in enumerate(batch):
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            results[i] = (False, "could not decode image")
+        elif utils.can_batch(engine):
+            groups[image.shape].append((i, image))
+        else:
+            groups[(i,)].append((i, image))
+
+    for members in groups.values():
+        try:
+            indices = [i for i, _ in members]
+            if len(members) > 1:
+                edge_maps = utils.process_batch([image for _, image in members])
+            else:
+                edge_maps = [utils.process_pipeline(members[0][1], batch[indices[0]][1])]
+            for i, edge_map in zip(indices, edge_maps):
+                ok, encoded = cv2.imencode(batch[i][2], edge_map)
+                results[i] = (True, encoded.tobytes()) if ok else (False, f"could not encode {batch[i][2]}")
+        except Exception as e:
+            for i in indices:
+                results[i] = (False, str(e))
+    return results
+
+# --- BATCHER ---
+
+class Batcher:
+    """Bounded request queue -> micro-batches -> warm pool."""
+
+    def __init__(self, pool, num_workers, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 queue_limit=DEFAULT_QUEUE_LIMIT, batch_timeout=REQUEST_TIMEOUT):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_timeout = batch_timeout
+        self.requests = queue.Queue(maxsize=queue_limit)
+        self.in_flight = threading.BoundedSemaphore(2 * num_workers)
+        self.stats = collections.Counter()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, data, engine, fmt):
+        """Returns a Future of (ok, bytes or error), or None when the queue is full."""
+        future = Future()
+        try:
+            self.requests.put_nowait(((data, engine, fmt), future))
+        except queue.Full:
+            self._count('rejected')
+            return None
+        self._count('accepted')
+        return future
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            try:
+                first = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self.in_flight.acquire()  # Backpressure: the queue fills up while workers are busy
+            self._count('batches')
+            self._count('batched_requests', len(batch))
+            futures = [f for _, f in batch]
+            try:
+                pending = self.pool.apply_async(process_encoded, ([item for item, _ in batch],))
+            except Exception as e:
+                self.in_flight.release()
+                self._count('failed_batches')
+                for future in futures:
+                    future.set_result((False, str(e)))
+                continue
+            # A Pool never reports a task lost with a dead worker, so an
+            # apply_async callback alone could hold the slot forever
+            threading.Thread(target=self._watch, args=(pending, futures), daemon=True).start()
+
+    def _watch(self, pending, futures):
+        """Watchdog for one batch: waits at most batch_timeout and always frees its slot."""
+        try:
+            results = pending.get(timeout=self.batch_timeout)
+        except multiprocessing.TimeoutError:
+            self._count('timed_out_batches')
+            results = [(False, f"batch timed out after {self.batch_timeout:g}s")] * len(futures)
+        except Exception as e:
+            self._count('failed_batches')
+            results = [(False, str(e))] * len(futures)
+        finally:
+            self.in_flight.release()
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = self.requests.qsize()
+        stats['mean_batch'] = stats.get('batched_requests', 0) / stats['batches'] if stats.get('batches') else 0.0
+        return stats
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+# --- HTTP ---
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    batcher = None   # set by serve()
+    ready = None
+
+    def address_string(self):
+        # Unix-socket clients have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, code, body, content_type='application/json', headers=None):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, code, payload, headers=None):
+        self._reply(code, json.dumps(payload).encode(), headers=headers)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._json(200 if self.ready.is_set() else 503, {'ready': self.ready.is_set()})
+        elif path == '/stats':
+            self._json(200, self.batcher.snapshot())
+        else:
+            self._json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/process':
+            self._json(404, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if not 0 < length <= MAX_BODY:
+            self._json(413 if length else 400, {'error': 'body must be an encoded image'})
+            return
+        data = self.rfile.read(length)
+        params = parse_qs(url.query)
+        engine = params.get('engine', ['reference'])[0]
+        fmt = params.get('format', ['.png'])[0]
+        if engine not in utils.ENGINES or fmt not in ('.png', '.jpg', '.jpeg'):
+            self._json(400, {'error': f"engine must be one of {utils.ENGINES}, format .png/.jpg"})
+            return
+
+        future = self.batcher.submit(data, engine, fmt)
+        if future is None:
+            self._json(503, {'error': 'overloaded'}, headers={'Retry-After': '1'})
+            return
+        try:
+            ok, result = future.result(timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            ok, result = False, f"timed out: {e}"
+        if ok:
+            self._reply(200, result, content_type='image/png' if fmt == '.png' else 'image/jpeg')
+        else:
+            self._json(422, {'error': result})
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_server(port=DEFAULT_PORT, host='127.0.0.1', unix_path=None):
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        return ThreadingUnixHTTPServer(unix_path, Handler)
+    return ThreadingHTTPServer((host, port), Handler)
+
+def serve(num_workers, port=DEFAULT_PORT, host='127.0.0.1', unix_path=None, max_batch=DEFAULT_MAX_BATCH,
+          max_wait_ms=DEFAULT_MAX_WAIT_MS, queue_limit=DEFAULT_QUEUE_LIMIT, cv2_threads=None):
+    """Runs the service until interrupted."""
+    utils.set_cv2_threads(cv2_threads)
+    ready = threading.Event()
+    server = make_server(port, host, unix_path)
+    with pool_manager.PoolManager() as pools:
+        start = time.time()
+        pool = pools.get('MP', num_workers, cv2_threads)
+        batcher = Batcher(pool, num_workers, max_batch, max_wait_ms, queue_limit)
+        Handler.batcher, Handler.ready = batcher, ready
+        ready.set()
+        where = unix_path or f"http://{host}:{server.server_address[1]}"
+        print(f"Serving on {where} ({num_workers} warm workers in {time.time() - start:.2f}s, "
+              f"batches <= {max_batch} / {max_wait_ms} ms, queue limit {queue_limit})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            batcher.stop()
+            print("Final stats: " + json.dumps(batcher.snapshot()))
+
+def main():
+    parser = argparse.ArgumentParser(description='Image processing service (warm pool + micro-batching)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', default=None, help='Serve on a Unix socket path instead of TCP')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help='Requests per micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS, help='Wait for a batch to fill (ms)')
+    parser.add_argument('--queue-limit', type=int, default=DEFAULT_QUEUE_LIMIT, help='Queued requests before 503')
+    parser.add_argument('--cv2-threads', type=int, default=None)
+    args = parser.parse_args()
+    serve(args.workers, args.port, args.host, args.unix, args.max_batch, args.max_wait_ms,
+          args.queue_limit, args.cv2_threads)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,258 @@
+"""
+Shared-Memory Transport
+Zero-copy frame hand-off for the process backends.
+
+The parent decodes frames (on loader threads) into a pool of reusable
+multiprocessing.shared_memory slabs and sends workers a small handle.
+Workers map the slab, run the pipeline straight into the output region
+of the same slab and return only a status tuple, so pixels never go
+through the pickle pipe.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import os
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import scheduler
+import tracing
+import output_writer
+import utils
+
+ALIGN = 64
+
+def _aligned(nbytes):
+    return (nbytes + ALIGN - 1) // ALIGN * ALIGN
+
+def slab_layout(shape):
+    """
+    Returns (out_offset, total_bytes) for a uint8 frame of the given shape.
+    The input frame sits at offset 0, the HxW edge map right after it.
+    """
+    in_bytes = int(np.prod(shape))
+    out_bytes = shape[0] * shape[1]
+    out_offset = _aligned(in_bytes)
+    return out_offset, out_offset + out_bytes
+
+# --- PARENT SIDE ---
+
+def prepare():
+    """
+    Call before creating the worker pool.
+    Starting the resource tracker first lets pool children inherit it, so
+    slabs they attach to stay owned (and unlinked) by the parent only.
+    """
+    resource_tracker.ensure_running()
+
+_generations = itertools.count(1)
+
+class SlabPool:
+    """
+    Fixed number of reusable shared-memory slabs.
+    A slab that is too small for a frame is re-created at the larger size,
+    so after the first few frames the pool stops allocating.
+
+    generation changes whenever the set of live slabs does (new pool or a
+    re-created slab) and travels in every handle, so workers can drop
+    mappings of slabs the parent has already unlinked.
+    """
+
+    def __init__(self, num_slabs, slab_bytes=0):
+        self.slabs = [None] * num_slabs
+        self.free = collections.deque(range(num_slabs))
+        self.slab_bytes = slab_bytes
+        self.generation = next(_generations)
+
+    def acquire(self, nbytes):
+        """Returns (slab_index, SharedMemory) with at least nbytes. Caller must release it."""
+        idx = self.free.popleft()
+        shm = self.slabs[idx]
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+                self.generation = next(_generations)
+            self.slab_bytes = max(self.slab_bytes, nbytes)
+            shm = shared_memory.SharedMemory(create=True, size=self.slab_bytes)
+            self.slabs[idx] = shm
+        return idx, shm
+
+    def release(self, idx):
+        self.free.append(idx)
+
+    @property
+    def in_use(self):
+        return len(self.slabs) - len(self.free)
+
+    def close(self):
+        for shm in self.slabs:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self.slabs = [None] * len(self.slabs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- WORKER SIDE ---
+
+_attached = collections.OrderedDict()
+_attached_generation = None
+MAX_ATTACHED = 64
+
+def _attach(name, generation):
+    """
+    Maps a slab by name, caching the mapping while the slab pool is unchanged.
+    Warm workers outlive runs; holding on to mappings of slabs from an older
+    generation would keep their unlinked /dev/shm memory allocated.
+    """
+    global _attached_generation
+    if generation != _attached_generation:
+        while _attached:
+            _, old = _attached.popitem()
+            old.close()
+        _attached_generation = generation
+    shm = _attached.get(name)
+    if shm is None:
+        # Pool children share the parent's resource tracker, so attaching
+        # here does not add a second owner; the parent alone unlinks.
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+        while len(_attached) > MAX_ATTACHED:
+            _, old = _attached.popitem(last=False)
+            old.close()
+    else:
+        _attached.move_to_end(name)
+    return shm
+
+def shm_worker_task(handle):
+    """
+    Worker entry point for the shm transport.
+    Args: handle (tuple): (slab_name, generation, shape, input_path, output_folder, save_flag, engine)
+    """
+    try:
+        slab_name, generation, shape, input_path, output_folder, save_flag, engine = handle
+        shm = _attach(slab_name, generation)
+        out_offset, _ = slab_layout(shape)
+
+        image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        out = np.ndarray(shape[:2], dtype=np.uint8, buffer=shm.buf, offset=out_offset)
+
+        if engine == 'fused':
+            utils.process_pipeline_fused(image, out=out)
+        else:
+            out[...] = utils.process_pipeline(image, engine)
+
+        if save_flag:
+            output_path = os.path.join(output_folder, os.path.basename(input_path))
+            utils.save_image(out, output_path)
+
+        return (True, f"Processed {os.path.basename(input_path)}")
+
+    except Exception as e:
+        return (False, str(e))
+    finally:
+        tracing.flush()
+
+# --- DISPATCH ---
+
+def run(task_list, submit, num_slabs, loader_threads=2, on_result=None,
+        schedule='default', cost_model='size', writer=None):
+    """
+    Runs task_list through a process pool using shared-memory slabs.
+
+    Args:
+        task_list (list): task_args tuples (input_path, output_folder, save_flag[, engine[, cache_dir]]).
+        submit (callable): submit(fn, arg) -> callable returning fn(arg)'s result
+                           (blocks until the worker is done).
+        num_slabs (int): Slabs in the pool, i.e. the maximum number of frames in flight.
+        loader_threads (int): Threads decoding frames in the parent.
+        on_result (callable): Optional on_result(input_path, edge_map_view), called
+                              in the parent before the slab is recycled.
+        schedule (str): 'lpt' feeds the most expensive frames first; results are
+                        still returned in task_list order.
+        cost_model (str): Cost estimate used by 'lpt'.
+        writer (AsyncWriter): Optional; edge maps are copied out of the slab and
+                              saved by the writer instead of by the workers.
+    """
+    if writer is not None:
+        # Workers skip saving; the parent copies the edge map out for the writer
+        out_paths = {task[0]: output_writer.output_path_for(task) for task in task_list if task[2]}
+        task_list = [task[:2] + (False,) + task[3:] for task in task_list]
+        user_on_result = on_result
+
+        def on_result(path, view):
+            if path in out_paths:
+                writer.submit(view.copy(), out_paths[path])
+            if user_on_result is not None:
+                user_on_result(path, view)
+
+    if schedule == 'lpt':
+        order, _ = scheduler.lpt_order(task_list, cost_model)
+        ordered = run([task_list[i] for i in order], submit, num_slabs, loader_threads, on_result)
+        results = [None] * len(task_list)
+        for i, res in zip(order, ordered):
+            results[i] = res
+        return results
+
+    results = []
+    pending = collections.deque()
+
+    def finish_oldest(pool):
+        idx, shm, shape, path, wait = pending.popleft()
+        status = wait()
+        if idx is not None:
+            if status[0] and on_result is not None:
+                out_offset, _ = slab_layout(shape)
+                on_result(path, np.ndarray(shape[:2], dtype=np.uint8, buffer=shm.buf, offset=out_offset))
+            pool.release(idx)
+        results.append(status)
+
+    with SlabPool(num_slabs) as pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=loader_threads) as loader:
+        # Decode ahead by at most num_slabs frames
+        decode_q = collections.deque()
+        task_iter = iter(task_list)
+
+        def fill_decode_queue():
+            while len(decode_q) < num_slabs:
+                task = next(task_iter, None)
+                if task is None:
+                    return
+                cache_dir = task[4] if len(task) > 4 else None
+                decode_q.append((task, loader.submit(utils.load_frame, task[0], cache_dir)))
+
+        fill_decode_queue()
+        while decode_q:
+            task, decoded = decode_q.popleft()
+            fill_decode_queue()
+            input_path, output_folder, save_flag = task[:3]
+            engine = task[3] if len(task) > 3 else 'reference'
+
+            image = decoded.result()
+            if image is None:
+                # Queued (not returned) so results stay in task order
+                status = (False, f"Failed to load {input_path}")
+                pending.append((None, None, None, input_path, lambda s=status: s))
+                continue
+
+            while not pool.free:
+                finish_oldest(pool)
+
+            shape = image.shape
+            _, total = slab_layout(shape)
+            idx, shm = pool.acquire(total)
+            np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)[...] = image
+            del image
+
+            handle = (shm.name, pool.generation, shape, input_path, output_folder, save_flag, engine)
+            pending.append((idx, shm, shape, input_path, submit(shm_worker_task, handle)))
+
+        while pending:
+            finish_oldest(pool)
+
+    return results
@@ -0,0 +1,139 @@
+"""
+Startup Cost (Lazy Imports, Start Methods, Forkserver Preload)
+Measures and reduces what a run pays before the first image is processed.
+
+Under the spawn and forkserver start methods every pool child re-imports
+the parent's __main__ module (main.py) and, through utils, cv2 and NumPy.
+That import time lands inside every MP / CF_Proc timing and in CLI startup.
+main.py therefore imports matplotlib only when it plots. The forkserver
+start method with PRELOAD imports __main__ and utils once in the fork
+server, so every new worker is a fork of an already-initialized process.
+
+Fork-server children inherit the environment the server started with, not
+the parent's current one, while this repo hands settings to workers through
+CST435_* variables that change between runs (cv2 threads, journal). Under
+forkserver, workers are therefore SettingsProcess instances: they carry the
+parent's CST435_* values from start() and re-apply them in the child.
+
+    python3 startup.py --workers 4          # import times + worker startup per start method
+    python3 main.py --start-method forkserver --startup-report ...
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+START_METHODS = ('fork', 'spawn', 'forkserver')
+PRELOAD = ['__main__', 'utils']  # utils pulls in cv2 and NumPy
+IMPORT_MODULES = ('numpy', 'cv2', 'matplotlib.pyplot', 'utils', 'main')
+ENV_PREFIX = 'CST435_'
+ENV_MODULES = ('utils', 'tracing', 'result_cache')  # read CST435_* settings at import time
+
+def current_settings():
+    return {k: v for k, v in os.environ.items() if k.startswith(ENV_PREFIX)}
+
+class SettingsProcess(multiprocessing.context.ForkServerProcess):
+    """Fork-server process that runs with the parent's CST435_* settings as of start()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._settings = current_settings()
+
+    def run(self):
+        if self._settings != current_settings():
+            for key in current_settings():
+                del os.environ[key]
+            os.environ.update(self._settings)
+            # Modules preloaded in the fork server saw the server's settings
+            for name in ENV_MODULES:
+                if name in sys.modules:
+                    importlib.reload(sys.modules[name])
+        super().run()
+
+def configure(method):
+    """Sets the start method for every pool created afterwards (None = platform default)."""
+    if method is None:
+        return
+    if method not in multiprocessing.get_all_start_methods():
+        print(f"Warning: start method '{method}' is not available here, using '{multiprocessing.get_start_method()}'")
+        return
+    multiprocessing.set_start_method(method, force=True)
+    if method == 'forkserver':
+        multiprocessing.set_forkserver_preload(PRELOAD)
+        multiprocessing.get_context('forkserver').Process = SettingsProcess
+
+# --- IMPORT TIMES ---
+
+def import_seconds(module):
+    """Cold import time of one module in a fresh interpreter (None if it fails to import)."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        out = subprocess.run([sys.executable, '-c', code], cwd=here, capture_output=True, text=True, check=True)
+        return float(out.stdout.strip().splitlines()[-1])
+    except (subprocess.CalledProcessError, ValueError, IndexError):
+        return None
+
+# --- WORKER STARTUP ---
+
+def _ready(queue):
+    """Child: what a pool initializer does, then report in."""
+    import utils
+    utils.init_cv2_threads()
+    queue.put(os.getpid())
+
+def worker_startup_seconds(method, num_workers):
+    """Seconds until num_workers fresh children of this start method have imported utils."""
+    ctx = multiprocessing.get_context(method)
+    queue = ctx.SimpleQueue()
+    start = time.perf_counter()
+    procs = [ctx.Process(target=_ready, args=(queue,), daemon=True) for _ in range(num_workers)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        queue.get()
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return elapsed
+
+def measure(num_workers, methods=None, modules=IMPORT_MODULES):
+    """
+    Returns {'imports': {module: s}, 'workers': {method: {'first': s, 'next': s}}}.
+    'first' includes one-off costs (starting the fork server); 'next' is a second
+    batch of num_workers children, the cost every later pool pays.
+    """
+    methods = [m for m in (methods or START_METHODS) if m in multiprocessing.get_all_start_methods()]
+    if 'forkserver' in methods:
+        multiprocessing.set_forkserver_preload(PRELOAD)
+    return {
+        'imports': {m: import_seconds(m) for m in modules},
+        'workers': {m: {'first': worker_startup_seconds(m, num_workers), 'next': worker_startup_seconds(m, num_workers)}
+                    for m in methods},
+        'num_workers': num_workers,
+        'start_method': multiprocessing.get_start_method(),
+    }
+
+def print_report(report):
+    ms = lambda v: '-' if v is None else f"{v * 1000:.0f}"
+    print("Startup cost")
+    print("  Cold imports (ms): " + ", ".join(f"{m} {ms(s)}" for m, s in report['imports'].items()))
+    print(f"  {report['num_workers']} workers ready (ms), first / next pool:")
+    for method, t in report['workers'].items():
+        current = "  <- in use" if method == report['start_method'] else ""
+        print(f"    {method:<11} {ms(t['first']):>6} / {ms(t['next']):<6}{current}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Import and worker startup times per start method')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--methods', nargs='+', choices=START_METHODS, default=None)
+    args = parser.parse_args()
+    print_report(measure(args.workers, args.methods))
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,255 @@
+"""
+Straggler Control (Deadlines, Speculation, Quarantine)
+Bounds the tail latency of a run by policy instead of by its worst file.
+
+pool.map / executor.map wait for every task, so one file that hangs inside
+cv2.imread or a filter stalls the whole run, and a hung pool worker cannot
+be killed without breaking the pool. Here a supervisor owns its worker
+processes, each with a private pipe. The supervisor always knows which
+task every worker runs and since when.
+
+    * Deadlines:    a task running longer than task_timeout has its worker
+                    killed and replaced, and the task is retried.
+    * Speculation:  once the queue is empty, idle workers re-run the slowest
+                    running tasks (elapsed > speculate x median task time),
+                    at most once per attempt. The first result wins and the
+                    loser is ignored.
+    * Quarantine:   a task that times out or crashes its worker max_attempts
+                    times is failed and appended to a quarantine file keyed
+                    by path, mtime and size. Later runs skip those inputs
+                    immediately until the file changes. An attempt is one
+                    scheduling of the task: it fails once its last running
+                    copy fails, so a speculative copy is not a retry.
+"""
+
+import collections
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from multiprocessing.connection import wait
+import frame_cache
+import utils
+
+POLL_INTERVAL = 0.05
+MIN_SPECULATE_SECONDS = 0.5  # never duplicate tasks younger than this
+
+class Policy(collections.namedtuple('Policy', 'task_timeout speculate max_attempts quarantine_path')):
+    """
+    task_timeout:    seconds before a task's worker is killed (None = no deadline)
+    speculate:       duplicate running tasks slower than this x median task time (None = off)
+    max_attempts:    failed attempts (all copies timed out/crashed) before an input is quarantined
+    quarantine_path: JSON-lines file of quarantined inputs (None = not persisted)
+    """
+    __slots__ = ()
+
+    def __new__(cls, task_timeout=None, speculate=None, max_attempts=2, quarantine_path=None):
+        return super().__new__(cls, task_timeout, speculate, max_attempts, quarantine_path)
+
+# --- QUARANTINE FILE ---
+
+def load_quarantine(path):
+    """Returns {cache_key: reason} of inputs quarantined by earlier runs."""
+    entries = {}
+    if not path or not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry['key']] = entry['reason']
+    return entries
+
+def add_quarantine(path, input_path, reason):
+    if not path:
+        return
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps({'key': frame_cache.cache_key(input_path), 'path': input_path, 'reason': reason,
+                            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}) + "\n")
+
+# --- WORKER SIDE ---
+
+def worker_main(conn):
+    """Runs (task_index, task_args) messages until it receives None."""
+    utils.init_cv2_threads()
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg is None:
+            return
+        i, task = msg
+        conn.send((i, utils.worker_task(task)))
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=worker_main, args=(child,), daemon=True)
+        self.proc.start()
+        child.close()
+        self.task = None      # index of the running task
+        self.started = None
+
+    def assign(self, i, task):
+        self.conn.send((i, task))
+        self.task, self.started = i, time.perf_counter()
+
+    def kill(self):
+        self.proc.kill()
+        self.proc.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.proc.join(timeout=1)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+        self.conn.close()
+
+# --- SUPERVISOR ---
+
+def run(task_list, num_workers, policy, report=None):
+    """
+    Executes tasks on supervised worker processes under a Policy.
+    Returns results in task order; report (dict) gets the policy counters.
+    """
+    ctx = multiprocessing.get_context()
+    stats = {'timeouts': 0, 'crashes': 0, 'restarts': 0, 'speculative': 0,
+             'speculative_wins': 0, 'quarantined': 0, 'skipped': 0}
+    results = [None] * len(task_list)
+    attempts = collections.Counter()
+    durations = []
+    running = collections.defaultdict(list)  # task index -> workers running it
+    speculated = set()  # tasks whose current attempt already has a speculative copy
+
+    known_bad = load_quarantine(policy.quarantine_path)
+    pending = collections.deque()
+    for i, task in enumerate(task_list):
+        reason = known_bad.get(frame_cache.cache_key(task[0]))
+        if reason:
+            results[i] = (False, f"Quarantined: {reason}")
+            stats['skipped'] += 1
+        else:
+            pending.append(i)
+    remaining = len(pending)
+
+    workers = [_Worker(ctx) for _ in range(min(num_workers, remaining) or 0)]
+
+    def release(worker):
+        running[worker.task].remove(worker)
+        if not running[worker.task]:
+            del running[worker.task]
+        worker.task = worker.started = None
+
+    def replace(worker):
+        release(worker)
+        worker.kill()
+        workers[workers.index(worker)] = _Worker(ctx)
+        stats['restarts'] += 1
+
+    def fail(worker, kind):
+        """Worker timed out or died: replace it and retry or quarantine its task."""
+        nonlocal remaining
+        i = worker.task
+        replace(worker)
+        stats[kind] += 1
+        if results[i] is not None:
+            return  # a speculative copy already finished it
+        if i in running:
+            return  # another copy of this attempt is still running
+        attempts[i] += 1
+        speculated.discard(i)
+        if attempts[i] >= policy.max_attempts:
+            reason = f"{'timed out' if kind == 'timeouts' else 'crashed worker'} {attempts[i]}x"
+            results[i] = (False, f"Quarantined: {reason}")
+            add_quarantine(policy.quarantine_path, task_list[i][0], reason)
+            stats['quarantined'] += 1
+            remaining -= 1
+        else:
+            pending.appendleft(i)
+
+    try:
+        while remaining:
+            # 1. Hand out work; speculate on stragglers once the queue is dry
+            for worker in workers:
+                if worker.task is not None:
+                    continue
+                while pending and results[pending[0]] is not None:
+                    pending.popleft()
+                if pending:
+                    i = pending.popleft()
+                    worker.assign(i, task_list[i])
+                    running[i].append(worker)
+                elif policy.speculate and durations:
+                    i = _straggler(running, durations, policy.speculate, speculated)
+                    if i is not None:
+                        worker.assign(i, task_list[i])
+                        running[i].append(worker)
+                        speculated.add(i)
+                        stats['speculative'] += 1
+
+            # 2. Collect finished tasks
+            busy = {w.conn: w for w in workers if w.task is not None}
+            for conn in wait(list(busy), timeout=POLL_INTERVAL):
+                worker = busy[conn]
+                try:
+                    i, status = conn.recv()
+                except (EOFError, OSError):
+                    fail(worker, 'crashes')
+                    continue
+                elapsed = time.perf_counter() - worker.started
+                first_copy = running[i][0] is worker
+                release(worker)
+                if results[i] is None:
+                    results[i] = status
+                    durations.append(elapsed)
+                    remaining -= 1
+                    if not first_copy:
+                        stats['speculative_wins'] += 1
+
+            # 3. Enforce deadlines (and notice workers that died without a pipe error)
+            now = time.perf_counter()
+            for worker in list(workers):
+                if worker.task is None:
+                    continue
+                if policy.task_timeout and now - worker.started > policy.task_timeout:
+                    fail(worker, 'timeouts')
+                elif not worker.proc.is_alive() and not worker.conn.poll():
+                    fail(worker, 'crashes')
+    finally:
+        for worker in workers:
+            if worker.task is not None:
+                worker.kill()  # losing speculative copy or abandoned task
+            else:
+                worker.stop()
+
+    if report is not None:
+        report.update(stats)
+    return results
+
+def _straggler(running, durations, factor, speculated):
+    """Running task (not yet duplicated in this attempt) that is slowest relative to the median, or None."""
+    threshold = max(factor * statistics.median(durations), MIN_SPECULATE_SECONDS)
+    now = time.perf_counter()
+    best, best_elapsed = None, threshold
+    for i, copies in running.items():
+        if i in speculated:
+            continue
+        elapsed = now - copies[0].started
+        if elapsed > best_elapsed:
+            best, best_elapsed = i, elapsed
+    return best
+
+def print_report(stats):
+    print("Straggler policy: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
@@ -0,0 +1,203 @@
+"""
+Resource Telemetry
+Background /proc sampler that explains a benchmark row's efficiency.
+
+While a method runs, a thread in the parent samples every INTERVAL seconds:
+
+    * per-core CPU utilization and iowait      (/proc/stat)
+    * RSS summed over this process and all of
+      its descendants (the pool children)      (/proc/<pid>/status)
+    * voluntary / involuntary context switches (/proc/<pid>/task/*/status)
+    * disk read / write bytes                  (/proc/<pid>/io)
+
+Counters are reported as deltas over the run (processes that already
+existed, e.g. warm pools, are baselined at start). Low CPU with high iowait
+points at I/O, low CPU with many voluntary switches at starvation on locks
+or queues, high involuntary switches at oversubscription, and a climbing
+RSS at memory pressure. Linux only; elsewhere summaries are empty.
+"""
+
+import os
+import resource
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.1
+
+def available():
+    return os.path.exists('/proc/stat')
+
+# --- /PROC READERS ---
+
+def read_cpu_times():
+    """{'cpu0': (busy, idle, iowait), ...} in jiffies."""
+    cores = {}
+    with open('/proc/stat') as f:
+        for line in f:
+            if not line.startswith('cpu') or line.startswith('cpu '):
+                continue
+            name, *values = line.split()
+            values = [int(v) for v in values[:8]]
+            idle, iowait = values[3], values[4]
+            cores[name] = (sum(values) - idle - iowait, idle, iowait)
+    return cores
+
+def descendants(root):
+    """root plus every live descendant pid."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat[stat.rfind(')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+def _status_fields(path, fields):
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in fields:
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+def read_process(pid):
+    """(rss_kb, voluntary, involuntary, read_bytes, write_bytes) for one process, or None if gone."""
+    status = _status_fields(f'/proc/{pid}/status', ('VmRSS',))
+    if not status and not os.path.exists(f'/proc/{pid}'):
+        return None
+    voluntary = involuntary = 0
+    if pid == os.getpid():
+        # getrusage also counts threads that already exited (CF_Thread pools)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        voluntary, involuntary = usage.ru_nvcsw, usage.ru_nivcsw
+    else:
+        try:
+            tids = os.listdir(f'/proc/{pid}/task')
+        except OSError:
+            tids = []
+        for tid in tids:
+            ctx = _status_fields(f'/proc/{pid}/task/{tid}/status',
+                                 ('voluntary_ctxt_switches', 'nonvoluntary_ctxt_switches'))
+            voluntary += ctx.get('voluntary_ctxt_switches', 0)
+            involuntary += ctx.get('nonvoluntary_ctxt_switches', 0)
+    io = _status_fields(f'/proc/{pid}/io', ('read_bytes', 'write_bytes'))
+    return (status.get('VmRSS', 0), voluntary, involuntary, io.get('read_bytes', 0), io.get('write_bytes', 0))
+
+# --- SAMPLER ---
+
+class Sampler:
+    """
+    Context manager sampling the process tree of the current process.
+
+        with telemetry.Sampler() as sampler:
+            run()
+        summary = sampler.summary()
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.enabled = available()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.rss_samples = []
+        self.baseline = {}   # pid -> counters at start
+        self.latest = {}     # pid -> last counters seen (kept after the process exits)
+
+    def _sample(self):
+        rss = 0
+        for pid in descendants(os.getpid()):
+            counters = read_process(pid)
+            if counters is None:
+                continue
+            rss += counters[0]
+            self.latest[pid] = counters
+        self.rss_samples.append(rss)
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if not self.enabled:
+            return self
+        self.cpu_start = read_cpu_times()
+        self.time_start = time.perf_counter()
+        for pid in descendants(os.getpid()):
+            counters = read_process(pid)
+            if counters is not None:
+                self.baseline[pid] = counters
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if not self.enabled or self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self._sample()
+        self.cpu_end = read_cpu_times()
+        self.duration = time.perf_counter() - self.time_start
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def summary(self):
+        """Per-run numbers attached to a timing row (empty dict when unavailable)."""
+        if not self.enabled or self.thread is None:
+            return {}
+        per_core, iowait, total = [], 0, 0
+        for core, (busy, idle, wait) in self.cpu_end.items():
+            b0, i0, w0 = self.cpu_start.get(core, (0, 0, 0))
+            d_busy, d_idle, d_wait = busy - b0, idle - i0, wait - w0
+            d_total = d_busy + d_idle + d_wait
+            per_core.append(100.0 * d_busy / d_total if d_total else 0.0)
+            iowait += d_wait
+            total += d_total
+
+        deltas = [0, 0, 0, 0]
+        for pid, counters in self.latest.items():
+            base = self.baseline.get(pid, (0, 0, 0, 0, 0))
+            for k in range(4):
+                deltas[k] += max(counters[k + 1] - base[k + 1], 0)
+
+        rss = self.rss_samples or [0]
+        return {
+            'duration': self.duration,
+            'cpu_util': sum(per_core) / len(per_core) if per_core else 0.0,
+            'per_core': per_core,
+            'iowait': 100.0 * iowait / total if total else 0.0,
+            'rss_peak_mb': max(rss) / 1024,
+            'rss_mean_mb': sum(rss) / len(rss) / 1024,
+            'ctx_voluntary': deltas[0],
+            'ctx_involuntary': deltas[1],
+            'read_mb': deltas[2] / 1024 ** 2,
+            'write_mb': deltas[3] / 1024 ** 2,
+            'samples': len(self.rss_samples),
+        }
+
+def median(summaries, key):
+    """Median of one telemetry field over a list of run summaries (None if there are none)."""
+    values = sorted(s[key] for s in summaries if s)
+    if not values:
+        return None
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
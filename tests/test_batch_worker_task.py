@@ -0,0 +1,69 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import utils
+
+
+def make_frames(tmp_path, count):
+    rng = np.random.default_rng(0)
+    paths = []
+    for k in range(count):
+        path = str(tmp_path / f"frame{k}.png")
+        cv2.imwrite(path, rng.integers(0, 256, (40, 48, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def record_calls(monkeypatch):
+    calls = []
+    real_batch, real_pipeline = utils.process_batch, utils.process_pipeline
+
+    def process_batch(images):
+        calls.append(('batch', len(images)))
+        return real_batch(images)
+
+    def process_pipeline(image, engine='reference'):
+        calls.append(('pipeline', engine))
+        return real_pipeline(image, engine)
+
+    monkeypatch.setattr(utils, 'process_batch', process_batch)
+    monkeypatch.setattr(utils, 'process_pipeline', process_pipeline)
+    return calls
+
+
+def test_batchable_engine_runs_as_one_stack(tmp_path, monkeypatch):
+    calls = record_calls(monkeypatch)
+    batch = [(i, (p, str(tmp_path), False, 'fused')) for i, p in enumerate(make_frames(tmp_path, 3))]
+    results = utils.batch_worker_task(batch)
+    assert all(ok for _, (ok, _) in results)
+    assert calls == [('batch', 3)]
+
+
+def test_other_engines_run_per_frame_with_their_engine(tmp_path, monkeypatch):
+    calls = record_calls(monkeypatch)
+    batch = [(i, (p, str(tmp_path), False, 'planned')) for i, p in enumerate(make_frames(tmp_path, 3))]
+    results = utils.batch_worker_task(batch)
+    assert sorted(i for i, _ in results) == [0, 1, 2]
+    assert all(ok for _, (ok, _) in results)
+    assert [c for c in calls if c[0] == 'batch'] == []
+    assert calls.count(('pipeline', 'planned')) == 3
+
+
+def test_sobel_precision_is_honored_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'SOBEL_PRECISION', 'int16_l1')
+    paths = make_frames(tmp_path, 3)
+    expected = [utils.process_pipeline(cv2.imread(p), 'reference') for p in paths]
+    saved = []
+    monkeypatch.setattr(utils, 'save_image', lambda image, path: saved.append((path, image)) or True)
+
+    batch = [(i, (p, str(tmp_path / 'out'), True, 'reference')) for i, p in enumerate(paths)]
+    results = utils.batch_worker_task(batch)
+
+    assert all(ok for _, (ok, _) in results)
+    outputs = dict(saved)
+    for p, edge_map in zip(paths, expected):
+        np.testing.assert_array_equal(outputs[str(tmp_path / 'out' / os.path.basename(p))], edge_map)
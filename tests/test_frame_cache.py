@@ -0,0 +1,35 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import frame_cache
+
+
+def make_frames(tmp_path, count):
+    paths = []
+    for k in range(count):
+        path = str(tmp_path / f"frame{k}.png")
+        cv2.imwrite(path, np.full((32, 32, 3), k, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_smaller_cap_shrinks_an_existing_store(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    frame_bytes = frame_cache._aligned(32 * 32 * 3)
+    paths = make_frames(tmp_path, 4)
+    frame_cache.FrameCache(cache_dir, max_bytes=4 * frame_bytes).populate(paths)
+
+    cache = frame_cache.FrameCache(cache_dir, max_bytes=2 * frame_bytes)
+    assert cache.max_bytes == 2 * frame_bytes
+    assert os.path.getsize(os.path.join(cache_dir, frame_cache.DATA_FILE)) == 2 * frame_bytes
+    assert cache.size_bytes() == 2 * frame_bytes
+    assert [cache.get(p) is not None for p in paths] == [True, True, False, False]
+    assert (cache.get(paths[1]) == 1).all()
+
+    # Workers see the trimmed index
+    reader = frame_cache.FrameCache(cache_dir, readonly=True)
+    assert [reader.get(p) is not None for p in paths] == [True, True, False, False]
@@ -0,0 +1,39 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import method_dist
+import utils
+
+
+def test_disconnected_worker_is_not_counted_dead():
+    images = os.path.join(os.path.dirname(__file__), '..', 'images')
+    tasks = [(p, 'output', False) for p in utils.get_image_paths(images, limit=2)]
+    coordinator = method_dist.Coordinator(tasks, heartbeat_timeout=0.2)
+    coordinator.start()
+    try:
+        worker = threading.Thread(target=method_dist.worker_main, args=(coordinator.address,))
+        worker.start()
+        assert coordinator.wait(timeout=30)
+        worker.join(timeout=10)
+        time.sleep(0.2)
+        assert coordinator.last_seen == {}
+        time.sleep(0.5)  # several reaper passes
+        assert coordinator.stats['dead'] == 0
+    finally:
+        coordinator.stop()
+
+
+def test_non_loopback_bind_needs_a_key(monkeypatch):
+    monkeypatch.delenv(method_dist.KEY_ENV, raising=False)
+    method_dist.check_bind(('127.0.0.1', 0))
+    method_dist.check_bind(('localhost', 0))
+    for host in ('0.0.0.0', '', '10.0.0.5', 'node1'):
+        with pytest.raises(ValueError):
+            method_dist.check_bind((host, 0))
+    monkeypatch.setenv(method_dist.KEY_ENV, 'secret')
+    method_dist.check_bind(('0.0.0.0', 0))
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import utils
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_jpeg_and_png_sizes(tmp_path):
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    for ext in ('.jpg', '.png'):
+        path = str(tmp_path / f"frame{ext}")
+        cv2.imwrite(path, image)
+        assert utils.read_image_size(path) == (64, 48)
+
+
+def test_truncated_jpeg_returns_none(tmp_path):
+    # SOI + EOI only: the length read hits EOF (used to loop forever)
+    assert utils.read_image_size(write(tmp_path, "eoi.jpg", b'\xff\xd8\xff\xd9')) is None
+
+
+def test_jpeg_cut_inside_header_returns_none(tmp_path):
+    ok, encoded = cv2.imencode('.jpg', np.zeros((48, 64, 3), dtype=np.uint8))
+    data = encoded.tobytes()
+    for cut in (5, 20, 100):
+        assert utils.read_image_size(write(tmp_path, f"cut{cut}.jpg", data[:cut])) is None
+
+
+def test_jpeg_bogus_segment_length_returns_none(tmp_path):
+    # APP0 segment with length 0 would make the walker seek backwards
+    assert utils.read_image_size(write(tmp_path, "zero.jpg", b'\xff\xd8\xff\xe0\x00\x00' + b'\x00' * 16)) is None
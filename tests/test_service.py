@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import service
+
+
+def encode(height, width):
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[::7] = 255
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_killed_worker_does_not_leak_in_flight_slots():
+    pool = multiprocessing.Pool(1)
+    batcher = service.Batcher(pool, 1, max_batch=8, max_wait_ms=200, batch_timeout=2.0)
+    try:
+        # One slow batch (several seconds of work), then kill its worker mid-batch
+        big = encode(3000, 3000)
+        futures = [batcher.submit(big, 'reference', '.png') for _ in range(8)]
+        wait_for(lambda: batcher.snapshot().get('batches') == 1)
+        time.sleep(0.3)
+        os.kill(pool._pool[0].pid, signal.SIGKILL)
+
+        for future in futures:
+            ok, error = future.result(timeout=10)
+            assert not ok and 'timed out' in error
+        assert batcher.snapshot()['timed_out_batches'] == 1
+
+        # Both slots are free again and the replacement worker serves requests
+        small = encode(32, 32)
+        for _ in range(3):
+            ok, data = batcher.submit(small, 'reference', '.png').result(timeout=10)
+            assert ok and data.startswith(b'\x89PNG')
+        assert batcher.in_flight.acquire(blocking=False)
+        assert batcher.in_flight.acquire(blocking=False)
+    finally:
+        batcher.stop()
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,72 @@
+import importlib
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import compare_engines
+import utils
+
+IMAGES = os.path.join(os.path.dirname(__file__), '..', 'images')
+# Lowest PSNR (dB) against float64 on the sample images, with some margin
+MIN_PSNR = {'float32': 70.0, 'int16': 45.0, 'int16_l1': 20.0}
+
+
+@pytest.fixture(scope='module')
+def sobel_inputs():
+    images = [cv2.imread(p) for p in utils.get_image_paths(IMAGES, limit=6)]
+    return compare_engines.sobel_inputs(images)
+
+
+def original_sobel(gray):
+    """apply_sobel_edge_detection before precision modes existed."""
+    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+    magnitude = np.sqrt(sobelx**2 + sobely**2)
+    return cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+
+
+def test_float64_matches_the_original_output(sobel_inputs):
+    for gray in sobel_inputs:
+        np.testing.assert_array_equal(utils.apply_sobel_edge_detection(gray, 'float64'), original_sobel(gray))
+
+
+@pytest.mark.parametrize('precision', sorted(MIN_PSNR))
+def test_reduced_precisions_stay_close_to_float64(sobel_inputs, precision):
+    for gray in sobel_inputs:
+        output = utils.apply_sobel_edge_detection(gray, precision)
+        assert output.dtype == np.uint8 and output.shape == gray.shape
+        assert compare_engines.psnr(original_sobel(gray), output) >= MIN_PSNR[precision]
+
+
+def test_explicit_precision_overrides_the_module_default(sobel_inputs, monkeypatch):
+    gray = sobel_inputs[0]
+    monkeypatch.setattr(utils, 'SOBEL_PRECISION', 'int16_l1')
+    approx = utils.apply_sobel_edge_detection(gray, 'int16_l1')
+    assert not np.array_equal(approx, original_sobel(gray))
+    np.testing.assert_array_equal(utils.apply_sobel_edge_detection(gray), approx)
+    np.testing.assert_array_equal(utils.apply_sobel_edge_detection(gray, 'float64'), original_sobel(gray))
+
+
+def test_engine_sobel_precision(monkeypatch):
+    monkeypatch.setattr(utils, 'SOBEL_PRECISION', 'int16')
+    assert utils.engine_sobel_precision('reference') == 'int16'
+    assert utils.engine_sobel_precision('planned', 'exact') == 'int16'
+    assert utils.engine_sobel_precision('planned', 'reorder') == 'int16'
+    assert utils.engine_sobel_precision('planned', 'fuse') == 'float64'
+    assert utils.engine_sobel_precision('fused') == 'float64'
+    assert utils.engine_sobel_precision('tiled') == 'float64'
+
+
+def test_unknown_precision_in_environment_falls_back_to_float64(monkeypatch, capsys):
+    monkeypatch.setenv(utils.SOBEL_PRECISION_ENV, 'int16l1')
+    try:
+        importlib.reload(utils)
+        assert utils.SOBEL_PRECISION == 'float64'
+        assert 'int16l1' in capsys.readouterr().out
+    finally:
+        monkeypatch.delenv(utils.SOBEL_PRECISION_ENV)
+        importlib.reload(utils)
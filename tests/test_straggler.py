@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import straggler
+import utils
+
+
+def test_speculative_copy_is_not_a_retry(tmp_path):
+    # Reading a FIFO without a writer blocks forever, like a hung decode
+    hang = str(tmp_path / 'hang.jpg')
+    os.mkfifo(hang)
+    images = os.path.join(os.path.dirname(__file__), '..', 'images')
+    tasks = [(hang, str(tmp_path), False)] + [(p, str(tmp_path), False)
+                                               for p in utils.get_image_paths(images, limit=3)]
+    policy = straggler.Policy(task_timeout=1.5, speculate=1.0, max_attempts=2)
+    report = {}
+
+    results = straggler.run(tasks, 2, policy, report)
+
+    assert results[0] == (False, "Quarantined: timed out 2x")
+    assert all(ok for ok, _ in results[1:])
+    assert report['speculative'] >= 1
+    # Each attempt ends only when its last copy times out
+    assert report['timeouts'] > policy.max_attempts
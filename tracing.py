@@ -0,0 +1,180 @@
+"""
+Tracing
+Optional per-task and per-stage timing with Chrome trace-event / CSV export.
+
+When enabled, every process (pool workers included) records spans for
+decode, each filter of process_pipeline, encode and the whole task, and
+appends them to <trace_dir>/events-<pid>.jsonl after each task. The parent
+wraps every benchmark run in a 'run' span; export() merges all files,
+derives queue wait (run dispatch -> task start) and idle gaps per worker,
+and writes trace.json (load in chrome://tracing or Perfetto) and trace.csv.
+
+When disabled, span() returns a shared no-op context manager, so the cost
+is one function call and a flag check per instrumented stage.
+"""
+
+import csv
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+ENV_VAR = "CST435_TRACE_DIR"
+
+# Inherited by pool children through the environment (fork and spawn)
+TRACE_DIR = os.environ.get(ENV_VAR)
+ENABLED = bool(TRACE_DIR)
+
+_events = []
+_lock = threading.Lock()
+
+def _reset_after_fork():
+    # A forked worker must not re-flush events buffered by its parent
+    global _events, _lock
+    _events = []
+    _lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class _Span:
+    __slots__ = ('name', 'cat', 'args', 'start')
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _events.append((self.name, self.cat, os.getpid(), threading.get_ident(),
+                        self.start, end - self.start, self.args))
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+_NOOP = _NoopSpan()
+
+def span(name, cat='stage', args=None):
+    """Context manager timing one stage. No-op unless tracing is enabled."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, cat, args)
+
+def enable(trace_dir):
+    """Turns tracing on for this process and every worker started afterwards."""
+    global TRACE_DIR, ENABLED
+    os.makedirs(trace_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(trace_dir, "events-*.jsonl")):
+        os.remove(old)
+    os.environ[ENV_VAR] = trace_dir
+    TRACE_DIR = trace_dir
+    ENABLED = True
+
+def flush():
+    """Appends this process's buffered events to its events file."""
+    global _events
+    if not ENABLED or not _events:
+        return
+    with _lock:
+        events, _events = _events, []
+        with open(os.path.join(TRACE_DIR, f"events-{os.getpid()}.jsonl"), 'a') as f:
+            for e in events:
+                f.write(json.dumps(e) + "\n")
+
+# --- EXPORT ---
+
+def load_events(trace_dir):
+    events = []
+    for path in glob.glob(os.path.join(trace_dir, "events-*.jsonl")):
+        with open(path) as f:
+            events.extend(tuple(json.loads(line)) for line in f if line.strip())
+    return sorted(events, key=lambda e: e[4])
+
+def derive_waits(events):
+    """
+    Adds a 'queue_wait' span from the start of the enclosing run (when the
+    parent dispatched the tasks) to the start of every task.
+    """
+    runs = [e for e in events if e[1] == 'run']
+    waits = []
+    for e in events:
+        if e[1] != 'task':
+            continue
+        for r in runs:
+            if r[4] <= e[4] <= r[4] + r[5]:
+                waits.append(('queue_wait', 'wait', e[2], e[3], r[4], e[4] - r[4], e[6]))
+                break
+    return waits
+
+def idle_gaps(events):
+    """
+    Idle time per run and worker (pid, tid): gaps between consecutive tasks
+    plus the tail from a worker's last task to the end of the run.
+    """
+    gaps = {}
+    for r in (e for e in events if e[1] == 'run'):
+        run_end = r[4] + r[5]
+        tasks = defaultdict(list)
+        for e in events:
+            if e[1] == 'task' and r[4] <= e[4] <= run_end:
+                tasks[(e[2], e[3])].append((e[4], e[4] + e[5]))
+        for worker, spans in tasks.items():
+            spans.sort()
+            gap = sum(max(b[0] - a[1], 0.0) for a, b in zip(spans, spans[1:]))
+            gaps[(r[0], r[4], worker)] = gap + max(run_end - spans[-1][1], 0.0)
+    return gaps
+
+def export(trace_dir):
+    """Merges all event files into trace.json (Chrome trace-event) and trace.csv."""
+    flush()
+    events = load_events(trace_dir)
+    events += derive_waits(events)
+    t0 = min((e[4] for e in events), default=0.0)
+
+    json_path = os.path.join(trace_dir, "trace.json")
+    with open(json_path, 'w') as f:
+        json.dump({'traceEvents': [
+            {'name': name, 'cat': cat, 'ph': 'X', 'pid': pid, 'tid': tid,
+             'ts': (start - t0) * 1e6, 'dur': dur * 1e6, 'args': args or {}}
+            for name, cat, pid, tid, start, dur, args in events
+        ], 'displayTimeUnit': 'ms'}, f)
+
+    csv_path = os.path.join(trace_dir, "trace.csv")
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'category', 'pid', 'tid', 'start_s', 'duration_s', 'task'])
+        for name, cat, pid, tid, start, dur, args in events:
+            writer.writerow([name, cat, pid, tid, f"{start - t0:.6f}", f"{dur:.6f}", (args or {}).get('path', '')])
+
+    return events, json_path, csv_path
+
+def print_summary(events):
+    """Per-stage totals (to find the hot filter) and per-worker idle gaps."""
+    totals = defaultdict(lambda: [0, 0.0])
+    for name, cat, _, _, _, dur, _ in events:
+        if cat in ('stage', 'filter', 'wait'):
+            totals[(cat, name)][0] += 1
+            totals[(cat, name)][1] += dur
+
+    print(f"\n{'Stage':<22} | {'Count':<7} | {'Total (s)':<10} | {'Mean (ms)':<10}")
+    print("-" * 58)
+    for (cat, name), (count, total) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+        print(f"{cat + ':' + name:<22} | {count:<7} | {total:<10.4f} | {total / count * 1000:<10.3f}")
+
+    gaps = idle_gaps(events)
+    if gaps:
+        print(f"Worker idle inside runs: total {sum(gaps.values()):.4f}s over {len(gaps)} worker-runs, "
+              f"worst {max(gaps.values()):.4f}s")
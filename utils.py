@@ -1,6 +1,11 @@
+import concurrent.futures
 import cv2
 import numpy as np
 import os
+import threading
+import frame_cache
+import result_cache
+import tracing
 
 # --- DATA LOADER SECTION ---
 
@@ -10,12 +15,18 @@ def get_image_paths(source_dir, limit=None):
     If the directory contains subdirectories (classes), it picks classes 
     and collects images from them up to the limit.
     """
+    return list(iter_image_paths(source_dir, limit))
+
+def iter_image_paths(source_dir, limit=None):
+    """
+    Lazy version of get_image_paths: yields the same paths in the same order
+    while scanning, so huge directories never have to be listed in memory.
+    """
     valid_extensions = ('.jpg', '.jpeg', '.png')
-    image_paths = []
     
     if not os.path.exists(source_dir):
         print(f"Warning: Source directory '{source_dir}' does not exist.")
-        return []
+        return
 
     # Get list of subdirectories (classes)
     subdirs = [f.path for f in os.scandir(source_dir) if f.is_dir()]
@@ -32,14 +43,52 @@ def get_image_paths(source_dir, limit=None):
     count = 0
     #Scans the directory (and subfolders) to collect image paths up to a specified limit.
     for folder in scan_dirs:
-        for entry in os.scandir(folder):
-            if entry.is_file() and entry.name.lower().endswith(valid_extensions):
-                image_paths.append(entry.path)
-                count += 1
-                if limit and count >= limit:
-                    return image_paths
-                
-    return image_paths
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(valid_extensions):
+                    yield entry.path
+                    count += 1
+                    if limit and count >= limit:
+                        return
+
+def read_image_size(path):
+    """
+    Reads (width, height) from a JPEG/PNG header without decoding pixels.
+    Returns None if the header cannot be parsed.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(24)
+            # PNG: 8-byte signature, IHDR chunk holds width/height
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                return int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+            if head[:2] != b'\xff\xd8':
+                return None
+            # JPEG: walk segments until a Start-Of-Frame marker
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                code = marker[1]
+                if code == 0xFF:
+                    f.seek(-1, 1)
+                    continue
+                if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+                    continue
+                raw = f.read(2)
+                length = int.from_bytes(raw, 'big')
+                # Truncated file or bogus length: seeking by length - 2 would not advance
+                if len(raw) < 2 or length < 2:
+                    return None
+                if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                    sof = f.read(5)
+                    if len(sof) < 5:
+                        return None
+                    return int.from_bytes(sof[3:5], 'big'), int.from_bytes(sof[1:3], 'big')
+                f.seek(length - 2, 1)
+    except OSError:
+        return None
 
 def load_image(path):
     """Loads an image from disk."""
@@ -53,11 +102,22 @@ def load_image(path):
         print(f"Error loading {path}: {e}")
         return None
 
+def load_frame(path, cache_dir=None):
+    """Loads a decoded frame, from the frame cache in cache_dir when possible."""
+    image = frame_cache.load_cached(path, cache_dir) if cache_dir else None
+    if image is None:
+        image = load_image(path)
+    return image
+
+_created_dirs = set()
+
 def save_image(image, output_path):
     """Saves an image to disk."""
     try:
-        if os.path.dirname(output_path):
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        folder = os.path.dirname(output_path)
+        if folder and folder not in _created_dirs:
+            os.makedirs(folder, exist_ok=True)
+            _created_dirs.add(folder)
         return cv2.imwrite(output_path, image)
     except Exception as e:
         print(f"Error saving to {output_path}: {e}")
@@ -73,16 +133,61 @@ def apply_gaussian_blur(image):
     """Filter 2: Gaussian Blur (3x3 kernel)"""
     return cv2.GaussianBlur(image, (3, 3), 0)
 
-def apply_sobel_edge_detection(image):
-    """Filter 3: Sobel Edge Detection"""
+# Sobel arithmetic: 'float64' (exact), 'float32', 'int16' (16-bit gradients,
+# rounded integer magnitude) or 'int16_l1' (|gx| + |gy| approximation).
+# Accuracy per mode: python3 compare_engines.py --sobel
+SOBEL_PRECISIONS = ('float64', 'float32', 'int16', 'int16_l1')
+SOBEL_PRECISION_ENV = "CST435_SOBEL_PRECISION"
+SOBEL_PRECISION = os.environ.get(SOBEL_PRECISION_ENV, 'float64')
+if SOBEL_PRECISION not in SOBEL_PRECISIONS:
+    print(f"Warning: {SOBEL_PRECISION_ENV}={SOBEL_PRECISION!r} is not one of {', '.join(SOBEL_PRECISIONS)}, using 'float64'")
+    SOBEL_PRECISION = 'float64'
+
+def engine_sobel_precision(engine, plan_level=None):
+    """
+    Sobel precision the engine actually runs: SOBEL_PRECISION for the reference
+    engine and the planned engine's exact/reorder plans, float64 for the rest
+    (fused, tiled and the fuse plan have their own float64 Sobel).
+    """
+    if engine == 'reference':
+        return SOBEL_PRECISION
+    if engine == 'planned':
+        import pipeline_plan
+        if (plan_level or os.environ.get(pipeline_plan.PLAN_LEVEL_ENV, 'exact')) != 'fuse':
+            return SOBEL_PRECISION
+    return 'float64'
+
+def apply_sobel_edge_detection(image, precision=None):
+    """Filter 3: Sobel Edge Detection (precision: one of SOBEL_PRECISIONS, default SOBEL_PRECISION)"""
     if len(image.shape) == 3:
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     else:
         gray = image
-    
-    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-    magnitude = np.sqrt(sobelx**2 + sobely**2)
+
+    precision = precision or SOBEL_PRECISION
+    if precision == 'float32':
+        sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+        magnitude = cv2.magnitude(sobelx, sobely, sobelx)
+    elif precision == 'int16':
+        # 3x3 Sobel of uint8 is within +/-1020, so the magnitude fits uint16
+        sobelx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3)
+        fx = sobelx.astype(np.float32)
+        cv2.magnitude(fx, sobely.astype(np.float32), fx)
+        fx += 0.5
+        magnitude = fx.astype(np.uint16)
+    elif precision == 'int16_l1':
+        # |gx| + |gy| <= 2040 fits int16: no wider temporaries at all
+        sobelx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3)
+        np.abs(sobelx, out=sobelx)
+        np.abs(sobely, out=sobely)
+        magnitude = np.add(sobelx, sobely, out=sobelx)
+    else:
+        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+        magnitude = np.sqrt(sobelx**2 + sobely**2)
     return cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
 
 def apply_sharpening(image):
@@ -103,46 +208,383 @@ def adjust_brightness(image, value=60):
     final_hsv = cv2.merge((h, s, v))
     return cv2.cvtColor(final_hsv, cv2.COLOR_HSV2BGR)
 
-def process_pipeline(image):
-    """Applies the full chain of 5 filters."""
+def process_pipeline(image, engine='reference'):
+    """
+    Applies the full chain of 5 filters.
+    engine='fused' runs the same chain through process_pipeline_fused,
+    engine='tiled' splits large frames into bands processed in parallel,
+    engine='planned' runs the optimized stage plan (see pipeline_plan.py).
+    """
     if image is None:
         return None
 
+    if engine == 'fused':
+        return process_pipeline_fused(image)
+    if engine == 'tiled':
+        return process_pipeline_tiled(image)
+    if engine == 'planned':
+        import pipeline_plan
+        return pipeline_plan.run(image)
+
     # Pipeline sequence
-    img = apply_gaussian_blur(image)
-    img = adjust_brightness(img)
-    img = apply_sharpening(img)
-    img = apply_grayscale(img)
-    final_result = apply_sobel_edge_detection(img)
+    with tracing.span('blur', 'filter'):
+        img = apply_gaussian_blur(image)
+    with tracing.span('brightness', 'filter'):
+        img = adjust_brightness(img)
+    with tracing.span('sharpen', 'filter'):
+        img = apply_sharpening(img)
+    with tracing.span('grayscale', 'filter'):
+        img = apply_grayscale(img)
+    with tracing.span('sobel', 'filter'):
+        final_result = apply_sobel_edge_detection(img)
     
     return final_result
 
+# --- FUSED ENGINE SECTION ---
+
+SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+ENGINES = ('reference', 'fused', 'tiled', 'planned')
+
+_lut_cache = {}
+_scratch = threading.local()
+
+def get_brightness_lut(value=60, channels=3):
+    """
+    Returns a cached cv2.LUT table equivalent to adjust_brightness.
+    For 3 channels the table is applied to HSV: H and S pass through, V saturates.
+    """
+    key = (value, channels)
+    if key not in _lut_cache:
+        v = np.arange(256, dtype=np.int32)
+        v_lut = np.where(v > 255 - value, 255, v + value).astype(np.uint8)
+        if channels == 1:
+            lut = v_lut.reshape(1, 256)
+        else:
+            identity = np.arange(256, dtype=np.uint8)
+            lut = np.dstack((identity, identity, v_lut)).reshape(1, 256, 3)
+        _lut_cache[key] = lut
+    return _lut_cache[key]
+
+def get_scratch_buffers(shape):
+    """
+    Returns the per-worker scratch buffers for a frame shape.
+    Buffers live in thread-local storage, so every process or thread of a
+    pool keeps its own set and reuses it while the frame shape is unchanged.
+    """
+    buffers = getattr(_scratch, 'buffers', None)
+    if buffers is None or buffers['shape'] != shape:
+        h, w = shape[:2]
+        buffers = {
+            'shape': shape,
+            'color_a': np.empty(shape, dtype=np.uint8),
+            'color_b': np.empty(shape, dtype=np.uint8),
+            'gray': np.empty((h, w), dtype=np.uint8),
+            'grad_x': np.empty((h, w), dtype=np.float64),
+            'grad_y': np.empty((h, w), dtype=np.float64),
+        }
+        _scratch.buffers = buffers
+    return buffers
+
+def process_pipeline_fused(image, out=None):
+    """
+    Allocation-free equivalent of the reference process_pipeline.
+    Brightness is a single LUT pass on the HSV frame, every intermediate is
+    written into reused scratch buffers and the gradient magnitude is
+    computed in place. Only the returned uint8 edge map is allocated
+    (or written into 'out' when given).
+    """
+    if image is None:
+        return None
+    if image.dtype != np.uint8 or not (image.ndim == 2 or image.shape[2] == 3):
+        # Layouts the fused path does not cover go through the reference chain
+        return process_pipeline(image)
+
+    gx = fused_magnitude(image)
+    with tracing.span('sobel', 'filter'):
+        if out is None:
+            out = np.empty(gx.shape, dtype=np.uint8)
+        cv2.normalize(gx, out, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+    return out
+
+def fused_magnitude(image):
+    """
+    Filters 1-5 of the fused chain up to the Sobel gradient magnitude
+    (float64, before normalization). The result lives in this worker's
+    scratch buffers and is overwritten by the next call.
+    """
+    buf = get_scratch_buffers(image.shape)
+    color_a, color_b = buf['color_a'], buf['color_b']
+    gray, gx, gy = buf['gray'], buf['grad_x'], buf['grad_y']
+
+    # 1. Blur
+    with tracing.span('blur', 'filter'):
+        cv2.GaussianBlur(image, (3, 3), 0, dst=color_a)
+
+    # 2. Brightness (LUT on V channel only)
+    with tracing.span('brightness', 'filter'):
+        if image.ndim == 2:
+            cv2.LUT(color_a, get_brightness_lut(channels=1), dst=color_b)
+        else:
+            cv2.cvtColor(color_a, cv2.COLOR_BGR2HSV, dst=color_b)
+            cv2.LUT(color_b, get_brightness_lut(channels=3), dst=color_b)
+            cv2.cvtColor(color_b, cv2.COLOR_HSV2BGR, dst=color_a)
+            color_a, color_b = color_b, color_a
+
+    # 3. Sharpen
+    with tracing.span('sharpen', 'filter'):
+        cv2.filter2D(color_b, -1, SHARPEN_KERNEL, dst=color_a)
+
+    # 4. Grayscale
+    with tracing.span('grayscale', 'filter'):
+        if image.ndim == 2:
+            gray = color_a
+        else:
+            cv2.cvtColor(color_a, cv2.COLOR_BGR2GRAY, dst=gray)
+
+    # 5. Sobel (magnitude in place inside grad_x)
+    with tracing.span('sobel', 'filter'):
+        cv2.Sobel(gray, cv2.CV_64F, 1, 0, dst=gx, ksize=3)
+        cv2.Sobel(gray, cv2.CV_64F, 0, 1, dst=gy, ksize=3)
+        np.multiply(gx, gx, out=gx)
+        np.multiply(gy, gy, out=gy)
+        np.add(gx, gy, out=gx)
+        np.sqrt(gx, out=gx)
+    return gx
+
+# --- TILED ENGINE SECTION ---
+
+# Rows of context a tile needs: blur, sharpen and Sobel are 3x3, 1 row each
+TILE_HALO = 3
+TILE_MIN_ROWS = 256
+TILE_THREADS = int(os.environ.get("CST435_TILE_THREADS", 0)) or os.cpu_count() or 1
+
+_tile_pool = None
+
+def _reset_tile_pool():
+    # A forked worker inherits the executor object but none of its threads
+    global _tile_pool
+    _tile_pool = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_tile_pool)
+
+def get_tile_pool():
+    """Per-process thread pool for tiles (cv2 and the NumPy ufuncs release the GIL)."""
+    global _tile_pool
+    if _tile_pool is None:
+        _tile_pool = concurrent.futures.ThreadPoolExecutor(max_workers=TILE_THREADS)
+    return _tile_pool
+
+def tile_bounds(height, num_tiles):
+    """Splits [0, height) into num_tiles contiguous row bands (start, end)."""
+    edges = np.linspace(0, height, num_tiles + 1).astype(int)
+    return [(int(edges[i]), int(edges[i + 1])) for i in range(num_tiles)]
+
+def _tile_pass1(image, start, end):
+    """
+    Pass 1 for one band: runs the chain on the band plus its halo and keeps the
+    gradient magnitude of the band's own rows, with one spare row for pass 2.
+    Returns (magnitude buffer, min, max).
+    """
+    lo, hi = max(start - TILE_HALO, 0), min(end + TILE_HALO, image.shape[0])
+    gx = fused_magnitude(image[lo:hi])
+    mag = np.empty((end - start + 1, image.shape[1]), dtype=np.float64)
+    mag[:-1] = gx[start - lo:end - lo]
+    lo_val, hi_val, _, _ = cv2.minMaxLoc(mag[:-1])
+    return mag, lo_val, hi_val
+
+def _tile_pass2(mag, lo_val, hi_val, out_rows):
+    """
+    Pass 2 for one band: normalizes with the global min/max. The spare row
+    holds exactly those two values, so cv2.normalize derives the same scale
+    and shift as on the whole frame and the output is bit-identical.
+    """
+    mag[-1, :] = lo_val
+    mag[-1, -1] = hi_val
+    out_rows[...] = cv2.normalize(mag, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)[:-1]
+
+def process_pipeline_tiled(image, num_tiles=None):
+    """
+    Same output as process_pipeline, computed on horizontal bands in parallel.
+    Every band is processed with a TILE_HALO-row halo so the 3x3 filters see
+    the same neighbours as on the full frame; the global min-max step of the
+    Sobel normalization is a two-pass reduction (per-band min/max, then
+    per-band normalize with the combined range). Only one float64 plane is
+    kept for the whole frame, instead of the reference chain's several.
+    """
+    if image is None:
+        return None
+    h, w = image.shape[:2]
+    if num_tiles is None:
+        num_tiles = min(TILE_THREADS, h // TILE_MIN_ROWS)
+    if (num_tiles < 2 or w < 2 or image.dtype != np.uint8
+            or not (image.ndim == 2 or image.shape[2] == 3)):
+        return process_pipeline_fused(image)
+
+    pool = get_tile_pool()
+    bounds = tile_bounds(h, num_tiles)
+    passes = list(pool.map(lambda b: _tile_pass1(image, *b), bounds))
+    lo_val = min(p[1] for p in passes)
+    hi_val = max(p[2] for p in passes)
+
+    out = np.empty((h, w), dtype=np.uint8)
+    with tracing.span('normalize', 'filter'):
+        list(pool.map(lambda i: _tile_pass2(passes[i][0], lo_val, hi_val, out[slice(*bounds[i])]),
+                      range(num_tiles)))
+    return out
+
+# --- BATCHED ENGINE SECTION ---
+
+# Reflected rows around every frame of a batch, one per 3x3 stage (as TILE_HALO)
+BATCH_PAD = 3
+
+def can_batch(engine):
+    """
+    Whether process_batch reproduces the engine's output; other frames run one by one.
+    process_batch always computes Sobel in float64, like the fused engine, so
+    the reference engine only qualifies at the default SOBEL_PRECISION.
+    """
+    return engine == 'fused' or (engine == 'reference' and SOBEL_PRECISION == 'float64')
+
+def process_batch(images):
+    """
+    process_pipeline for a list of same-shaped frames, returns one edge map per frame.
+
+    The frames are stacked into one N x H x W x C array, each padded with
+    BATCH_PAD reflected rows, and viewed as a single tall image. Blur,
+    brightness LUT, sharpen, grayscale, Sobel and the gradient magnitude then
+    run once over the whole batch instead of once per frame. The blur and
+    sharpen kernels are symmetric, so a reflected pad stays a reflection of
+    the frame after every stage and each frame sees the same border as on its
+    own. Only the min-max normalization is per frame. Output is identical to
+    the reference engine.
+    """
+    if not images:
+        return []
+    first = images[0]
+    if (len(images) == 1 or first.dtype != np.uint8 or first.shape[0] <= BATCH_PAD
+            or not (first.ndim == 2 or first.shape[2] == 3)
+            or any(img.shape != first.shape or img.dtype != first.dtype for img in images)):
+        return [process_pipeline_fused(img) for img in images]
+
+    n, h = len(images), first.shape[0]
+    padded_h = h + 2 * BATCH_PAD
+    pad = ((0, 0), (BATCH_PAD, BATCH_PAD)) + ((0, 0),) * (first.ndim - 1)
+    with tracing.span('stack', 'filter'):
+        tall = np.pad(np.stack(images), pad, mode='reflect').reshape((n * padded_h,) + first.shape[1:])
+
+    magnitude = fused_magnitude(tall).reshape(n, padded_h, -1)[:, BATCH_PAD:BATCH_PAD + h]
+    with tracing.span('sobel', 'filter'):
+        return [cv2.normalize(magnitude[i], None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U) for i in range(n)]
+
+# --- OPENCV THREADS SECTION ---
+
+CV2_THREADS_ENV = "CST435_CV2_THREADS"
+
+def set_cv2_threads(num_threads):
+    """
+    Sets OpenCV's internal thread count for this process and for workers
+    started afterwards (their pool initializer calls init_cv2_threads).
+    None restores OpenCV's default.
+    """
+    if num_threads is None:
+        os.environ.pop(CV2_THREADS_ENV, None)
+        cv2.setNumThreads(-1)
+    else:
+        os.environ[CV2_THREADS_ENV] = str(num_threads)
+        cv2.setNumThreads(num_threads)
+
+def init_cv2_threads():
+    """Pool initializer: applies the cv2 thread count chosen by the parent, if any."""
+    value = os.environ.get(CV2_THREADS_ENV)
+    if value is not None:
+        cv2.setNumThreads(int(value))
+
 # --- WORKER TASK SECTION ---
 
 def worker_task(task_args):
     """
     Top-level function for processing a single image.
-    Args: task_args (tuple): (input_path, output_folder, save_flag)
+    Args: task_args (tuple): (input_path, output_folder, save_flag[, engine[, cache_dir]])
     """
     try:
-        input_path, output_folder, save_flag = task_args
-        
-        # 1. Load
-        image = load_image(input_path)
-        if image is None:
-            return (False, f"Failed to load {input_path}")
-            
-        # 2. Process
-        processed_image = process_pipeline(image)
-        
-        # 3. Save (if flag is True)
-        if save_flag:
-            filename = os.path.basename(input_path)
-            output_path = os.path.join(output_folder, filename)
-            save_image(processed_image, output_path)
-            
+        input_path, output_folder, save_flag = task_args[:3]
+        engine = task_args[3] if len(task_args) > 3 else 'reference'
+        cache_dir = task_args[4] if len(task_args) > 4 else None
+
+        with tracing.span('task', 'task', {'path': input_path}):
+            # 1. Load (from the decoded frame cache when one is given)
+            with tracing.span('decode'):
+                image = load_frame(input_path, cache_dir)
+            if image is None:
+                return (False, f"Failed to load {input_path}")
+
+            # 2. Process
+            processed_image = process_pipeline(image, engine)
+
+            # 3. Save (if flag is True)
+            if save_flag:
+                filename = os.path.basename(input_path)
+                output_path = os.path.join(output_folder, filename)
+                with tracing.span('encode'):
+                    if save_image(processed_image, output_path):
+                        result_cache.record(input_path, output_path)
+
         return (True, f"Processed {os.path.basename(input_path)}")
         
     except Exception as e:
         # print(f"Error processing {task_args[0]}: {e}")
-        return (False, str(e))
\ No newline at end of file
+        return (False, str(e))
+    finally:
+        tracing.flush()
+
+def batch_worker_task(batch):
+    """
+    Worker entry point for batch mode.
+    Args: batch (list): [(task_index, task_args), ...], ideally of one image size
+                        (see scheduler.build_batches).
+    Returns [(task_index, (ok, msg)), ...].
+    Same-sized frames of an engine that can_batch are processed as one stack,
+    any other frame on its own with its own engine.
+    """
+    results = []
+    groups = {}
+    try:
+        with tracing.span('batch', 'task', {'size': len(batch)}):
+            for i, task_args in batch:
+                cache_dir = task_args[4] if len(task_args) > 4 else None
+                with tracing.span('decode'):
+                    image = load_frame(task_args[0], cache_dir)
+                if image is None:
+                    results.append((i, (False, f"Failed to load {task_args[0]}")))
+                    continue
+                engine = task_args[3] if len(task_args) > 3 else 'reference'
+                key = (image.shape, image.dtype.str) if can_batch(engine) else (i,)
+                groups.setdefault(key, []).append((i, task_args, image))
+
+            for members in groups.values():
+                try:
+                    if len(members) > 1:
+                        edge_maps = process_batch([image for _, _, image in members])
+                    else:
+                        _, task_args, image = members[0]
+                        edge_maps = [process_pipeline(image, task_args[3] if len(task_args) > 3 else 'reference')]
+                except Exception as e:
+                    results.extend((i, (False, str(e))) for i, _, _ in members)
+                    continue
+                for (i, task_args, _), edge_map in zip(members, edge_maps):
+                    input_path, output_folder, save_flag = task_args[:3]
+                    try:
+                        if save_flag:
+                            with tracing.span('encode'):
+                                save_image(edge_map, os.path.join(output_folder, os.path.basename(input_path)))
+                        results.append((i, (True, f"Processed {os.path.basename(input_path)}")))
+                    except Exception as e:
+                        results.append((i, (False, str(e))))
+        return results
+    finally:
+        tracing.flush()
+
+def tagged_worker_task(task_args):
+    """worker_task that also returns its input path, for unordered (streaming) completion."""
+    return task_args[0], worker_task(task_args)
\ No newline at end of file